@@ -0,0 +1,128 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import Config
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a question, ignoring trailing punctuation"""
+    return " ".join(query.lower().split()).rstrip("?!. ")
+
+
+class AnswerCache:
+    """
+    LRU cache of generated answers with a time-to-live.
+
+    Entries are keyed by the normalised query plus the ids of the chunks retrieved for it,
+    so an answer is only reused when the LLM would have seen exactly the same context. The
+    cache is tied to the vector store version it was filled against: once a document is
+    added or removed the version moves on and every entry is dropped.
+
+    With a semantic threshold, a question that misses the exact key can still reuse the
+    answer of a cached question with the same retrieved chunks whose query embedding has at
+    least that cosine similarity.
+    """
+
+    def __init__(self, max_entries: int = None, ttl: float = None, semantic_threshold: float = None):
+        self.max_entries = max_entries or Config.ANSWER_CACHE_SIZE
+        self.ttl = ttl or Config.ANSWER_CACHE_TTL
+        self.semantic_threshold = semantic_threshold or Config.ANSWER_CACHE_SEMANTIC_THRESHOLD
+
+        # (normalised query, chunk ids) -> (answer, query embedding, expiry time)
+        self._entries: "OrderedDict[Tuple[str, Tuple[int, ...]], Tuple[Dict[str, Any], Optional[np.ndarray], float]]" = OrderedDict()
+        # chunk ids -> normalised queries cached with them, for semantic lookups
+        self._groups: Dict[Tuple[int, ...], set] = {}
+        self._version = None
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "semantic_hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, query: str, chunk_ids: List[int], version: int,
+            query_embedding: np.ndarray = None) -> Optional[Dict[str, Any]]:
+        key = (normalize_query(query), tuple(chunk_ids))
+        query_embedding = _unit(query_embedding)
+        now = time.monotonic()
+
+        with self._lock:
+            if self._version is not None and version < self._version:
+                self._stats["misses"] += 1
+                return None
+            self._sync_version(version)
+
+            entry = self._live_entry(key, now)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[0]
+
+            if self.semantic_threshold and query_embedding is not None:
+                for cached_query in list(self._groups.get(key[1], ())):
+                    candidate = self._live_entry((cached_query, key[1]), now)
+                    if candidate is not None and candidate[1] is not None and \
+                            float(np.dot(candidate[1], query_embedding)) >= self.semantic_threshold:
+                        self._entries.move_to_end((cached_query, key[1]))
+                        self._stats["semantic_hits"] += 1
+                        return candidate[0]
+
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, query: str, chunk_ids: List[int], version: int, answer: Dict[str, Any],
+            query_embedding: np.ndarray = None):
+        key = (normalize_query(query), tuple(chunk_ids))
+        query_embedding = _unit(query_embedding)
+
+        with self._lock:
+            # An answer generated against an older index is not worth keeping
+            if self._version is not None and version < self._version:
+                return
+            self._sync_version(version)
+
+            self._entries[key] = (answer, query_embedding, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            self._groups.setdefault(key[1], set()).add(key[0])
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._groups.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), **self._stats}
+
+    def _sync_version(self, version: int):
+        if version != self._version:
+            if self._entries:
+                self._stats["invalidations"] += 1
+            self._entries.clear()
+            self._groups.clear()
+            self._version = version
+
+    def _live_entry(self, key, now: float):
+        entry = self._entries.get(key)
+        if entry is not None and entry[2] < now:
+            self._remove(key)
+            return None
+        return entry
+
+    def _remove(self, key):
+        del self._entries[key]
+        group = self._groups.get(key[1])
+        if group is not None:
+            group.discard(key[0])
+            if not group:
+                del self._groups[key[1]]
+
+
+def _unit(vector: Optional[np.ndarray]) -> Optional[np.ndarray]:
+    if vector is None:
+        return None
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
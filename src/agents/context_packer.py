@@ -0,0 +1,152 @@
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from config import Config
+
+WORD_PATTERN = re.compile(r"\w+")
+SENTENCE_END = re.compile(r"[.!?][\"')\]]*\s|\n")
+# A chunk boundary overlap shorter than this is left alone; chunks are cut with
+# CHUNK_OVERLAP characters in common, so real overlaps are far longer
+MIN_OVERLAP_CHARS = 40
+# No tokenizer produces fewer than one token per this many characters of text; chunks are
+# cut to this before counting so huge default documents are not tokenised in full
+MAX_CHARS_PER_TOKEN = 8
+
+
+class ContextPacker:
+    """
+    Fits retrieved chunks into the token budget left in the LLM context window.
+
+    Chunks arrive best first. Each one is, in order:
+      - trimmed where it overlaps a chunk already packed (neighbouring chunks of a
+        document share CHUNK_OVERLAP characters),
+      - dropped when most of its word trigrams already appear in a packed chunk,
+      - packed whole if it fits the remaining budget, or else cut at a sentence (or
+        word) boundary to fill it, provided at least `min_chunk_tokens` remain.
+
+    Tokens are counted with the model's own tokenizer through `count_tokens`.
+    """
+
+    def __init__(self, count_tokens: Callable[[str], int], redundancy_threshold: float = None,
+                 min_chunk_tokens: int = None):
+        self.count_tokens = count_tokens
+        self.redundancy_threshold = redundancy_threshold or Config.CONTEXT_REDUNDANCY_THRESHOLD
+        self.min_chunk_tokens = min_chunk_tokens or Config.CONTEXT_MIN_CHUNK_TOKENS
+        # "[Context N]\n" header and the blank line separating chunks in the prompt
+        self.item_overhead = count_tokens("[Context 10]\n\n\n")
+
+        self._lock = threading.Lock()
+        self._stats = {"prompts": 0, "chunks_packed": 0, "chunks_trimmed": 0,
+                       "redundant_dropped": 0, "over_budget_dropped": 0, "overlap_chars_trimmed": 0}
+
+    def pack(self, context: List[str], source_info: List[Dict], budget: int) -> Tuple[List[str], List[Dict]]:
+        """Chunks to put in the prompt and their source entries, using at most `budget` tokens"""
+        packed, kept, shingles = [], [], []
+        stats = dict.fromkeys(self._stats, 0)
+        stats["prompts"] = 1
+
+        for position, text in enumerate(context):
+            remaining = budget - self.item_overhead
+            if remaining < self.min_chunk_tokens:
+                stats["over_budget_dropped"] += len(context) - position
+                break
+
+            trimmed = self._trim_overlaps(text, packed)
+            stats["overlap_chars_trimmed"] += len(text) - len(trimmed)
+            chunk_shingles = _shingles(trimmed)
+            if not trimmed.strip() or self._is_redundant(chunk_shingles, shingles):
+                stats["redundant_dropped"] += 1
+                continue
+
+            candidate = trimmed[:remaining * MAX_CHARS_PER_TOKEN]
+            known = source_info[position].get("tokens") if position < len(source_info) else None
+            # Sources may carry the chunk's precomputed token count (see DefaultCorpus)
+            tokens = known if known is not None and candidate == text else self.count_tokens(candidate)
+            if tokens > remaining or len(candidate) < len(trimmed):
+                candidate, tokens = self._truncate(candidate, tokens, remaining)
+                if candidate is None:
+                    stats["over_budget_dropped"] += 1
+                    continue
+                stats["chunks_trimmed"] += 1
+
+            packed.append(candidate)
+            kept.append(position)
+            shingles.append(chunk_shingles)
+            budget -= tokens + self.item_overhead
+            stats["chunks_packed"] += 1
+
+        with self._lock:
+            for key, value in stats.items():
+                self._stats[key] += value
+
+        return packed, [source_info[i] for i in kept if i < len(source_info)]
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def _is_redundant(self, chunk_shingles: Set[Tuple[str, ...]], packed_shingles: List[Set[Tuple[str, ...]]]) -> bool:
+        if not chunk_shingles:
+            return False
+        return any(
+            len(chunk_shingles & other) >= self.redundancy_threshold * len(chunk_shingles)
+            for other in packed_shingles
+        )
+
+    def _trim_overlaps(self, text: str, packed: List[str]) -> str:
+        for other in packed:
+            # `other` ends with the start of `text`: drop that head
+            overlap = _boundary_overlap(other, text)
+            if overlap:
+                text = text[overlap:]
+            # `text` ends with the start of `other`: drop that tail
+            overlap = _boundary_overlap(text, other)
+            if overlap:
+                text = text[:-overlap]
+        return text.strip()
+
+    def _truncate(self, text: str, tokens: int, budget: int) -> Tuple[Optional[str], int]:
+        """Longest prefix of `text` ending on a sentence or word boundary that fits `budget` tokens"""
+        if budget < self.min_chunk_tokens:
+            return None, 0
+
+        limit = len(text)
+        for _ in range(4):
+            if tokens > budget:
+                # Scale the cut by the observed characters per token, with a little headroom
+                limit = int(limit * budget / tokens * 0.95)
+            candidate = _cut_at_boundary(text[:limit])
+            tokens = self.count_tokens(candidate)
+            if tokens <= budget:
+                return (candidate, tokens) if tokens >= self.min_chunk_tokens else (None, 0)
+            limit = len(candidate)
+        return None, 0
+
+
+def _boundary_overlap(first: str, second: str) -> int:
+    """Length of the longest suffix of `first` that is a prefix of `second`, or 0 if short"""
+    probe = second[:MIN_OVERLAP_CHARS]
+    if len(probe) < MIN_OVERLAP_CHARS:
+        return 0
+    start = first.find(probe)
+    while start != -1:
+        if second.startswith(first[start:]):
+            return len(first) - start
+        start = first.find(probe, start + 1)
+    return 0
+
+
+def _cut_at_boundary(text: str) -> str:
+    """Cut `text` after its last sentence end in the second half, else at its last whitespace"""
+    cut = None
+    for match in SENTENCE_END.finditer(text, len(text) // 2):
+        cut = match.end()
+    if cut is None:
+        cut = text.rfind(" ", len(text) // 2)
+    return text[:cut].rstrip() if cut and cut > 0 else text.rstrip()
+
+
+def _shingles(text: str) -> Set[Tuple[str, ...]]:
+    words = WORD_PATTERN.findall(text.lower())
+    return set(zip(words, words[1:], words[2:]))
@@ -0,0 +1,124 @@
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Tuple
+
+from config import Config
+from document_processors.all_parsers import iter_chunks
+from vector_store.bm25_index import BM25Index
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DOC_EXTENSIONS = (".txt", ".md", ".csv")
+
+
+class DefaultCorpus:
+    """
+    In-memory copy of the default documents answered from when RAG is off.
+
+    Files in the folder are read once, cut into chunks with their token counts and indexed
+    with BM25. A request only re-reads files whose modification time or size changed, and
+    checks for changes at most every DEFAULT_DOCS_CHECK_INTERVAL seconds. select() returns
+    the chunks that best match a query, or the opening chunks of each file when nothing
+    matches.
+    """
+
+    def __init__(self, folder: str, count_tokens: Callable[[str], int]):
+        self.folder = folder
+        self.count_tokens = count_tokens
+
+        # (files, rows, lexical), replaced as a whole on reload so select() needs no lock:
+        # file name -> ((mtime_ns, size), chunks, token counts), the (file name, chunk number)
+        # of every BM25 row, and the BM25 index over all chunks
+        self._snapshot: Tuple[Dict[str, Tuple[Tuple[int, int], List[str], List[int]]], List[Tuple[str, int]], BM25Index] = \
+            ({}, [], BM25Index())
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self._stats = {"reloads": 0, "files_read": 0}
+
+    def select(self, query: str = None, limit: int = None) -> Tuple[List[str], List[Dict]]:
+        """Up to `limit` chunks for `query`, best first, with their source entries"""
+        limit = limit or Config.TOP_K_CHUNKS
+        self._refresh()
+        files, rows, lexical = self._snapshot
+
+        if query:
+            picked = [(*rows[row], score) for row, score in lexical.search(query, limit)]
+        else:
+            picked = []
+        if not picked:
+            # Nothing to rank by: take the opening chunks of the files in turn
+            depth = 0
+            while len(picked) < limit and any(depth < len(entry[1]) for entry in files.values()):
+                picked.extend((name, depth, None) for name, entry in files.items() if depth < len(entry[1]))
+                depth += 1
+            picked = picked[:limit]
+
+        context, source_info = [], []
+        for name, number, score in picked:
+            _, chunks, token_counts = files[name]
+            context.append(chunks[number])
+            source_info.append({
+                "file_name": name,
+                "file_type": name.split(".")[-1],
+                "score": 0.5,
+                "bm25_score": score,
+                "context_number": len(context),
+                "tokens": token_counts[number]
+            })
+        return context, source_info
+
+    def get_stats(self) -> Dict[str, int]:
+        files, rows, _ = self._snapshot
+        return {"files": len(files), "chunks": len(rows), **self._stats}
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < Config.DEFAULT_DOCS_CHECK_INTERVAL:
+            return
+
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < Config.DEFAULT_DOCS_CHECK_INTERVAL:
+                return
+
+            signatures = self._scan()
+            if signatures != {name: entry[0] for name, entry in self._snapshot[0].items()}:
+                self._reload(signatures)
+            self._checked_at = now
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        if not os.path.isdir(self.folder):
+            return {}
+        signatures = {}
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if entry.name.endswith(DEFAULT_DOC_EXTENSIONS) and entry.is_file():
+                    stat = entry.stat()
+                    signatures[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        return dict(sorted(signatures.items()))
+
+    def _reload(self, signatures: Dict[str, Tuple[int, int]]):
+        files = {}
+        for name, signature in signatures.items():
+            entry = self._snapshot[0].get(name)
+            if entry is None or entry[0] != signature:
+                try:
+                    with open(os.path.join(self.folder, name), "r", encoding="utf-8") as f:
+                        chunks = list(iter_chunks([f.read()], Config.CHUNK_SIZE, Config.CHUNK_OVERLAP))
+                except Exception as e:
+                    logger.error(f"Failed to load {name}: {e}")
+                    continue
+                entry = (signature, chunks, [self.count_tokens(chunk) for chunk in chunks])
+                self._stats["files_read"] += 1
+            files[name] = entry
+
+        rows, lexical = [], BM25Index()
+        for name, (_, chunks, _) in files.items():
+            for number, chunk in enumerate(chunks):
+                lexical.add(len(rows), chunk)
+                rows.append((name, number))
+
+        self._snapshot = (files, rows, lexical)
+        self._stats["reloads"] += 1
+        logger.info(f"Loaded {len(files)} default documents ({len(rows)} chunks) from {self.folder}")
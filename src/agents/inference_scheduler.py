@@ -0,0 +1,233 @@
+import time
+import queue
+import logging
+import itertools
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from config import Config
+from telemetry import telemetry
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+_STREAM_END = object()
+
+
+class SchedulerError(Exception):
+    """Base class for errors raised when the scheduler cannot serve a request."""
+
+
+class SchedulerFullError(SchedulerError):
+    """The inference queue is at capacity; the caller should retry later."""
+
+
+class InferenceTimeoutError(SchedulerError):
+    """The request did not finish within its timeout."""
+
+
+class _Job:
+    def __init__(self, fn: Callable, priority: int, timeout: float):
+        self.fn = fn
+        self.priority = priority
+        self.trace_id = telemetry.current_trace()
+        self.enqueued_at = time.monotonic()
+        self.deadline = self.enqueued_at + timeout
+        self.output = queue.Queue()
+        self.cancelled = False
+
+    def expired(self) -> bool:
+        return time.monotonic() > self.deadline
+
+
+class _JobStream:
+    """
+    Iterator over a job's output that cancels the job once it is closed or exhausted.
+
+    A generator's finally block only runs if the generator was started, so a client that
+    disconnects before the first item would otherwise leave the job queued and generating.
+    """
+
+    def __init__(self, job: _Job, items: Iterator):
+        self._job = job
+        self._items = items
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._items)
+        except BaseException:
+            self._job.cancelled = True
+            raise
+
+    def close(self):
+        self._job.cancelled = True
+        self._items.close()
+
+    def __del__(self):
+        self._job.cancelled = True
+
+
+class InferenceScheduler:
+    """
+    Owns the single Llama instance and serialises access to it.
+
+    Requests are placed on a bounded priority queue (FIFO within a priority) and run
+    one at a time on a dedicated worker thread, so concurrent Flask requests never call
+    into llama.cpp simultaneously. A full queue rejects new work immediately and every
+    request carries a deadline covering both its queue wait and its generation time.
+    """
+
+    def __init__(self, model, max_queue_size: int = None, timeout: float = None):
+        self.model = model
+        self.max_queue_size = max_queue_size or Config.INFERENCE_QUEUE_SIZE
+        self.timeout = timeout or Config.INFERENCE_TIMEOUT
+
+        self._queue = queue.PriorityQueue(maxsize=self.max_queue_size)
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._active = False
+        self._wait_times = deque(maxlen=1000)
+        self._counters = {
+            "submitted": 0,
+            "completed": 0,
+            "rejected": 0,
+            "timed_out": 0,
+            "cancelled": 0,
+            "failed": 0
+        }
+
+        telemetry.collect("rag_inference_queue_depth", "Generation requests waiting for the LLM",
+                          lambda: self._queue.qsize())
+        telemetry.collect("rag_inference_active", "Whether the LLM is generating", lambda: int(self._active))
+        telemetry.collect("rag_inference_requests_total", "Generation requests by outcome",
+                          self.get_counters, metric_type="counter", label="outcome")
+
+        self._worker = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+        self._worker.start()
+
+    def run(self, fn: Callable[[Any], Any], priority: int = PRIORITY_NORMAL, timeout: float = None) -> Any:
+        """Run fn(model) on the worker thread and return its result."""
+        job = self._submit(lambda model: iter([fn(model)]), priority, timeout)
+        results = _JobStream(job, self._drain(job))
+        try:
+            return next(results)
+        finally:
+            results.close()
+
+    def stream(self, fn: Callable[[Any], Iterator], priority: int = PRIORITY_NORMAL,
+               timeout: float = None) -> Iterator:
+        """
+        Run the generator returned by fn(model) on the worker thread and stream its items.
+
+        The job is queued immediately, so SchedulerFullError is raised here rather than on
+        first iteration. Closing the returned iterator stops generation at the next item.
+        """
+        job = self._submit(fn, priority, timeout)
+        return _JobStream(job, self._drain(job))
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._wait_times)
+            counters = dict(self._counters)
+            active = self._active
+
+        def percentile(p):
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))], 4) if waits else 0.0
+
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue_size": self.max_queue_size,
+            "active": active,
+            "wait_time_avg": round(sum(waits) / len(waits), 4) if waits else 0.0,
+            "wait_time_p50": percentile(0.5),
+            "wait_time_p95": percentile(0.95),
+            "wait_time_max": round(waits[-1], 4) if waits else 0.0,
+            **counters
+        }
+
+    def get_counters(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+    def _submit(self, fn: Callable, priority: int, timeout: Optional[float]) -> _Job:
+        job = _Job(fn, priority, timeout or self.timeout)
+        try:
+            self._queue.put_nowait((priority, next(self._sequence), job))
+        except queue.Full:
+            self._count("rejected")
+            raise SchedulerFullError(f"Inference queue is full ({self.max_queue_size} pending requests)")
+        self._count("submitted")
+        return job
+
+    def _drain(self, job: _Job) -> Iterator:
+        # Cancellation when iteration ends is registered by _JobStream, which also covers a
+        # stream that is closed before it was ever started
+        while True:
+            remaining = job.deadline - time.monotonic()
+            try:
+                item = job.output.get(timeout=max(remaining, 0))
+            except queue.Empty:
+                raise InferenceTimeoutError("Inference request timed out")
+            if item is _STREAM_END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    def _run(self):
+        while True:
+            _, _, job = self._queue.get()
+            wait_time = time.monotonic() - job.enqueued_at
+            with self._lock:
+                self._wait_times.append(wait_time)
+            telemetry.observe("queue_wait", wait_time, job.trace_id)
+
+            if job.cancelled:
+                self._count("cancelled")
+                continue
+            if job.expired():
+                self._count("timed_out")
+                job.output.put(InferenceTimeoutError("Inference request timed out while queued"))
+                continue
+
+            with self._lock:
+                self._active = True
+            try:
+                self._execute(job)
+            finally:
+                with self._lock:
+                    self._active = False
+
+    def _execute(self, job: _Job):
+        generator = None
+        try:
+            generator = job.fn(self.model)
+            for item in generator:
+                if job.cancelled:
+                    self._count("cancelled")
+                    return
+                if job.expired():
+                    self._count("timed_out")
+                    job.output.put(InferenceTimeoutError("Inference request timed out during generation"))
+                    return
+                job.output.put(item)
+            job.output.put(_STREAM_END)
+            self._count("completed")
+        except Exception as e:
+            logger.error(f"Inference job failed: {e}")
+            self._count("failed")
+            job.output.put(e)
+        finally:
+            if generator is not None and hasattr(generator, "close"):
+                generator.close()
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
@@ -0,0 +1,102 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from config import Config
+from agents.mcp import generate_trace_id
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+
+class IngestionAgent:
+    """
+    Runs document ingestion (parse, chunk, embed, index, save) as background jobs.
+
+    Uploads are handed to a worker pool and tracked by job id, so the HTTP request returns
+    immediately and clients poll for progress. `process_fn(file_path, file_name, progress, **options)`
+    does the actual work and reports progress by calling `progress(**fields)`.
+    """
+
+    def __init__(self, process_fn: Callable[..., Dict[str, Any]], max_workers: int = None,
+                 max_jobs_retained: int = None):
+        self.name = "IngestionAgent"
+        self.process_fn = process_fn
+        self.max_jobs_retained = max_jobs_retained or Config.INGESTION_JOB_HISTORY
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or Config.INGESTION_WORKERS,
+            thread_name_prefix="ingestion"
+        )
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, file_path: str, file_name: str, **options) -> Dict[str, Any]:
+        job_id = generate_trace_id("job")
+        job = {
+            "job_id": job_id,
+            "file_name": file_name,
+            "status": JOB_QUEUED,
+            "stage": None,
+            "progress": {},
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._evict_finished()
+
+        self._executor.submit(self._run, job_id, file_path, file_name, options)
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {**job, "progress": dict(job["progress"])}
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            statuses = [job["status"] for job in self._jobs.values()]
+        return {status: statuses.count(status) for status in (JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED)}
+
+    def _run(self, job_id: str, file_path: str, file_name: str, options: Dict[str, Any]):
+        self._update(job_id, status=JOB_RUNNING, started_at=time.time())
+
+        def progress(stage: str = None, **fields):
+            with self._lock:
+                job = self._jobs[job_id]
+                if stage:
+                    job["stage"] = stage
+                job["progress"].update(fields)
+
+        try:
+            result = self.process_fn(file_path, file_name, progress=progress, **options)
+        except Exception as e:
+            result = {"status": "error", "message": str(e), "trace_id": None}
+
+        if result.get("status") == "success":
+            self._update(job_id, status=JOB_SUCCEEDED, stage="done", result=result, finished_at=time.time())
+        else:
+            logger.error(f"❌ Ingestion job {job_id} for {file_name} failed: {result.get('message')}")
+            self._update(job_id, status=JOB_FAILED, error=result.get("message"), finished_at=time.time())
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _evict_finished(self):
+        # Drop the oldest finished jobs once over the retention limit; active jobs are kept
+        excess = len(self._jobs) - self.max_jobs_retained
+        for job_id in [j for j, job in self._jobs.items() if job["status"] in (JOB_SUCCEEDED, JOB_FAILED)][:max(excess, 0)]:
+            del self._jobs[job_id]
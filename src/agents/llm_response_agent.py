@@ -1,18 +1,123 @@
 import os
+import time
 import uuid
 import logging
 import re
-from typing import List, Dict
-from llama_cpp import Llama
+from typing import Callable, Dict, Iterator, List, Tuple
 
 from agents.mcp import MCPMessage, generate_trace_id
+from agents.inference_scheduler import PRIORITY_NORMAL, InferenceScheduler, SchedulerError
+from agents.context_packer import ContextPacker
+from agents.default_corpus import DefaultCorpus
+from agents.stub_llm import StubLlama
+from config import Config
+from telemetry import telemetry
 
 logger = logging.getLogger(__name__)
 
 
+# Static start of every prompt, up to the retrieved context. It must not vary between
+# requests: llama-cpp-python skips evaluating the prefix a prompt shares with the previous one.
+SYSTEM_PROMPT = """<|system|>
+You are an exceptionally effective and intelligent AI assistant, designed to provide comprehensive, accurate, and well-structured answers. Your primary goal is to deliver responses that not only match but *exceed* the quality and helpfulness of leading AI chatbots like OpenAI's models.
+
+**Core Directives:**
+1. **Strictly Context-Bound:** Answer questions *only* using the information provided in the <context> section. Do not introduce outside knowledge.
+2. **Information Gaps:** If the answer cannot be found within the provided context, state clearly: "I don't have that information in the provided documents."
+3. **Clarity & Conciseness:** Be comprehensive in your answers, but avoid verbosity. Get straight to the point while ensuring all aspects of the query are addressed.
+4. **Professional Tone:** Maintain a helpful, professional, and engaging conversational tone.
+
+**Critical Formatting Requirements:**
+- When listing multiple points or features, ALWAYS put each numbered item (1., 2., 3., etc.) on a NEW LINE
+- When using bullet points (•, -, *), ALWAYS put each bullet point on a NEW LINE
+- Use proper line breaks to separate different sections of your response
+- Make your responses easy to read and well-structured
+
+**Quality Standards:**
+- Provide accurate, detailed answers based on the context
+- Include relevant examples or specifics from the documents when available
+- If the context contains partial information, acknowledge what you know and what might be missing
+- Cross-reference information from multiple sources in the context when relevant
+- Ensure your response directly addresses the user's question
+
+**Response Structure:**
+1. Start with a direct answer to the main question
+2. Provide supporting details from the context
+3. If applicable, organize information in clear numbered lists or bullet points (each on a new line)
+4. End with any relevant additional context or clarifications
+
+Remember: Your responses should be informative, well-structured, and formatted for easy reading. Each numbered point or bullet point must be on its own line.
+
+<context>
+"""
+
+
+class StreamingFormatter:
+    """
+    Applies format_response_with_newlines incrementally to a token stream.
+
+    Only the text up to the last whitespace that is followed by more output is
+    formatted, and trailing whitespace is held back, so every emitted piece is
+    guaranteed to be a prefix of the formatting applied to the complete response.
+    """
+
+    def __init__(self, format_fn: Callable[[str], str]):
+        self.format_fn = format_fn
+        self.raw = ""
+        self.emitted = ""
+
+    def feed(self, token: str) -> str:
+        self.raw += token
+        raw = self.raw.strip()
+        cut = max(raw.rfind(" "), raw.rfind("\n"), raw.rfind("\t"))
+        if cut < 0:
+            return ""
+        return self._emit(self.format_fn(raw[:cut + 1]).rstrip())
+
+    def finish(self) -> str:
+        return self._emit(self.text)
+
+    @property
+    def text(self) -> str:
+        return self.format_fn(self.raw.strip())
+
+    def _emit(self, formatted: str) -> str:
+        if not formatted.startswith(self.emitted):
+            return ""
+        delta = formatted[len(self.emitted):]
+        self.emitted = formatted
+        return delta
+
+
 class LLMResponseAgent:
-    def __init__(self):
+    def __init__(self, local: bool = False):
+        """`local` loads the model in this process even when MODEL_SERVER_ADDRESS is set (the model server itself)"""
         self.name = "LLMResponseAgent"
+        remote = bool(Config.MODEL_SERVER_ADDRESS) and not local
+        self.remote = remote
+
+        if remote:
+            # The model server owns the model and its queue
+            from model_server import RemoteLlama, RemoteScheduler
+            self.llm = RemoteLlama(Config.MODEL_SERVER_ADDRESS)
+        elif Config.LLM_BACKEND == "stub":
+            self.llm = StubLlama(
+                n_ctx=Config.LLM_CONTEXT_WINDOW,
+                prompt_token_seconds=Config.STUB_LLM_PROMPT_TOKEN_SECONDS,
+                token_seconds=Config.STUB_LLM_TOKEN_SECONDS
+            )
+        else:
+            self.llm = self.load_model()
+
+        # All calls into llama.cpp go through the scheduler's single worker thread; with a
+        # model server, through the server's scheduler only
+        self.scheduler = RemoteScheduler(self.llm) if remote else InferenceScheduler(self.llm)
+        self.context_packer = ContextPacker(self.count_tokens)
+        self.default_corpus = DefaultCorpus(Config.DEFAULT_DOCS_DIR, self.count_tokens)
+
+    def load_model(self):
+        # Imported here so the stub backend runs without llama-cpp-python installed
+        from llama_cpp import Llama
 
         # Set model file path (adjust if your model is in a different location)
         self.model_path = os.path.expanduser(
@@ -30,41 +135,16 @@ class LLMResponseAgent:
         if not full_model_path:
             raise FileNotFoundError("Model GGUF file not found.")
 
-        self.llm = Llama(
+        return Llama(
             model_path=full_model_path,
-            n_ctx=2048,
+            n_ctx=Config.LLM_CONTEXT_WINDOW,
             n_threads=4,
             n_gpu_layers=0
         )
 
-    def load_default_documents(self) -> tuple:
-        context = []
-        source_info = []
-        doc_folder = "./data"
-
-        if not os.path.exists(doc_folder):
-            return context, source_info
-
-        seen = set()
-        for idx, file_name in enumerate(os.listdir(doc_folder)):
-            if file_name.endswith((".txt", ".md", ".csv")):
-                full_path = os.path.join(doc_folder, file_name)
-                try:
-                    with open(full_path, "r", encoding="utf-8") as f:
-                        content = f.read()
-                        context.append(content[:3000])
-                        if file_name not in seen:
-                            source_info.append({
-                                "file_name": file_name,
-                                "file_type": file_name.split(".")[-1],
-                                "score": 0.5,
-                                "context_number": idx + 1
-                            })
-                            seen.add(file_name)
-                except Exception as e:
-                    logger.error(f"Failed to load {file_name}: {e}")
-
-        return context, source_info
+    def load_default_documents(self, query: str = None) -> tuple:
+        """Default-document chunks and source entries for `query` (see DefaultCorpus)"""
+        return self.default_corpus.select(query)
 
     def format_response_with_newlines(self, text: str) -> str:
         """
@@ -84,41 +164,11 @@ class LLMResponseAgent:
         
         return text
 
-    def generate_response(self, query: str, context: List[str], source_info: List[Dict]) -> tuple:
+    def build_prompt(self, query: str, context: List[str]) -> str:
         context_text = "\n\n".join([f"[Context {i+1}]\n{ctx}" for i, ctx in enumerate(context)]) if context else ""
 
-        prompt = f"""<|system|>
-You are an exceptionally effective and intelligent AI assistant, designed to provide comprehensive, accurate, and well-structured answers. Your primary goal is to deliver responses that not only match but *exceed* the quality and helpfulness of leading AI chatbots like OpenAI's models.
-
-**Core Directives:**
-1. **Strictly Context-Bound:** Answer questions *only* using the information provided in the <context> section. Do not introduce outside knowledge.
-2. **Information Gaps:** If the answer cannot be found within the provided context, state clearly: "I don't have that information in the provided documents."
-3. **Clarity & Conciseness:** Be comprehensive in your answers, but avoid verbosity. Get straight to the point while ensuring all aspects of the query are addressed.
-4. **Professional Tone:** Maintain a helpful, professional, and engaging conversational tone.
-
-**Critical Formatting Requirements:**
-- When listing multiple points or features, ALWAYS put each numbered item (1., 2., 3., etc.) on a NEW LINE
-- When using bullet points (•, -, *), ALWAYS put each bullet point on a NEW LINE
-- Use proper line breaks to separate different sections of your response
-- Make your responses easy to read and well-structured
-
-**Quality Standards:**
-- Provide accurate, detailed answers based on the context
-- Include relevant examples or specifics from the documents when available
-- If the context contains partial information, acknowledge what you know and what might be missing
-- Cross-reference information from multiple sources in the context when relevant
-- Ensure your response directly addresses the user's question
-
-**Response Structure:**
-1. Start with a direct answer to the main question
-2. Provide supporting details from the context
-3. If applicable, organize information in clear numbered lists or bullet points (each on a new line)
-4. End with any relevant additional context or clarifications
-
-Remember: Your responses should be informative, well-structured, and formatted for easy reading. Each numbered point or bullet point must be on its own line.
-
-<context>
-{context_text}
+        # Everything up to the context is SYSTEM_PROMPT, so consecutive prompts share that prefix
+        return f"""{SYSTEM_PROMPT}{context_text}
 </context>
 
 <|user|>
@@ -126,19 +176,34 @@ Remember: Your responses should be informative, well-structured, and formatted f
 
 <|assistant|>"""
 
-        try:
-            result = self.llm(prompt, max_tokens=512, stop=["<|user|>"])
-            text = result["choices"][0]["text"].strip()
-            if not text:
-                raise ValueError("Empty response from LLM.")
-            
-            # Apply post-processing to ensure proper newlines
-            text = self.format_response_with_newlines(text)
-            
-        except Exception as e:
-            logger.warning(f"LLM error: {e}")
-            text = "Sorry, I couldn't generate a valid response."
+    def count_tokens(self, text: str) -> int:
+        # Tokenising only reads the model vocabulary, so it is safe outside the scheduler thread
+        return len(self.llm.tokenize(text.encode("utf-8"), add_bos=False))
 
+    def build_packed_prompt(self, query: str, context: List[str], source_info: List[Dict]) -> Tuple[str, List[Dict]]:
+        """
+        Prompt with as much of `context` as fits the context window next to the answer's
+        LLM_MAX_TOKENS, plus the source entries of the chunks that made it in.
+        """
+        with telemetry.span("prompt_build"):
+            # +1 for the BOS token llama.cpp prepends
+            budget = Config.LLM_CONTEXT_WINDOW - Config.LLM_MAX_TOKENS - 1
+            context, source_info = self.context_packer.pack(
+                context, source_info, budget - self.count_tokens(self.build_prompt(query, []))
+            )
+
+            # Token counts of separately tokenised pieces can differ slightly from the whole prompt
+            prompt = self.build_prompt(query, context)
+            prompt_tokens = self.count_tokens(prompt)
+            while context and prompt_tokens > budget:
+                context, source_info = context[:-1], source_info[:len(context) - 1]
+                prompt = self.build_prompt(query, context)
+                prompt_tokens = self.count_tokens(prompt)
+
+        telemetry.count("prompt_tokens", prompt_tokens)
+        return prompt, source_info
+
+    def build_sources(self, source_info: List[Dict]) -> List[Dict]:
         seen = set()
         sources = []
         for i, info in enumerate(source_info):
@@ -151,12 +216,105 @@ Remember: Your responses should be informative, well-structured, and formatted f
                     "context_number": i + 1
                 })
                 seen.add(file_name)
+        return sources
+
+    def generate_response(self, query: str, context: List[str], source_info: List[Dict],
+                          priority: int = PRIORITY_NORMAL) -> tuple:
+        prompt, source_info = self.build_packed_prompt(query, context, source_info)
+        trace_id = telemetry.current_trace()
+
+        try:
+            tokens = self.scheduler.stream(lambda llm: self.generate_tokens(llm, prompt, trace_id), priority=priority)
+            text = "".join(tokens).strip()
+            if not text:
+                raise ValueError("Empty response from LLM.")
+            
+            # Apply post-processing to ensure proper newlines
+            with telemetry.span("postprocess"):
+                text = self.format_response_with_newlines(text)
+            
+        except SchedulerError:
+            raise
+        except Exception as e:
+            logger.warning(f"LLM error: {e}")
+            text = "Sorry, I couldn't generate a valid response."
+
+        return text, self.build_sources(source_info)
+
+    def generate_tokens(self, llm, prompt: str, trace_id: str = None) -> Iterator[str]:
+        """
+        Runs on the scheduler's worker thread; yields raw text pieces from llama.cpp.
+
+        Time to the first piece is recorded as prompt evaluation, the rest as generation.
+        With a model server those stages are timed by the server (see RemoteLlama).
+        """
+        started = time.perf_counter()
+        first_token_at = None
+        generated = 0
+        try:
+            for chunk in llm(prompt, max_tokens=Config.LLM_MAX_TOKENS, stop=["<|user|>"], stream=True):
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                    if not self.remote:
+                        telemetry.observe("prompt_eval", first_token_at - started, trace_id)
+                generated += 1
+                yield chunk["choices"][0]["text"]
+        finally:
+            if first_token_at is not None:
+                elapsed = time.perf_counter() - first_token_at
+                if not self.remote:
+                    telemetry.observe("generation", elapsed, trace_id)
+                telemetry.record_generation(generated, elapsed)
+
+    def stream_response(self, query: str, context: List[str], source_info: List[Dict]) -> Iterator[Dict]:
+        """
+        Stream the LLM response token by token.
+
+        The request is queued with the scheduler before this returns, so a full queue
+        raises SchedulerFullError to the caller instead of failing mid-stream.
+
+        The returned iterator yields {"type": "token", "text": ...} events as llama.cpp
+        produces them, already passed through format_response_with_newlines, followed by
+        a single {"type": "done", "response": ..., "sources": ...} event.
+        """
+        prompt, source_info = self.build_packed_prompt(query, context, source_info)
+        trace_id = telemetry.current_trace()
+        tokens = self.scheduler.stream(lambda llm: self.generate_tokens(llm, prompt, trace_id))
+        return self._stream_events(tokens, source_info, trace_id)
+
+    def _stream_events(self, tokens: Iterator[str], source_info: List[Dict], trace_id: str = None) -> Iterator[Dict]:
+        formatter = StreamingFormatter(self.format_response_with_newlines)
+        formatting = 0.0
+
+        try:
+            for token in tokens:
+                started = time.perf_counter()
+                delta = formatter.feed(token)
+                formatting += time.perf_counter() - started
+                if delta:
+                    yield {"type": "token", "text": delta}
+
+            delta = formatter.finish()
+            if delta:
+                yield {"type": "token", "text": delta}
+            text = formatter.text
+            if not text:
+                raise ValueError("Empty response from LLM.")
+
+        except Exception as e:
+            logger.warning(f"LLM error: {e}")
+            text = "Sorry, I couldn't generate a valid response."
+            if not formatter.emitted:
+                yield {"type": "token", "text": text}
+        finally:
+            tokens.close()
+            telemetry.observe("postprocess", formatting, trace_id)
 
-        return text, sources
+        yield {"type": "done", "response": text, "sources": self.build_sources(source_info)}
 
-    def generate_response_from_message(self, mcp_msg: Dict) -> tuple:
+    def generate_response_from_message(self, mcp_msg: Dict, priority: int = PRIORITY_NORMAL) -> tuple:
         query = mcp_msg["payload"].get("query")
         context = mcp_msg["payload"].get("retrieved_context", [])
         source_info = mcp_msg["payload"].get("source_info", [])
 
-        return self.generate_response(query, context, source_info)
\ No newline at end of file
+        return self.generate_response(query, context, source_info, priority=priority)
\ No newline at end of file
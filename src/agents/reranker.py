@@ -0,0 +1,144 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+from config import Config
+from telemetry import telemetry
+
+logger = logging.getLogger(__name__)
+
+
+class Reranker:
+    """
+    Second retrieval stage: re-scores retrieved chunks with a cross-encoder.
+
+    Retrieval fetches RERANK_CANDIDATES chunks cheaply. The cross-encoder reads the query and
+    each chunk together and scores them in batches of RERANK_BATCH_SIZE, in retrieval order.
+    Before each batch the time it will take is estimated from earlier batches, and scoring
+    stops if that would exceed RERANK_BUDGET_MS. The chunks scored so far are ordered by
+    cross-encoder score, and the unscored rest follow in their retrieval order. If the model
+    fails, the retrieval order is kept.
+
+    Scores are cached per (normalised query, chunk id). Chunk ids are never reused, so a
+    cached score stays valid until it is evicted.
+    """
+
+    def __init__(self, model_name: str = None, budget_ms: float = None, batch_size: int = None,
+                 cache_size: int = None):
+        self.model_name = model_name or Config.RERANK_MODEL
+        self.budget = (budget_ms or Config.RERANK_BUDGET_MS) / 1000
+        self.batch_size = batch_size or Config.RERANK_BATCH_SIZE
+        self.cache_size = cache_size or Config.RERANK_CACHE_SIZE
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._cache: "OrderedDict[tuple, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Running estimate of seconds per (query, chunk) pair, used to stop before overrunning
+        self._seconds_per_pair = None
+        self.stats = {
+            "queries": 0,
+            "pairs_scored": 0,
+            "cache_hits": 0,
+            "over_budget": 0,
+            "failures": 0,
+            "seconds": 0.0
+        }
+
+    @property
+    def model(self):
+        """The cross-encoder; sentence-transformers is imported on first use"""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None and Config.MODEL_SERVER_ADDRESS:
+                    # Scored by the shared model server
+                    from model_server import RemoteCrossEncoder
+                    self._model = RemoteCrossEncoder(self.model_name, Config.MODEL_SERVER_ADDRESS)
+                elif self._model is None:
+                    from sentence_transformers import CrossEncoder
+                    self._model = CrossEncoder(self.model_name, max_length=Config.RERANK_MAX_LENGTH)
+        return self._model
+
+    def warm_up(self):
+        """Load the model and time a batch, so the first query neither pays for loading nor misjudges the budget"""
+        self.model.predict([("warm up", "warm up")], show_progress_bar=False)
+        # Then time a full batch once the model is warm, seeding the estimate the budget check uses
+        self._score("warm up", ["warm up"] * self.batch_size)
+
+    def rerank(self, query: str, results: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+        """The best `top_k` of the search `results` (best first); the chunks that were scored carry a `rerank_score`"""
+        if len(results) <= 1:
+            return results[:top_k]
+
+        started = time.perf_counter()
+        normalised = " ".join(query.lower().split())
+        scores = {}  # position in results -> cross-encoder score
+        with self._lock:
+            for i, result in enumerate(results):
+                score = self._cache.get((normalised, result["id"]))
+                if score is not None:
+                    self._cache.move_to_end((normalised, result["id"]))
+                    scores[i] = score
+        cache_hits = len(scores)
+
+        pending = [i for i in range(len(results)) if i not in scores]
+        over_budget = failed = False
+        with telemetry.span("rerank"):
+            for start in range(0, len(pending), self.batch_size):
+                batch = pending[start:start + self.batch_size]
+                elapsed = time.perf_counter() - started
+                if self._seconds_per_pair is not None and elapsed + self._seconds_per_pair * len(batch) > self.budget:
+                    over_budget = True
+                    break
+                try:
+                    batch_scores = self._score(query, [results[i]["text"] for i in batch])
+                except Exception as e:
+                    logger.warning(f"Re-ranking failed, keeping retrieval order: {e}")
+                    failed = True
+                    break
+                with self._lock:
+                    for i, score in zip(batch, batch_scores):
+                        scores[i] = score
+                        self._cache[(normalised, results[i]["id"])] = score
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+
+        if failed:
+            order = list(range(len(results)))
+        else:
+            order = sorted(scores, key=lambda i: -scores[i]) + [i for i in range(len(results)) if i not in scores]
+
+        with self._lock:
+            self.stats["queries"] += 1
+            self.stats["pairs_scored"] += len(scores) - cache_hits
+            self.stats["cache_hits"] += cache_hits
+            self.stats["over_budget"] += int(over_budget)
+            self.stats["failures"] += int(failed)
+            self.stats["seconds"] += time.perf_counter() - started
+
+        reranked = []
+        for i in order[:top_k]:
+            result = results[i]
+            if i in scores and not failed:
+                result = dict(result, rerank_score=round(scores[i], 4))
+            reranked.append(result)
+        return reranked
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        seconds = stats.pop("seconds")
+        stats["avg_ms"] = round(seconds / stats["queries"] * 1000, 2) if stats["queries"] else 0.0
+        stats["ms_per_pair"] = round(self._seconds_per_pair * 1000, 3) if self._seconds_per_pair else None
+        return {"model": self.model_name, "budget_ms": self.budget * 1000, **stats}
+
+    def _score(self, query: str, texts: List[str]) -> List[float]:
+        started = time.perf_counter()
+        scores = self.model.predict([(query, text) for text in texts], batch_size=self.batch_size,
+                                    show_progress_bar=False)
+        per_pair = (time.perf_counter() - started) / len(texts)
+        # Weighted towards recent batches, so the estimate follows load on the machine
+        previous = self._seconds_per_pair
+        self._seconds_per_pair = per_pair if previous is None else 0.7 * previous + 0.3 * per_pair
+        return [float(score) for score in scores]
@@ -0,0 +1,63 @@
+import time
+import zlib
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+STUB_ANSWER = ("Based on the provided documents, here is a summary of the relevant points. "
+               "1. The context covers the question. 2. Further details are in the sources listed below.")
+
+
+class StubLlama:
+    """
+    Stand-in for llama_cpp.Llama used when Config.LLM_BACKEND is "stub", e.g. for benchmarks
+    and for running the app without a model file.
+
+    Text is tokenised on whitespace. Like llama.cpp it keeps the tokens of the last prompt
+    and only "evaluates" the part of a new prompt after their common prefix, sleeping
+    `prompt_token_seconds` per evaluated token and `token_seconds` per generated token, then
+    streams a fixed answer.
+    """
+
+    def __init__(self, n_ctx: int = 2048, prompt_token_seconds: float = 0.0, token_seconds: float = 0.0):
+        self.n_ctx = n_ctx
+        self.prompt_token_seconds = prompt_token_seconds
+        self.token_seconds = token_seconds
+        self.input_ids = np.zeros(0, dtype=np.intc)
+
+    @property
+    def n_tokens(self) -> int:
+        return len(self.input_ids)
+
+    def tokenize(self, text: bytes, add_bos: bool = True, special: bool = False) -> List[int]:
+        tokens = [zlib.crc32(word) & 0x7fffffff for word in text.split()]
+        return [1] + tokens if add_bos else tokens
+
+    def eval(self, tokens: List[int]):
+        if self.prompt_token_seconds:
+            time.sleep(self.prompt_token_seconds * len(tokens))
+        self.input_ids = np.concatenate([self.input_ids, np.asarray(tokens, dtype=np.intc)])
+
+    def __call__(self, prompt: str, max_tokens: int = 16, stop: List[str] = None,
+                 stream: bool = False, **kwargs) -> Iterator[Dict]:
+        tokens = np.asarray(self.tokenize(prompt.encode("utf-8")), dtype=np.intc)
+        if len(tokens) + max_tokens > self.n_ctx:
+            raise ValueError(f"Requested tokens ({len(tokens)}) exceed context window of {self.n_ctx}")
+
+        common = 0
+        limit = min(len(tokens), self.n_tokens)
+        while common < limit and tokens[common] == self.input_ids[common]:
+            common += 1
+        self.input_ids = self.input_ids[:common]
+        self.eval(tokens[common:])
+
+        pieces = [word + " " for word in STUB_ANSWER.split()][:max_tokens]
+        if stream:
+            return self._stream(pieces)
+        return {"choices": [{"text": "".join(pieces)}]}
+
+    def _stream(self, pieces: List[str]) -> Iterator[Dict]:
+        for piece in pieces:
+            if self.token_seconds:
+                time.sleep(self.token_seconds)
+            yield {"choices": [{"text": piece}]}
@@ -0,0 +1,146 @@
+"""
+Synthetic benchmark corpora.
+
+Text is drawn from a fixed pseudo-vocabulary with a Zipf-like word distribution, seeded so
+that two runs with the same parameters measure exactly the same input. Documents can be
+written in every format the upload path accepts; PDFs are assembled by hand (one Helvetica
+text stream per page) so no PDF writer library is needed.
+"""
+import os
+import random
+from typing import Dict, List
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "ta", "vo", "shi", "den", "por", "tex", "gal", "bri", "son", "qua", "fel"]
+TOPIC_WORDS = ["pump", "warranty", "invoice", "sensor", "firmware", "shipment", "battery", "license",
+               "calibration", "revenue", "latency", "backup", "error", "valve", "contract", "region"]
+
+
+class SyntheticCorpus:
+    def __init__(self, seed: int = 0, vocabulary_size: int = 5000):
+        self.random = random.Random(seed)
+        words = set(TOPIC_WORDS)
+        while len(words) < vocabulary_size:
+            words.add("".join(self.random.choice(SYLLABLES) for _ in range(self.random.randint(1, 4))))
+        self.vocabulary = sorted(words)
+        self.random.shuffle(self.vocabulary)
+        # Zipf-like weights: the n-th word is about 1/n as frequent as the first
+        self.weights = [1.0 / (rank + 1) for rank in range(len(self.vocabulary))]
+
+    def sentence(self) -> str:
+        words = self.random.choices(self.vocabulary, self.weights, k=self.random.randint(8, 20))
+        if self.random.random() < 0.1:
+            # Occasional identifier, like the part numbers and codes of real documents
+            words.insert(self.random.randrange(len(words)), f"err-{self.random.randint(1000, 9999)}")
+        return " ".join(words).capitalize() + "."
+
+    def paragraph(self, chars: int = 500) -> str:
+        sentences = []
+        length = 0
+        while length < chars:
+            sentences.append(self.sentence())
+            length += len(sentences[-1]) + 1
+        return " ".join(sentences)
+
+    def text(self, chars: int) -> str:
+        paragraphs = []
+        length = 0
+        while length < chars:
+            paragraphs.append(self.paragraph())
+            length += len(paragraphs[-1]) + 2
+        return "\n\n".join(paragraphs)
+
+    def chunks(self, count: int, chars: int = 800) -> List[str]:
+        return [self.paragraph(chars) for _ in range(count)]
+
+    def queries(self, count: int) -> List[str]:
+        """Short questions, each mentioning a couple of frequent and rarer words"""
+        queries = []
+        for i in range(count):
+            words = self.random.choices(self.vocabulary[:200], k=2) + self.random.choices(self.vocabulary, k=2)
+            queries.append(f"What does the document say about {' '.join(words)}? ({i})")
+        return queries
+
+    def write_documents(self, directory: str, chars: int) -> Dict[str, str]:
+        """Write one document of about `chars` characters per supported format; returns format -> path"""
+        os.makedirs(directory, exist_ok=True)
+        paths = {}
+
+        for extension in ("txt", "md"):
+            paths[extension] = os.path.join(directory, f"document.{extension}")
+            with open(paths[extension], "w", encoding="utf-8") as f:
+                f.write(self.text(chars))
+
+        paths["csv"] = os.path.join(directory, "document.csv")
+        with open(paths["csv"], "w", encoding="utf-8") as f:
+            f.write("id,region,amount,notes\n")
+            for row in range(max(1, chars // 100)):
+                f.write(f"{row},{self.random.choice(TOPIC_WORDS)},{self.random.randint(1, 10000)},"
+                        f"\"{self.sentence()}\"\n")
+
+        paths["docx"] = os.path.join(directory, "document.docx")
+        self._write_docx(paths["docx"], chars)
+        paths["pptx"] = os.path.join(directory, "document.pptx")
+        self._write_pptx(paths["pptx"], chars)
+        paths["pdf"] = os.path.join(directory, "document.pdf")
+        write_pdf(paths["pdf"], [self.paragraph(2000) for _ in range(max(1, chars // 2000))])
+        return paths
+
+    def _write_docx(self, path: str, chars: int):
+        from docx import Document
+
+        document = Document()
+        for _ in range(max(1, chars // 500)):
+            document.add_paragraph(self.paragraph())
+        document.save(path)
+
+    def _write_pptx(self, path: str, chars: int):
+        from pptx import Presentation
+
+        presentation = Presentation()
+        layout = presentation.slide_layouts[1]
+        for _ in range(max(1, chars // 1000)):
+            slide = presentation.slides.add_slide(layout)
+            slide.shapes.title.text = self.sentence()
+            slide.placeholders[1].text = self.paragraph(900)
+        presentation.save(path)
+
+
+def write_pdf(path: str, pages: List[str], line_chars: int = 90):
+    """Minimal PDF with one page of Helvetica text per entry of `pages`"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_numbers = []
+    for text in pages:
+        lines, line = [], ""
+        for word in text.split():
+            if line and len(line) + len(word) + 1 > line_chars:
+                lines.append(line)
+                line = word
+            else:
+                line = f"{line} {word}" if line else word
+        lines.append(line)
+
+        escaped = (l.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for l in lines)
+        stream = "BT /F1 9 Tf 11 TL 40 800 Td " + " ".join(f"({l}) Tj T*" for l in escaped) + " ET"
+        stream = stream.encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects))
+        page_numbers.append(len(objects))
+    kids = " ".join(f"{number} 0 R" for number in page_numbers).encode()
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_numbers))
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
@@ -0,0 +1,372 @@
+"""
+Benchmark harness for ingestion, retrieval and generation, from src/:
+
+    python -m benchmarks.run                                # every suite, default sizes
+    python -m benchmarks.run --suites search --sizes 1000,10000,100000 --index-types flat,hnsw
+    python -m benchmarks.run compare old.json new.json      # relative change per metric
+
+Suites:
+- parse:   parser throughput per format, on synthetic documents (or --documents DIR)
+- chunk:   streaming chunker throughput
+- embed:   embedding throughput, cold (model) and warm (embedding cache)
+- search:  FAISSVectorStore.search latency percentiles per corpus size, index type and
+           retrieval mode; query embeddings are warmed first so only retrieval is timed
+- chat:    end-to-end POST /api/chatbot/chat latency with the stub LLM backend
+
+Everything runs against a temporary vector store and embedding cache; the configured ones
+are never touched. Results are written as JSON (--output) with the parameters and
+environment of the run.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import statistics
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+from config import Config
+from benchmarks.corpus import SyntheticCorpus
+
+logger = logging.getLogger(__name__)
+
+SUITES = ["parse", "chunk", "embed", "search", "chat"]
+
+
+def latency_summary(seconds: List[float]) -> Dict[str, float]:
+    """Mean and percentiles in milliseconds, plus throughput, of per-call latencies"""
+    ordered = sorted(seconds)
+
+    def percentile(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 3)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": percentile(50),
+        "p90_ms": percentile(90),
+        "p99_ms": percentile(99),
+        "max_ms": round(ordered[-1] * 1000, 3),
+        "per_second": round(len(ordered) / sum(ordered), 1) if sum(ordered) else None
+    }
+
+
+def best_time(fn: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def bench_parse(args, corpus: SyntheticCorpus, workdir: str) -> Dict[str, Any]:
+    from document_processors.all_parsers import get_parser
+
+    if args.documents:
+        paths = {name: os.path.join(args.documents, name) for name in sorted(os.listdir(args.documents))}
+    else:
+        paths = corpus.write_documents(os.path.join(workdir, "documents"), args.doc_chars)
+
+    results = {}
+    for name, path in paths.items():
+        extension = os.path.splitext(path)[1].lstrip(".").lower() or name
+        try:
+            parser = get_parser(extension)
+        except ValueError:
+            continue
+        characters = sum(len(segment) for segment in parser.iter_segments(path))
+        seconds = best_time(lambda: sum(1 for _ in parser.iter_segments(path)), args.repeat)
+        size = os.path.getsize(path)
+        results[name] = {
+            "file_bytes": size,
+            "characters": characters,
+            "seconds": round(seconds, 6),
+            "mb_per_second": round(size / seconds / 1e6, 2) if seconds else None,
+            "characters_per_second": round(characters / seconds) if seconds else None
+        }
+    return results
+
+
+def bench_chunk(args, corpus: SyntheticCorpus, workdir: str) -> Dict[str, Any]:
+    from document_processors.all_parsers import iter_chunks
+
+    text = corpus.text(args.chunk_chars)
+    # Fed in 1 MB segments, as TXTParser yields them
+    segments = [text[start:start + 1024 * 1024] for start in range(0, len(text), 1024 * 1024)]
+    count = sum(1 for _ in iter_chunks(segments, Config.CHUNK_SIZE, Config.CHUNK_OVERLAP))
+    seconds = best_time(lambda: sum(1 for _ in iter_chunks(segments, Config.CHUNK_SIZE, Config.CHUNK_OVERLAP)),
+                        args.repeat)
+    return {
+        "characters": len(text),
+        "chunks": count,
+        "chunk_size": Config.CHUNK_SIZE,
+        "chunk_overlap": Config.CHUNK_OVERLAP,
+        "seconds": round(seconds, 6),
+        "chunks_per_second": round(count / seconds) if seconds else None,
+        "mb_per_second": round(len(text) / seconds / 1e6, 2) if seconds else None
+    }
+
+
+def bench_embed(args, corpus: SyntheticCorpus, workdir: str) -> Dict[str, Any]:
+    from vector_store.faiss_store import FAISSVectorStore
+
+    Config.EMBEDDING_BATCH_SIZE = args.embed_batch_size or Config.EMBEDDING_BATCH_SIZE
+    Config.EMBEDDING_THREADS = args.embed_threads or Config.EMBEDDING_THREADS
+    store = FAISSVectorStore()
+    chunks = corpus.chunks(args.embed_chunks)
+
+    started = time.perf_counter()
+    store.embed(chunks)
+    cold = time.perf_counter() - started
+    started = time.perf_counter()
+    store.embed(chunks)
+    warm = time.perf_counter() - started
+
+    return {
+        "model": store.model_name,
+        "chunks": len(chunks),
+        "batch_size": store.embedder.batch_size,
+        "threads": store.embedder.threads,
+        "cold_seconds": round(cold, 4),
+        "cold_chunks_per_second": round(len(chunks) / cold, 1),
+        "cached_seconds": round(warm, 4),
+        "cached_chunks_per_second": round(len(chunks) / warm, 1) if warm else None
+    }
+
+
+def bench_search(args, corpus: SyntheticCorpus, workdir: str) -> Dict[str, Any]:
+    from vector_store.faiss_store import FAISSVectorStore
+
+    sizes = sorted(args.sizes)
+    chunks = corpus.chunks(sizes[-1], chars=Config.CHUNK_SIZE)
+    metadata = [{"file_name": f"document-{i // 50}.txt", "file_type": "txt", "chunk_id": i % 50}
+                for i in range(len(chunks))]
+    queries = corpus.queries(args.queries)
+
+    # Embed every chunk and query once; each store below is filled from the embedding cache
+    embedder = FAISSVectorStore()
+    started = time.perf_counter()
+    embedder.embed(chunks)
+    embedder.embed(queries)
+    results = {"embedding_seconds": round(time.perf_counter() - started, 2), "runs": []}
+
+    original = (Config.FAISS_INDEX_TYPE, Config.FAISS_IVF_NLIST)
+    try:
+        for index_type in args.index_types:
+            for size in sizes:
+                Config.FAISS_INDEX_TYPE = index_type
+                # Scale IVF lists to the corpus so trainable indexes are actually trained
+                Config.FAISS_IVF_NLIST = max(1, min(original[1], size // 39))
+
+                store = FAISSVectorStore()
+                started = time.perf_counter()
+                for start in range(0, size, 1000):
+                    store.add_documents(chunks[start:min(size, start + 1000)], metadata[start:min(size, start + 1000)])
+                build_seconds = time.perf_counter() - started
+                store.embed(queries)
+
+                stats = store.get_stats()
+                for mode in args.modes:
+                    latencies = []
+                    for query in queries:
+                        started = time.perf_counter()
+                        store.search(query, top_k=Config.TOP_K_CHUNKS, mode=mode)
+                        latencies.append(time.perf_counter() - started)
+                    run = {
+                        "index_type": index_type,
+                        "active_index": stats.get("index_type"),
+                        "size": size,
+                        "mode": mode,
+                        "build_seconds": round(build_seconds, 3),
+                        "nlist": Config.FAISS_IVF_NLIST if index_type.startswith("ivf") else None,
+                        **latency_summary(latencies)
+                    }
+                    results["runs"].append(run)
+                    logger.info(f"search {index_type} size={size} mode={mode}: p50 {run['p50_ms']} ms, p99 {run['p99_ms']} ms")
+    finally:
+        Config.FAISS_INDEX_TYPE, Config.FAISS_IVF_NLIST = original
+    return results
+
+
+def bench_chat(args, corpus: SyntheticCorpus, workdir: str) -> Dict[str, Any]:
+    from flask import Flask
+
+    Config.LLM_BACKEND = "stub"
+    Config.STUB_LLM_PROMPT_TOKEN_SECONDS = args.stub_prompt_token_ms / 1000
+    Config.STUB_LLM_TOKEN_SECONDS = args.stub_token_ms / 1000
+    # Default documents for the use_rag=False requests
+    os.makedirs(Config.DEFAULT_DOCS_DIR, exist_ok=True)
+    for i in range(5):
+        with open(os.path.join(Config.DEFAULT_DOCS_DIR, f"default-{i}.txt"), "w", encoding="utf-8") as f:
+            f.write(corpus.text(20_000))
+    from routes.chatbot import chatbot_bp, coordinator
+
+    chunks = corpus.chunks(args.chat_chunks, chars=Config.CHUNK_SIZE)
+    coordinator.vector_store.add_documents(
+        chunks, [{"file_name": f"document-{i // 50}.txt", "file_type": "txt"} for i in range(len(chunks))]
+    )
+
+    app = Flask(__name__)
+    app.register_blueprint(chatbot_bp, url_prefix="/api/chatbot")
+    client = app.test_client()
+    queries = corpus.queries(args.queries)
+
+    def run(messages: List[str], **options) -> Dict[str, Any]:
+        latencies, errors = [], 0
+        for message in messages:
+            started = time.perf_counter()
+            response = client.post("/api/chatbot/chat", json={"message": message, **options})
+            if options.get("stream"):
+                response.get_data()
+            latencies.append(time.perf_counter() - started)
+            errors += response.status_code != 200
+        return {**latency_summary(latencies), "errors": errors}
+
+    return {
+        "stub_prompt_token_ms": args.stub_prompt_token_ms,
+        "stub_token_ms": args.stub_token_ms,
+        "indexed_chunks": len(chunks),
+        "rag": run(queries),
+        # Same questions again: served from the answer cache
+        "rag_repeated": run(queries),
+        "rag_stream": run([f"{query} (streamed)" for query in queries], stream=True),
+        "no_rag": run(queries, use_rag=False)
+    }
+
+
+BENCHMARKS = {"parse": bench_parse, "chunk": bench_chunk, "embed": bench_embed,
+              "search": bench_search, "chat": bench_chat}
+
+
+def environment() -> Dict[str, Any]:
+    info = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count()
+    }
+    try:
+        import faiss
+        info["faiss"] = faiss.__version__
+    except ImportError:
+        pass
+    return info
+
+
+def run_benchmarks(args) -> Dict[str, Any]:
+    workdir = tempfile.mkdtemp(prefix="rag-benchmark-")
+    # Never read or write the configured store, caches or default documents
+    Config.VECTOR_STORE_DIR = os.path.join(workdir, "vector_store")
+    Config.FAISS_INDEX_PATH = os.path.join(workdir, "faiss_index.index")
+    Config.FAISS_META_PATH = os.path.join(workdir, "faiss_index.pkl")
+    Config.EMBEDDING_CACHE_PATH = os.path.join(workdir, "embedding_cache.sqlite")
+    Config.DEFAULT_DOCS_DIR = os.path.join(workdir, "default_documents")
+    Config.UPLOAD_FOLDER = os.path.join(workdir, "uploads")
+
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "parameters": {key: value for key, value in vars(args).items() if key not in ("command", "output")},
+        "results": {}
+    }
+    try:
+        for suite in args.suites:
+            logger.info(f"Running {suite} benchmark")
+            corpus = SyntheticCorpus(seed=args.seed)
+            started = time.perf_counter()
+            try:
+                report["results"][suite] = BENCHMARKS[suite](args, corpus, workdir)
+            except Exception as e:
+                # A missing optional dependency or model fails its own suite, not the run
+                logger.exception(f"{suite} benchmark failed")
+                report["results"][suite] = {"error": f"{type(e).__name__}: {e}"}
+            report["results"][suite]["suite_seconds"] = round(time.perf_counter() - started, 2)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return report
+
+
+def flatten(value: Any, prefix: str = "") -> Dict[str, float]:
+    """Numeric leaves of a report keyed by path; search runs are keyed by type/size/mode"""
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = ((f"{run.get('index_type')}/{run.get('size')}/{run.get('mode')}", run) if isinstance(run, dict)
+                 else (str(i), run) for i, run in enumerate(value))
+    else:
+        return {prefix: value} if isinstance(value, (int, float)) and not isinstance(value, bool) else {}
+
+    flat = {}
+    for key, item in items:
+        flat.update(flatten(item, f"{prefix}.{key}" if prefix else str(key)))
+    return flat
+
+
+def compare(baseline_path: str, current_path: str):
+    with open(baseline_path) as f:
+        baseline = flatten(json.load(f)["results"])
+    with open(current_path) as f:
+        current = flatten(json.load(f)["results"])
+
+    width = max((len(key) for key in current), default=10)
+    for key in sorted(set(baseline) & set(current)):
+        before, after = baseline[key], current[key]
+        change = f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+        print(f"{key:<{width}}  {before:>14}  {after:>14}  {change:>8}")
+
+
+def parse_args(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Benchmark ingestion, retrieval and generation")
+    subcommands = parser.add_subparsers(dest="command")
+    comparison = subcommands.add_parser("compare", help="Print the relative change of every metric between two result files")
+    comparison.add_argument("baseline")
+    comparison.add_argument("current")
+
+    def csv_list(cast):
+        return lambda value: [cast(item) for item in value.split(",") if item]
+
+    parser.add_argument("--suites", type=csv_list(str), default=SUITES, help=f"Comma-separated subset of {','.join(SUITES)}")
+    parser.add_argument("--output", help="Result file (default: benchmark-<timestamp>.json)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions of parse/chunk timings; the best is kept")
+    parser.add_argument("--documents", help="Directory of real documents to parse instead of synthetic ones")
+    parser.add_argument("--doc-chars", type=int, default=500_000, help="Size of each synthetic document")
+    parser.add_argument("--chunk-chars", type=int, default=5_000_000, help="Text size for the chunking benchmark")
+    parser.add_argument("--embed-chunks", type=int, default=512)
+    parser.add_argument("--embed-batch-size", type=int, help="Default: EMBEDDING_BATCH_SIZE")
+    parser.add_argument("--embed-threads", type=int, help="Default: EMBEDDING_THREADS")
+    parser.add_argument("--sizes", type=csv_list(int), default=[1000, 10000], help="Corpus sizes (chunks) for search")
+    parser.add_argument("--index-types", type=csv_list(str), default=["flat", "hnsw"])
+    parser.add_argument("--modes", type=csv_list(str), default=["dense", "lexical", "hybrid"])
+    parser.add_argument("--queries", type=int, default=200, help="Queries per search run and per chat run")
+    parser.add_argument("--chat-chunks", type=int, default=1000, help="Chunks indexed for the chat benchmark")
+    parser.add_argument("--stub-prompt-token-ms", type=float, default=0.0, help="Stub LLM delay per evaluated prompt token")
+    parser.add_argument("--stub-token-ms", type=float, default=0.0, help="Stub LLM delay per generated token")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+    return args
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args()
+
+    if args.command == "compare":
+        compare(args.baseline, args.current)
+        sys.exit(0)
+
+    report = run_benchmarks(args)
+    output = args.output or f"benchmark-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report["results"], indent=2))
+    logger.info(f"Results written to {output}")
@@ -10,15 +10,125 @@ class Config:
     CHUNK_SIZE = 1000
     CHUNK_OVERLAP = 200
 
+    # Parallel PDF/PPTX parsing: page ranges are extracted on a process pool
+    PARSE_WORKERS = os.cpu_count() or 1
+    PARALLEL_PARSE_MIN_PAGES = 20  # smaller files are parsed in-process
+
+    # Background ingestion jobs
+    INGESTION_WORKERS = 2          # documents processed concurrently
+    INGESTION_BATCH_SIZE = 64      # chunks embedded and indexed per step
+    INGESTION_JOB_HISTORY = 1000   # finished jobs kept for /jobs/<id>
+
+    # Chunk deduplication at ingest
+    DEDUP_EXACT = True             # skip chunks whose text (whitespace-normalised) is already stored
+    DEDUP_NEAR_THRESHOLD = None    # cosine similarity to an indexed chunk at which a chunk is skipped, e.g. 0.95
+
     # Retrieval Settings
-    TOP_K_CHUNKS = 3
+    TOP_K_CHUNKS = 8           # candidates retrieved per query without re-ranking; the context packer keeps what fits
+    # Metadata-filtered searches matching at most this many chunks score them exactly
+    # instead of searching the index with an ID selector
+    FILTER_EXACT_MAX_ROWS = 10000
+    # Larger filtered searches on HNSW raise efSearch by the share of chunks filtered out, up to this
+    FILTER_HNSW_EF_SEARCH_MAX = 4096
+
+    # Two-stage retrieval: RERANK_CANDIDATES chunks are retrieved and re-scored by a cross-encoder
+    # in batches, best retrieved first, and the RERANK_TOP_K best go to the LLM. Scoring stops
+    # before it would exceed RERANK_BUDGET_MS; unscored candidates keep their retrieval order
+    RERANK = True
+    RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_CANDIDATES = 50
+    RERANK_TOP_K = 4
+    RERANK_BATCH_SIZE = 16
+    RERANK_BUDGET_MS = 300
+    RERANK_MAX_LENGTH = 256    # tokens of query + chunk read by the cross-encoder
+    RERANK_CACHE_SIZE = 10000  # cached (query, chunk) scores
+    # "dense" (FAISS only), "lexical" (BM25 only) or "hybrid" (both, reciprocal rank fusion)
+    RETRIEVAL_MODE = "dense"
+    HYBRID_CANDIDATES = 20     # candidates taken from each retriever before fusion
+    HYBRID_RRF_K = 60          # rank offset in 1 / (k + rank)
+    BM25_MIN_SCORE = 2.0       # BM25 score a lexical match needs to be passed to the LLM
+
+    # FAISS Index Type: "flat", "ivf_flat", "ivf_pq", "hnsw", "sq_fp16" or "sq8" (see vector_store/index_factory.py)
+    FAISS_INDEX_TYPE = "flat"
+    FAISS_IVF_NLIST = 1024            # inverted lists (IVF types)
+    FAISS_IVF_NPROBE = 16             # lists scanned per query (IVF types)
+    FAISS_PQ_M = 16                   # sub-quantizers, must divide the embedding dimension (IVF-PQ)
+    FAISS_PQ_NBITS = 8                # bits per sub-quantizer code (IVF-PQ)
+    FAISS_HNSW_M = 32                 # graph neighbours per node (HNSW)
+    FAISS_HNSW_EF_CONSTRUCTION = 200  # build-time search depth (HNSW)
+    FAISS_HNSW_EF_SEARCH = 64         # query-time search depth (HNSW)
+    FAISS_TRAIN_MIN_VECTORS = None    # vectors needed before IVF training; None derives it from NLIST
+    FAISS_TRAIN_SAMPLE_SIZE = 100000  # vectors sampled for IVF training
 
     # FAISS Vector Store Paths
+    VECTOR_STORE_DIR = "vector_store/faiss_store"  # append-only segments + manifest
+    COMPACTION_SEGMENT_THRESHOLD = 16  # segments before a background compaction
+    COMPACTION_DELETED_RATIO = 0.2     # share of deleted chunks before a background compaction
+    # Memory-map a compacted store read-only at startup (uploads are then rejected);
+    # meant for serving workers that share one store
+    VECTOR_STORE_MMAP = False
+    # Legacy single-file store, migrated into VECTOR_STORE_DIR on first save
     FAISS_INDEX_PATH = "vector_store/faiss_index.index"
     FAISS_META_PATH = "vector_store/faiss_index.pkl"
 
+    # Default documents answered from when RAG is off, re-read only when a file changes
+    DEFAULT_DOCS_DIR = "./data"
+    DEFAULT_DOCS_CHECK_INTERVAL = 2   # seconds between checks for changed files
+
+    # "llama_cpp" runs the GGUF model; "stub" answers instantly with fixed text (benchmarks,
+    # running without a model), optionally sleeping per prompt token and per generated token
+    LLM_BACKEND = "llama_cpp"
+    STUB_LLM_PROMPT_TOKEN_SECONDS = 0.0
+    STUB_LLM_TOKEN_SECONDS = 0.0
+    # LLM context window in tokens, of which LLM_MAX_TOKENS are reserved for the answer
+    LLM_CONTEXT_WINDOW = 2048
+    LLM_MAX_TOKENS = 512
+    # Context packing: a chunk is dropped when this share of its word trigrams is already in a
+    # packed chunk, and the last chunk is only cut to fit if at least CONTEXT_MIN_CHUNK_TOKENS remain
+    CONTEXT_REDUNDANCY_THRESHOLD = 0.8
+    CONTEXT_MIN_CHUNK_TOKENS = 48
+
+    # Inference Scheduler (bounded queue in front of the single Llama instance)
+    INFERENCE_QUEUE_SIZE = 16
+    INFERENCE_TIMEOUT = 120  # seconds, covering queue wait and generation
+
+    # Startup: models and the vector store load on a background thread. With STARTUP_EAGER
+    # loading begins at app start, otherwise on the first API request; requests arriving
+    # while it runs wait up to STARTUP_REQUEST_WAIT seconds, then get a 503
+    STARTUP_EAGER = True
+    STARTUP_REQUEST_WAIT = 30
+
+    # Multi-process serving (gunicorn.conf.py): when MODEL_SERVER_ADDRESS is set, the LLM and
+    # embedding model are used through the model server on that Unix socket (model_server.py)
+    # instead of being loaded in this process
+    MODEL_SERVER_ADDRESS = os.environ.get("MODEL_SERVER_ADDRESS")
+    MODEL_SERVER_AUTHKEY = os.environ.get("MODEL_SERVER_AUTHKEY", "rag-model-server")
+    MODEL_SERVER_CONNECT_TIMEOUT = 600  # seconds a worker waits for the server to load its models
+    SERVING_WORKERS = os.cpu_count() or 1   # HTTP worker processes
+    SERVING_THREADS = 8                     # request threads per worker
+
+    # Per-request stage timings kept for /traces/<trace_id>
+    TRACE_HISTORY = 1000
+
+    # Answer cache for repeated questions, invalidated whenever documents change
+    ANSWER_CACHE_SIZE = 1000
+    ANSWER_CACHE_TTL = 3600                 # seconds
+    ANSWER_CACHE_SEMANTIC_THRESHOLD = None  # query cosine similarity for reusing an answer, e.g. 0.95
+
+    # Maximum number of queries accepted by /chat/batch
+    CHAT_BATCH_MAX_QUERIES = 10000
+
     # Embedding Model (used with SentenceTransformer)
     EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 
+    # Texts are encoded in length-sorted batches of EMBEDDING_BATCH_SIZE, EMBEDDING_THREADS
+    # batches at a time (torch's intra-op threads are divided between them)
+    EMBEDDING_BATCH_SIZE = 64
+    EMBEDDING_THREADS = 1
+
+    # Embedding cache keyed by (model name, sha256 of text): in-memory LRU + on-disk SQLite
+    EMBEDDING_CACHE_PATH = "vector_store/embedding_cache.sqlite"
+    EMBEDDING_CACHE_SIZE = 10000  # embeddings kept in memory
+
     # ✅ LLaMA Model Path
     LLAMA_MODEL_PATH = "models/llama-2-7b-chat.Q4_K_M.gguf"
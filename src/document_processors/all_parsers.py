@@ -1,23 +1,78 @@
 
+import re
+import math
+import time
+import multiprocessing
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Dict, Any, Tuple
+
+from config import Config
+from telemetry import TimedIterator, telemetry
 
 class BaseDocumentParser(ABC):
-    """Base class for all document parsers"""
-    
+    """
+    Base class for all document parsers
+
+    Parsers expose a streaming API: read_metadata() reads document-level metadata and
+    iter_segments() yields the document text piece by piece (a page, a slide, a block of
+    rows, ...). iter_chunks() turns those segments into overlapping chunks without ever
+    holding the whole document as one string, so memory stays bounded by the segment and
+    chunk size. parse() is the materialised form of the same stream.
+    """
+
+    def __init__(self):
+        self.page_timings: List[float] = []
+
     @abstractmethod
+    def read_metadata(self, file_path: str) -> Dict[str, Any]:
+        """Return document metadata (title, author, etc.)"""
+        pass
+
+    @abstractmethod
+    def iter_segments(self, file_path: str) -> Iterator[str]:
+        """Yield the document text in order, one segment at a time"""
+        pass
+
+    def iter_chunks(self, file_path: str, chunk_size: int = None, overlap: int = None) -> Iterator[str]:
+        """Yield the same chunks as chunk_text() over the full text, streaming"""
+        segments = TimedIterator(self.iter_segments(file_path))
+        chunks = TimedIterator(iter_chunks(
+            segments,
+            chunk_size or Config.CHUNK_SIZE,
+            Config.CHUNK_OVERLAP if overlap is None else overlap
+        ))
+        try:
+            yield from chunks
+        finally:
+            # Time spent producing chunks includes pulling segments from the parser
+            telemetry.observe("parse", segments.elapsed)
+            telemetry.observe("chunk", chunks.elapsed - segments.elapsed)
+
     def parse(self, file_path: str) -> Dict[str, Any]:
         """
         Parse a document and return structured content
-        
+
         Returns:
             Dict containing:
             - 'text': extracted text content
             - 'metadata': document metadata (title, author, etc.)
             - 'chunks': list of text chunks
+            - 'page_timings': seconds spent per page or slide (PDF/PPTX only)
         """
-        pass
-    
+        metadata = self.read_metadata(file_path)
+        text = "".join(self.iter_segments(file_path)).strip()
+
+        result = {
+            'text': text,
+            'metadata': metadata,
+            'chunks': self.chunk_text(text, Config.CHUNK_SIZE, Config.CHUNK_OVERLAP)
+        }
+        if self.page_timings:
+            result['page_timings'] = self.page_timings
+        return result
+
     def chunk_text(self, text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
         """Split text into overlapping chunks"""
         if len(text) <= chunk_size:
@@ -49,61 +104,183 @@ class BaseDocumentParser(ABC):
         return chunks
 
 
+# Buffered text is only trimmed once this many consumed characters have piled up, so
+# large segments are not re-copied for every chunk taken from them
+_CHUNK_BUFFER_TRIM = 64 * 1024
+_NON_SPACE = re.compile(r'\S')
+
+
+def iter_chunks(segments: Iterable[str], chunk_size: int = 1000, overlap: int = 200) -> Iterator[str]:
+    """
+    Streaming equivalent of BaseDocumentParser.chunk_text.
+
+    Yields exactly the chunks chunk_text("".join(segments).strip(), ...) would return, while
+    only buffering the text between the current chunk start and the next segment boundary.
+    """
+    segments = iter(segments)
+    buffer = ""      # stripped document text from position `offset` onwards
+    offset = 0
+    exhausted = False
+    leading = True
+
+    def fill(position: int):
+        # Read until text beyond `position` is known to be non-blank (so position is before the
+        # end of the stripped text) or the input runs out (so the text length is final)
+        nonlocal buffer, exhausted, leading
+        while not exhausted and not _NON_SPACE.search(buffer, max(position - offset, 0)):
+            segment = next(segments, None)
+            if segment is None:
+                exhausted = True
+                buffer = buffer.rstrip()
+                break
+            if leading:
+                segment = segment.lstrip()
+                leading = not segment
+            buffer += segment
+
+    fill(chunk_size)
+    if exhausted and len(buffer) <= chunk_size:
+        yield buffer
+        return
+
+    start = 0
+    while True:
+        end = start + chunk_size
+        fill(end)
+        text_length = offset + len(buffer)
+        if exhausted and start >= text_length:
+            break
+
+        # Try to break at sentence boundary
+        if not exhausted or end < text_length:
+            window = buffer[start - offset:end - offset]
+            sentence_end = max(window.rfind('.'), window.rfind('!'), window.rfind('?'))
+            if sentence_end >= 0:
+                sentence_end += start
+            if sentence_end > start + chunk_size - 100:
+                end = sentence_end + 1
+
+        chunk = buffer[start - offset:end - offset].strip()
+        if chunk:
+            yield chunk
+
+        start = end - overlap
+        if start - offset > _CHUNK_BUFFER_TRIM:
+            buffer = buffer[start - offset:]
+            offset = start
+
+
+
+
+
+_process_pool = None
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        # spawn rather than fork: the server process holds threads and model state
+        _process_pool = ProcessPoolExecutor(
+            max_workers=Config.PARSE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _process_pool
+
+
+def extract_page_ranges(worker: Callable[[str, int, int], List[Tuple[str, float]]],
+                        file_path: str, page_count: int) -> Iterator[Tuple[str, float]]:
+    """
+    Run worker(file_path, start, end) over pages [0, page_count) and yield its per-page
+    (text, seconds) results in page order.
+
+    Files with at least PARALLEL_PARSE_MIN_PAGES pages are split into contiguous page ranges
+    and extracted on a shared process pool; smaller files are extracted in-process. At most
+    two ranges per worker are in flight, so finished pages wait for the consumer instead of
+    accumulating.
+    """
+    if Config.PARSE_WORKERS <= 1 or page_count < Config.PARALLEL_PARSE_MIN_PAGES:
+        yield from worker(file_path, 0, page_count)
+        return
+
+    # A few ranges per worker keeps cores busy when page costs are uneven
+    step = max(1, math.ceil(page_count / (Config.PARSE_WORKERS * 4)))
+    pool = _get_process_pool()
+    ranges = iter(range(0, page_count, step))
+    in_flight = deque()
+
+    def submit_next() -> bool:
+        start = next(ranges, None)
+        if start is None:
+            return False
+        in_flight.append(pool.submit(worker, file_path, start, min(start + step, page_count)))
+        return True
+
+    while len(in_flight) < Config.PARSE_WORKERS * 2 and submit_next():
+        pass
+    try:
+        while in_flight:
+            pages = in_flight.popleft().result()
+            submit_next()
+            yield from pages
+    finally:
+        for future in in_flight:
+            future.cancel()
+
 
 
 
 # csv_parser.py
-import pandas as pd
+# Parser libraries (pandas, python-docx, PyPDF2, python-pptx) are imported where they are
+# used, so importing this module does not load them at application startup
 
 class CSVParser(BaseDocumentParser):
-    def parse(self, file_path: str) -> Dict[str, Any]:
-        df = pd.read_csv(file_path)
-        text_content = df.to_string()
-        
-        return {
-            "text": text_content,
-            "metadata": {"file_name": file_path, "file_type": "csv"},
-            "chunks": self.chunk_text(text_content)
-        }
+    # Rows read and rendered per segment
+    ROWS_PER_SEGMENT = 1000
+
+    def read_metadata(self, file_path: str) -> Dict[str, Any]:
+        return {"file_name": file_path, "file_type": "csv"}
+
+    def iter_segments(self, file_path: str) -> Iterator[str]:
+        # Rendered block by block, each with its own header row, rather than as one
+        # DataFrame.to_string() of the whole file
+        import pandas as pd
+
+        for frame in pd.read_csv(file_path, chunksize=self.ROWS_PER_SEGMENT):
+            yield frame.to_string() + "\n"
 
 
 
 
 # docx_parser.py
-from docx import Document
 
 class DOCXParser(BaseDocumentParser):
-    def parse(self, file_path: str) -> Dict[str, Any]:
-        """Parse DOCX document"""
+    def read_metadata(self, file_path: str) -> Dict[str, Any]:
+        """Parse DOCX document metadata"""
+        from docx import Document
+
         try:
             doc = Document(file_path)
-            
-            # Extract metadata
-            metadata = {
+
+            return {
                 'title': doc.core_properties.title or 'Unknown',
                 'author': doc.core_properties.author or 'Unknown',
                 'paragraphs': len(doc.paragraphs),
                 'file_type': 'DOCX'
             }
-            
-            # Extract text from all paragraphs
-            text = ""
+
+        except Exception as e:
+            raise Exception(f"Error parsing DOCX: {str(e)}")
+
+    def iter_segments(self, file_path: str) -> Iterator[str]:
+        """Yield the text of each non-empty paragraph"""
+        from docx import Document
+
+        try:
+            doc = Document(file_path)
             for paragraph in doc.paragraphs:
                 if paragraph.text.strip():
-                    text += paragraph.text + "\n"
-            
-            # Clean up text
-            text = text.strip()
-            
-            # Create chunks
-            chunks = self.chunk_text(text, 1000, 200) # Using default chunk size and overlap for now
-            
-            return {
-                'text': text,
-                'metadata': metadata,
-                'chunks': chunks
-            }
-            
+                    yield paragraph.text + "\n"
+
         except Exception as e:
             raise Exception(f"Error parsing DOCX: {str(e)}")
 
@@ -111,89 +288,110 @@ class DOCXParser(BaseDocumentParser):
 
 
 # pdf_parser.py
-import PyPDF2
 
 class PDFParser(BaseDocumentParser):
-    def parse(self, file_path: str) -> Dict[str, Any]:
-        """Parse PDF document"""
+    def read_metadata(self, file_path: str) -> Dict[str, Any]:
+        """Parse PDF document metadata"""
+        import PyPDF2
+
         try:
             with open(file_path, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
-                
-                # Extract metadata
-                metadata = {
+
+                return {
                     'title': pdf_reader.metadata.title if pdf_reader.metadata and pdf_reader.metadata.title else 'Unknown',
                     'author': pdf_reader.metadata.author if pdf_reader.metadata and pdf_reader.metadata.author else 'Unknown',
                     'pages': len(pdf_reader.pages),
                     'file_type': 'PDF'
                 }
-                
-                # Extract text from all pages
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-                
-                # Clean up text
-                text = text.strip()
-                
-                # Create chunks
-                chunks = self.chunk_text(text, 1000, 200) # Using default chunk size and overlap for now
-                
-                return {
-                    'text': text,
-                    'metadata': metadata,
-                    'chunks': chunks
-                }
-                
+
+        except Exception as e:
+            raise Exception(f"Error parsing PDF: {str(e)}")
+
+    def iter_segments(self, file_path: str) -> Iterator[str]:
+        """Yield the text of each page, fanned out to worker processes for large files"""
+        import PyPDF2
+
+        try:
+            with open(file_path, 'rb') as file:
+                page_count = len(PyPDF2.PdfReader(file).pages)
+
+            self.page_timings = []
+            for page_text, seconds in extract_page_ranges(_extract_pdf_pages, file_path, page_count):
+                self.page_timings.append(seconds)
+                yield page_text + "\n"
+
         except Exception as e:
             raise Exception(f"Error parsing PDF: {str(e)}")
 
 
+def _extract_pdf_pages(file_path: str, start: int, end: int) -> List[Tuple[str, float]]:
+    """Extract (text, seconds) for pages [start, end); runs in a worker process"""
+    import PyPDF2
+
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        results = []
+        for page_number in range(start, end):
+            started = time.perf_counter()
+            page_text = pdf_reader.pages[page_number].extract_text()
+            results.append((page_text, time.perf_counter() - started))
+        return results
+
+
 
 
 # pptx_parser.py
-from pptx import Presentation
 
 class PPTXParser(BaseDocumentParser):
-    def parse(self, file_path: str) -> Dict[str, Any]:
-        """Parse PPTX document"""
+    def read_metadata(self, file_path: str) -> Dict[str, Any]:
+        """Parse PPTX document metadata"""
+        from pptx import Presentation
+
         try:
             prs = Presentation(file_path)
-            
-            # Extract metadata
-            metadata = {
+
+            return {
                 'title': prs.core_properties.title or 'Unknown',
                 'author': prs.core_properties.author or 'Unknown',
                 'slides': len(prs.slides),
                 'file_type': 'PPTX'
             }
-            
-            # Extract text from all slides
-            text = ""
-            for slide_num, slide in enumerate(prs.slides, 1):
-                slide_text = f"Slide {slide_num}:\n"
-                
-                for shape in slide.shapes:
-                    if hasattr(shape, "text") and shape.text.strip():
-                        slide_text += shape.text + "\n"
-                
-                text += slide_text + "\n"
-            
-            # Clean up text
-            text = text.strip()
-            
-            # Create chunks
-            chunks = self.chunk_text(text, 1000, 200) # Using default chunk size and overlap for now
-            
-            return {
-                'text': text,
-                'metadata': metadata,
-                'chunks': chunks
-            }
-            
+
         except Exception as e:
             raise Exception(f"Error parsing PPTX: {str(e)}")
 
+    def iter_segments(self, file_path: str) -> Iterator[str]:
+        """Yield the text of each slide, fanned out to worker processes for large decks"""
+        from pptx import Presentation
+
+        try:
+            slide_count = len(Presentation(file_path).slides)
+
+            self.page_timings = []
+            for slide_text, seconds in extract_page_ranges(_extract_pptx_slides, file_path, slide_count):
+                self.page_timings.append(seconds)
+                yield slide_text + "\n"
+
+        except Exception as e:
+            raise Exception(f"Error parsing PPTX: {str(e)}")
+
+
+def _extract_pptx_slides(file_path: str, start: int, end: int) -> List[Tuple[str, float]]:
+    """Extract (text, seconds) for slides [start, end); runs in a worker process"""
+    from pptx import Presentation
+
+    prs = Presentation(file_path)
+    results = []
+    for slide_num in range(start, end):
+        started = time.perf_counter()
+        slide_text = [f"Slide {slide_num + 1}:\n"]
+        for shape in prs.slides[slide_num].shapes:
+            if hasattr(shape, "text") and shape.text.strip():
+                slide_text.append(shape.text + "\n")
+        results.append(("".join(slide_text), time.perf_counter() - started))
+    return results
+
 
 
 
@@ -201,38 +399,45 @@ class PPTXParser(BaseDocumentParser):
 import os
 
 class TXTParser(BaseDocumentParser):
-    def parse(self, file_path: str) -> Dict[str, Any]:
-        """Parse TXT/Markdown document"""
+    # Characters read per segment
+    BLOCK_SIZE = 1024 * 1024
+
+    def read_metadata(self, file_path: str) -> Dict[str, Any]:
+        """Parse TXT/Markdown document metadata, counting characters and lines in blocks"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                text = file.read()
-            
-            # Extract metadata
+            size = 0
+            newlines = 0
+            for block in self._read_blocks(file_path):
+                size += len(block)
+                newlines += block.count('\n')
+
             file_name = os.path.basename(file_path)
             file_ext = os.path.splitext(file_name)[1].upper()
-            
-            metadata = {
+
+            return {
                 'title': file_name,
                 'file_type': file_ext[1:] if file_ext else 'TXT',
-                'size': len(text),
-                'lines': len(text.split('\n'))
-            }
-            
-            # Clean up text
-            text = text.strip()
-            
-            # Create chunks
-            chunks = self.chunk_text(text, 1000, 200) # Using default chunk size and overlap for now
-            
-            return {
-                'text': text,
-                'metadata': metadata,
-                'chunks': chunks
+                'size': size,
+                'lines': newlines + 1
             }
-            
+
+        except Exception as e:
+            raise Exception(f"Error parsing TXT/MD: {str(e)}")
+
+    def iter_segments(self, file_path: str) -> Iterator[str]:
+        try:
+            yield from self._read_blocks(file_path)
         except Exception as e:
             raise Exception(f"Error parsing TXT/MD: {str(e)}")
 
+    def _read_blocks(self, file_path: str) -> Iterator[str]:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            while True:
+                block = file.read(self.BLOCK_SIZE)
+                if not block:
+                    break
+                yield block
+
 def get_parser(file_extension: str) -> BaseDocumentParser:
     """Returns the appropriate parser based on file extension."""
     file_extension = file_extension.lower()
@@ -0,0 +1,46 @@
+"""
+Multi-process serving: `gunicorn -c gunicorn.conf.py app:app`, run from src/.
+
+The master starts one model server process (model_server.py) that loads the LLM and the
+embedding model. SERVING_WORKERS HTTP workers each run SERVING_THREADS request threads and
+reach the models over a Unix socket. Each worker maps the vector store read-only
+(VECTOR_STORE_MMAP), so the index pages are shared as well. Uploads are rejected in this
+mode: index documents with the single-process app (`python app.py`), then compact the store.
+"""
+import os
+import sys
+import secrets
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Set before Config is imported, so the model server process and the workers see the same values
+os.environ.setdefault("MODEL_SERVER_ADDRESS", os.path.join(tempfile.gettempdir(), f"rag-model-server-{os.getpid()}.sock"))
+os.environ.setdefault("MODEL_SERVER_AUTHKEY", secrets.token_hex(16))
+
+from config import Config  # noqa: E402
+
+Config.VECTOR_STORE_MMAP = True
+
+bind = os.environ.get("BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("WEB_CONCURRENCY", Config.SERVING_WORKERS))
+worker_class = "gthread"
+threads = Config.SERVING_THREADS
+# Streamed answers can take as long as an inference request
+timeout = Config.INFERENCE_TIMEOUT + 30
+
+_model_server = None
+
+
+def on_starting(server):
+    global _model_server
+    _model_server = subprocess.Popen([sys.executable, "-m", "model_server"],
+                                     cwd=os.path.dirname(os.path.abspath(__file__)))
+    server.log.info(f"Model server started (pid {_model_server.pid}) on {Config.MODEL_SERVER_ADDRESS}")
+
+
+def on_exit(server):
+    if _model_server is not None:
+        _model_server.terminate()
+        _model_server.wait(timeout=30)
@@ -0,0 +1,285 @@
+"""
+Model server for multi-process serving.
+
+One process owns the LLM and the embedding model. HTTP workers (see gunicorn.conf.py) reach
+them over a Unix socket with multiprocessing managers, so N workers share a single copy of
+each model instead of loading N.
+
+- The LLM sits behind the server's InferenceScheduler. Generation from all workers
+  therefore goes through one priority queue. Tokens are streamed back one at a time.
+- Embeddings are computed by the server's SentenceTransformer and returned as arrays.
+- With RERANK on, the re-ranking cross-encoder is served the same way.
+
+Workers use RemoteLlama, RemoteEncoder and RemoteCrossEncoder, which stand in for
+llama_cpp.Llama, SentenceTransformer and CrossEncoder. LLMResponseAgent, FAISSVectorStore
+and Reranker pick them up when Config.MODEL_SERVER_ADDRESS is set. Workers have no inference
+queue of their own (see RemoteScheduler); the server's queue is the only admission control.
+
+Run standalone from src/ with `python -m model_server`.
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import functools
+import threading
+from multiprocessing.managers import BaseManager, IteratorProxy
+from typing import Any, Callable, Dict, Iterator, List
+
+import numpy as np
+
+from config import Config
+from telemetry import telemetry
+from agents.inference_scheduler import PRIORITY_NORMAL
+
+logger = logging.getLogger(__name__)
+
+# Server-side service objects, created by serve() before it starts listening
+_services: Dict[str, object] = {}
+
+
+class LLMService:
+    """Server side: the LLM and its inference queue"""
+
+    def __init__(self):
+        from agents.llm_response_agent import LLMResponseAgent
+
+        self.agent = LLMResponseAgent(local=True)
+
+    def tokenize(self, text: bytes, add_bos: bool = True, special: bool = False) -> List[int]:
+        return self.agent.llm.tokenize(text, add_bos=add_bos, special=special)
+
+    def generate(self, prompt: str, priority: int = PRIORITY_NORMAL, trace_id: str = None) -> Iterator[str]:
+        """Queue `prompt` and stream the raw text pieces; raises SchedulerFullError when full"""
+        agent = self.agent
+        with telemetry.trace(trace_id):
+            return agent.scheduler.stream(lambda llm: agent.generate_tokens(llm, prompt, trace_id), priority=priority)
+
+    def get_trace(self, trace_id: str) -> List[Dict[str, Any]]:
+        """Stages the server timed for `trace_id`: queue_wait, prompt_eval and generation"""
+        return telemetry.get_trace(trace_id) or []
+
+    def get_stats(self) -> Dict:
+        return {
+            "inference": self.agent.scheduler.get_metrics()
+        }
+
+
+class EncoderService:
+    """Server side: Sentence Transformer models by name"""
+
+    def __init__(self):
+        self._models = {}
+        self._lock = threading.Lock()
+        self.model(Config.EMBEDDING_MODEL)
+
+    def model(self, model_name: str):
+        with self._lock:
+            if model_name not in self._models:
+                from sentence_transformers import SentenceTransformer
+                self._models[model_name] = SentenceTransformer(model_name)
+            return self._models[model_name]
+
+    def encode(self, model_name: str, sentences: List[str], **kwargs) -> np.ndarray:
+        return self.model(model_name).encode(sentences, **kwargs)
+
+    def get_sentence_embedding_dimension(self, model_name: str) -> int:
+        return self.model(model_name).get_sentence_embedding_dimension()
+
+
+class CrossEncoderService:
+    """Server side: the re-ranking cross-encoder"""
+
+    def __init__(self):
+        from sentence_transformers import CrossEncoder
+
+        self.model_name = Config.RERANK_MODEL
+        self.model = CrossEncoder(self.model_name, max_length=Config.RERANK_MAX_LENGTH)
+
+    def predict(self, model_name: str, pairs: List[tuple], **kwargs) -> np.ndarray:
+        if model_name != self.model_name:
+            raise ValueError(f"Model server runs cross-encoder {self.model_name}, not {model_name}")
+        return self.model.predict(pairs, **kwargs)
+
+
+class ModelManager(BaseManager):
+    pass
+
+
+ModelManager.register("Iterator", proxytype=IteratorProxy, create_method=False)
+ModelManager.register("llm", callable=lambda: _services["llm"], method_to_typeid={"generate": "Iterator"})
+ModelManager.register("encoder", callable=lambda: _services["encoder"])
+ModelManager.register("cross_encoder", callable=lambda: _services["cross_encoder"])
+
+
+def _authkey() -> bytes:
+    return Config.MODEL_SERVER_AUTHKEY.encode("utf-8")
+
+
+def serve(address: str = None):
+    """Load the models, then serve them on the Unix socket `address` until killed"""
+    address = address or Config.MODEL_SERVER_ADDRESS
+    started = time.monotonic()
+    _services["llm"] = LLMService()
+    _services["encoder"] = EncoderService()
+    if Config.RERANK:
+        _services["cross_encoder"] = CrossEncoderService()
+    logger.info(f"✅ Models loaded in {time.monotonic() - started:.1f}s, serving on {address}")
+
+    if os.path.exists(address):
+        os.unlink(address)
+    server = ModelManager(address=address, authkey=_authkey()).get_server()
+    os.chmod(address, 0o600)
+    server.serve_forever()
+
+
+def connect(address: str = None, timeout: float = None) -> ModelManager:
+    """Connect to the model server, waiting up to `timeout` seconds for it to start listening"""
+    address = address or Config.MODEL_SERVER_ADDRESS
+    deadline = time.monotonic() + (timeout or Config.MODEL_SERVER_CONNECT_TIMEOUT)
+    while True:
+        manager = ModelManager(address=address, authkey=_authkey())
+        try:
+            manager.connect()
+            return manager
+        except (FileNotFoundError, ConnectionRefusedError):
+            # The socket appears once the server has loaded its models
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.5)
+
+
+class RemoteLlama:
+    """
+    Client side: the part of llama_cpp.Llama that LLMResponseAgent uses.
+
+    Generation runs on the server with its own LLM_MAX_TOKENS and stop sequence. Given a
+    trace id, the server times the request's stages under it, and they are copied into this
+    process's trace and metrics once the stream ends.
+    """
+
+    def __init__(self, address: str = None):
+        self._service = connect(address).llm()
+
+    def tokenize(self, text: bytes, add_bos: bool = True, special: bool = False) -> List[int]:
+        return self._service.tokenize(text, add_bos, special)
+
+    def get_stats(self) -> Dict:
+        return self._service.get_stats()
+
+    def __call__(self, prompt: str, max_tokens: int = None, stop: List[str] = None,
+                 stream: bool = False, priority: int = PRIORITY_NORMAL, trace_id: str = None, **kwargs):
+        chunks = self._chunks(self._service.generate(prompt, priority, trace_id), trace_id)
+        if stream:
+            return chunks
+        return {"choices": [{"text": "".join(chunk["choices"][0]["text"] for chunk in chunks)}]}
+
+    def _chunks(self, pieces, trace_id: str = None) -> Iterator[Dict]:
+        try:
+            for piece in pieces:
+                yield {"choices": [{"text": piece}]}
+        finally:
+            # Stops generation on the server when the worker gives up early
+            pieces.close()
+            if trace_id is not None:
+                self._record_trace(trace_id)
+
+    def _record_trace(self, trace_id: str):
+        try:
+            spans = self._service.get_trace(trace_id)
+        except Exception as e:
+            logger.warning(f"Could not fetch stage timings from the model server: {e}")
+            return
+        for span in spans:
+            telemetry.observe(span["stage"], span["ms"] / 1000, trace_id)
+
+
+class RemoteScheduler:
+    """
+    Client side: stands in for the worker's InferenceScheduler.
+
+    Generation is queued by the server's InferenceScheduler, shared by all workers. A second
+    queue per worker would make each request wait twice, and the worker's timeout would
+    run out while the request waits in the server's queue. Requests therefore go straight
+    to the server: priorities are passed along, and SchedulerFullError and
+    InferenceTimeoutError come from the server's queue and its INFERENCE_TIMEOUT. The
+    caller's trace id goes along too, so the server's stage timings join its trace.
+    """
+
+    def __init__(self, llm: RemoteLlama):
+        self.model = llm
+        telemetry.collect("rag_inference_queue_depth", "Generation requests waiting for the LLM",
+                          lambda: self.get_metrics()["queue_depth"])
+
+    def run(self, fn: Callable[[Any], Any], priority: int = PRIORITY_NORMAL, timeout: float = None) -> Any:
+        return fn(self._model_for(priority))
+
+    def stream(self, fn: Callable[[Any], Iterator], priority: int = PRIORITY_NORMAL,
+               timeout: float = None) -> Iterator:
+        """
+        Stream the items of fn(model), where calling the model queues on the server.
+
+        The first item is fetched before this returns, so a full server queue raises
+        SchedulerFullError here, as InferenceScheduler.stream does.
+        """
+        items = fn(self._model_for(priority))
+        try:
+            first = next(items)
+        except StopIteration:
+            return iter(())
+
+        def rest():
+            try:
+                yield first
+                yield from items
+            finally:
+                items.close()
+        return rest()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return self.model.get_stats()["inference"]
+
+    def _model_for(self, priority: int) -> Callable:
+        return functools.partial(self.model, priority=priority, trace_id=telemetry.current_trace())
+
+
+class RemoteEncoder:
+    """Client side: the part of SentenceTransformer that FAISSVectorStore uses"""
+
+    def __init__(self, model_name: str, address: str = None):
+        self.model_name = model_name
+        self._service = connect(address).encoder()
+
+    def encode(self, sentences: List[str], **kwargs) -> np.ndarray:
+        return self._service.encode(self.model_name, list(sentences), **kwargs)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self._service.get_sentence_embedding_dimension(self.model_name)
+
+
+class RemoteCrossEncoder:
+    """Client side: the part of CrossEncoder that Reranker uses"""
+
+    def __init__(self, model_name: str, address: str = None):
+        self.model_name = model_name
+        self._service = connect(address).cross_encoder()
+
+    def predict(self, pairs: List[tuple], **kwargs) -> np.ndarray:
+        return self._service.predict(self.model_name, list(pairs), **kwargs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the LLM and embedding model to HTTP workers")
+    parser.add_argument("--address", default=Config.MODEL_SERVER_ADDRESS,
+                        help="Unix socket path (default: MODEL_SERVER_ADDRESS)")
+    args = parser.parse_args(argv)
+    if not args.address:
+        parser.error("no socket address: pass --address or set MODEL_SERVER_ADDRESS")
+
+    logging.basicConfig(level=logging.INFO)
+    serve(args.address)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,30 +1,85 @@
 import os
+import json
+import time
 import uuid
 import logging
-from flask import Blueprint, request, jsonify
+import threading
+import multiprocessing
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from werkzeug.utils import secure_filename
 
 from config import Config
-from vector_store.faiss_store import FAISSVectorStore
+from telemetry import telemetry
 from agents.llm_response_agent import LLMResponseAgent
 from agents.mcp import MCPMessage, generate_trace_id
+from agents.ingestion_agent import IngestionAgent
+from agents.answer_cache import AnswerCache
+from agents.reranker import Reranker
+from agents.inference_scheduler import PRIORITY_LOW, InferenceTimeoutError, SchedulerError, SchedulerFullError
+from vector_store.metadata_index import validate_filters
+from vector_store.document_store import ReadOnlyStoreError
 
 logger = logging.getLogger(__name__)
 chatbot_bp = Blueprint('chatbot', __name__)
 
 
+class ServiceNotReadyError(Exception):
+    """The models and vector store are still loading, or failed to load."""
+
+
 class LocalCoordinator:
     def __init__(self):
-        self.llm = LLMResponseAgent()
-        self.vector_store = FAISSVectorStore()
-        self.conversation_history = []
-
-        vector_store_path = Config.FAISS_INDEX_PATH
-        if os.path.exists(f"{vector_store_path}.pkl"):
-            self.vector_store.load(vector_store_path)
-            logger.info("✅ Vector store loaded successfully.")
+        # Imported here, not at module level, so faiss is only loaded by the startup thread
+        from vector_store.faiss_store import FAISSVectorStore
+        from vector_store.segment_store import SegmentStore
+
+        # The GGUF model loads on its own thread while the embedding model and the vector
+        # store load on this one
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-loader") as loader:
+            llm = loader.submit(LLMResponseAgent)
+
+            self.vector_store = FAISSVectorStore()
+            if SegmentStore.exists(Config.VECTOR_STORE_DIR):
+                self.vector_store.load(Config.VECTOR_STORE_DIR, mmap=Config.VECTOR_STORE_MMAP)
+                logger.info("✅ Vector store loaded successfully.")
+            elif os.path.exists(f"{Config.FAISS_INDEX_PATH}.pkl"):
+                # Legacy single-file store; the next save rewrites it as segments
+                self.vector_store.load(Config.FAISS_INDEX_PATH)
+                logger.info("✅ Legacy vector store loaded successfully.")
+            if Config.MODEL_SERVER_ADDRESS:
+                # Workers share the store on disk and none may write it, including when mmap
+                # fell back to loading into memory or there was no store to load
+                self.vector_store.read_only = True
+            self.vector_store.warm_up()
+
+            self.reranker = Reranker() if Config.RERANK else None
+            if self.reranker:
+                self.reranker.warm_up()
+
+            self.llm = llm.result()
 
-    def process_document(self, file_path, file_name):
+        self.conversation_history = []
+        self.ingestion = IngestionAgent(self.process_document)
+        self.answer_cache = AnswerCache()
+
+        telemetry.collect("rag_indexed_chunks", "Searchable chunks in the vector store",
+                          lambda: self.vector_store.get_stats()["total_documents"])
+        telemetry.collect("rag_answer_cache_lookups_total", "Answer cache lookups by result",
+                          lambda: {key: value for key, value in self.answer_cache.get_stats().items()
+                                  if key in ("hits", "semantic_hits", "misses")},
+                          metric_type="counter", label="result")
+
+    def process_document(self, file_path, file_name, progress=None, replace=False):
+        """
+        Parse, chunk, embed, index and save one uploaded file.
+
+        `progress(stage=..., **fields)` is called as work advances, e.g. by IngestionAgent
+        to report pages parsed and chunks embedded for a background job. With replace, the
+        chunks of an earlier upload with the same file name are replaced (upsert).
+        """
+        progress = progress or (lambda stage=None, **fields: None)
         try:
             trace_id = generate_trace_id("ingest")
 
@@ -33,70 +88,150 @@ class LocalCoordinator:
             if not parser:
                 raise ValueError("Unsupported file type")
 
-            parsed_data = parser.parse(file_path)
-            chunks = parsed_data["chunks"]
-            metadata = parsed_data["metadata"]
+            progress(stage="parsing")
+            metadata = parser.read_metadata(file_path)
+
+            # Document-level metadata is stored once; chunk_id and the chunk_text preview
+            # are filled in per chunk when search results are assembled
+            document_metadata = metadata.copy()
+            document_metadata.update({
+                "file_name": file_name,
+                "file_type": file_name.split('.')[-1],
+                # ISO 8601 in UTC, so search filters can take date ranges
+                "uploaded_at": datetime.now(timezone.utc).isoformat(timespec="seconds")
+            })
+
+            # Chunks are streamed from the parser and embedded in fixed-size batches, so the
+            # whole document text and chunk list are never held in memory at once
+            progress(
+                stage="embedding",
+                pages_total=metadata.get("pages", metadata.get("slides")),
+                chunks_embedded=0
+            )
+            def report(totals):
+                progress(
+                    chunks_embedded=totals["chunks"],
+                    duplicates_skipped=totals["duplicates"],
+                    near_duplicates_skipped=totals["near_duplicates"]
+                )
+                if parser.page_timings:
+                    progress(pages_parsed=len(parser.page_timings))
+
+            chunks = parser.iter_chunks(file_path)
+            with telemetry.trace(trace_id):
+                if replace:
+                    totals = self.vector_store.upsert_document(chunks, document_metadata, on_batch=report)
+                else:
+                    totals = self.vector_store.add_document_stream(chunks, document_metadata, on_batch=report)
 
-            chunk_metadata = []
-            for i, chunk in enumerate(chunks):
-                meta = metadata.copy()
-                meta.update({
-                    "file_name": file_name,
-                    "chunk_id": i,
-                    "file_type": file_name.split('.')[-1],
-                    "chunk_text": chunk[:100] + "..." if len(chunk) > 100 else chunk
-                })
-                chunk_metadata.append(meta)
+            if parser.page_timings:
+                logger.info(f"📄 Parsed {len(parser.page_timings)} pages of {file_name} in "
+                            f"{sum(parser.page_timings):.2f}s (slowest page {max(parser.page_timings):.2f}s)")
 
-            self.vector_store.add_documents(chunks, chunk_metadata)
-            self.vector_store.save(Config.FAISS_INDEX_PATH)
+            progress(stage="saving")
+            self.vector_store.save(Config.VECTOR_STORE_DIR)
 
             return {
                 "status": "success",
                 "message": f"Document {file_name} processed and indexed.",
                 "trace_id": trace_id,
-                "metadata": metadata
+                "metadata": metadata,
+                "chunks": totals["chunks"],
+                "chunks_indexed": totals["added"],
+                "chunks_replaced": totals.get("replaced", 0),
+                "duplicates_skipped": totals["duplicates"],
+                "near_duplicates_skipped": totals["near_duplicates"]
             }
 
         except Exception as e:
             logger.error(f"❌ Document processing error: {e}")
             return {"status": "error", "message": str(e), "trace_id": None}
 
-    def process_query(self, query, use_rag=True):
-        try:
-            trace_id = generate_trace_id("chat")
-
-            if use_rag:
-                results = self.vector_store.search(query, top_k=Config.TOP_K_CHUNKS)
-                results = [r for r in results if r["score"] > 0.4]
-
-                chunks = [r["text"] for r in results]
+    def retrieval_depth(self):
+        """Chunks fetched per query: the re-ranker's candidates when it is on"""
+        return Config.RERANK_CANDIDATES if self.reranker else Config.TOP_K_CHUNKS
+
+    def retrieve(self, query, trace_id, filters=None):
+        with telemetry.span("retrieve"):
+            results = self.vector_store.search(query, top_k=self.retrieval_depth(), filters=filters)
+        return self.build_retrieval_message(query, trace_id, results)
+
+    def retrieve_batch(self, queries, trace_ids, filters=None):
+        with telemetry.span("retrieve"):
+            batch_results = self.vector_store.search_batch(queries, top_k=self.retrieval_depth(), filters=filters)
+        return [
+            self.build_retrieval_message(query, trace_id, results)
+            for query, trace_id, results in zip(queries, trace_ids, batch_results)
+        ]
+
+    def build_retrieval_message(self, query, trace_id, results):
+        # Dense hits need cosine similarity above 0.4; lexical hits (hybrid/lexical mode)
+        # need a strong enough BM25 match
+        results = [
+            r for r in results
+            if r["score"] > 0.4 or r.get("bm25_score", 0.0) >= Config.BM25_MIN_SCORE
+        ]
+        if self.reranker:
+            # Only the best few of the candidates go to the LLM
+            results = self.reranker.rerank(query, results, Config.RERANK_TOP_K)
+
+        chunks = [r["text"] for r in results]
+
+        source_info = [
+            {
+                "file_name": r["metadata"].get("file_name", "unknown"),
+                "file_type": r["metadata"].get("file_type", "txt"),
+                "score": round(r["score"], 3),
+                "context_number": i + 1
+            }
+            for i, r in enumerate(results)
+        ]
+
+        return MCPMessage(
+            msg_type="RETRIEVAL_RESULT",
+            sender="RetrievalAgent",
+            receiver="LLMResponseAgent",
+            trace_id=trace_id,
+            payload={
+                "retrieved_context": chunks,
+                "query": query,
+                "source_info": source_info,
+                "chunk_ids": [r["id"] for r in results]
+            }
+        )
 
-                source_info = [
-                    {
-                        "file_name": r["metadata"].get("file_name", "unknown"),
-                        "file_type": r["metadata"].get("file_type", "txt"),
-                        "score": round(r["score"], 3),
-                        "context_number": i + 1
-                    }
-                    for i, r in enumerate(results)
-                ]
+    def query_embedding(self, query):
+        """Query embedding for semantic answer-cache lookups (served by the embedding cache), or None when disabled"""
+        if not Config.ANSWER_CACHE_SEMANTIC_THRESHOLD:
+            return None
+        return self.vector_store.embed([query])[0]
 
-                mcp_msg = MCPMessage(
-                    msg_type="RETRIEVAL_RESULT",
-                    sender="RetrievalAgent",
-                    receiver="LLMResponseAgent",
-                    trace_id=trace_id,
-                    payload={
-                        "retrieved_context": chunks,
-                        "query": query,
-                        "source_info": source_info
-                    }
-                )
-                response_text, sources_used = self.llm.generate_response_from_message(mcp_msg)
-            else:
-                chunks, source_info = self.llm.load_default_documents()
-                response_text, sources_used = self.llm.generate_response(query, chunks, source_info)
+    def process_query(self, query, use_rag=True, filters=None):
+        try:
+            trace_id = generate_trace_id("chat")
+            cached = False
+
+            with telemetry.trace(trace_id), telemetry.span("request"):
+                if use_rag:
+                    # Read before retrieval, so an answer is never cached under a newer version
+                    # than the index it was generated from
+                    version = self.vector_store.version
+                    mcp_msg = self.retrieve(query, trace_id, filters)
+                    chunk_ids = mcp_msg["payload"]["chunk_ids"]
+                    query_embedding = self.query_embedding(query)
+
+                    answer = self.answer_cache.get(query, chunk_ids, version, query_embedding)
+                    if answer is not None:
+                        response_text, sources_used = answer["response"], answer["sources"]
+                        cached = True
+                    else:
+                        response_text, sources_used = self.llm.generate_response_from_message(mcp_msg)
+                        self.answer_cache.put(
+                            query, chunk_ids, version, {"response": response_text, "sources": sources_used}, query_embedding
+                        )
+                else:
+                    chunks, source_info = self.llm.load_default_documents(query)
+                    response_text, sources_used = self.llm.generate_response(query, chunks, source_info)
 
             record = {
                 "trace_id": trace_id,
@@ -105,12 +240,126 @@ class LocalCoordinator:
                 "sources": sources_used
             }
             self.conversation_history.append(record)
-            return {"status": "success", **record}
+            return {"status": "success", "cached": cached, **record}
 
+        except SchedulerError:
+            raise
         except Exception as e:
             logger.error(f"❌ Error in query processing: {e}")
             return {"status": "error", "message": str(e), "trace_id": None}
 
+    def process_batch(self, queries, use_rag=True, generate=True, filters=None):
+        """
+        Answer many queries in one call, e.g. for offline evaluation.
+
+        Retrieval for the whole batch is a single batched encode and FAISS search. Answers
+        are then generated one query at a time at low scheduler priority, so interactive
+        chat requests are served first. Batch queries are not added to the conversation
+        history, and a failure on one query is reported in its result without aborting
+        the rest. `filters` (see vector_store/metadata_index.py) applies to every query.
+        """
+        trace_ids = [generate_trace_id("batch") for _ in queries]
+
+        if use_rag:
+            messages = self.retrieve_batch(queries, trace_ids, filters)
+        else:
+            messages = []
+            for query, trace_id in zip(queries, trace_ids):
+                chunks, source_info = self.llm.load_default_documents(query)
+                messages.append(MCPMessage(
+                    msg_type="RETRIEVAL_RESULT",
+                    sender="RetrievalAgent",
+                    receiver="LLMResponseAgent",
+                    trace_id=trace_id,
+                    payload={"retrieved_context": chunks, "query": query, "source_info": source_info}
+                ))
+
+        results = []
+        for mcp_msg in messages:
+            payload = mcp_msg["payload"]
+            record = {"trace_id": mcp_msg["trace_id"], "query": payload["query"]}
+            try:
+                if not generate:
+                    record["sources"] = self.llm.build_sources(payload["source_info"])
+                    record["context"] = payload["retrieved_context"]
+                else:
+                    with telemetry.trace(mcp_msg["trace_id"]):
+                        response_text, sources_used = self.llm.generate_response_from_message(
+                            mcp_msg, priority=PRIORITY_LOW
+                        )
+                    record.update({"response": response_text, "sources": sources_used})
+            except Exception as e:
+                # Scheduler rejections and timeouts included: the rest of the batch still runs
+                logger.error(f"❌ Error in batch query processing: {e}")
+                record["error"] = str(e)
+            results.append(record)
+
+        return results
+
+    def stream_query(self, query, use_rag=True, filters=None):
+        """
+        Starts a streaming response and returns an iterator of token events followed by a
+        final event carrying sources and trace_id.
+
+        Retrieval and admission to the inference queue happen before this returns, so
+        SchedulerFullError surfaces to the caller while a proper status can still be sent.
+        """
+        trace_id = generate_trace_id("chat")
+        started = time.perf_counter()
+        with telemetry.trace(trace_id):
+            if not use_rag:
+                chunks, source_info = self.llm.load_default_documents(query)
+                events = self.llm.stream_response(query, chunks, source_info)
+                return self._record_stream(events, query, trace_id, started=started)
+
+            version = self.vector_store.version
+            mcp_msg = self.retrieve(query, trace_id, filters)
+            payload = mcp_msg["payload"]
+            query_embedding = self.query_embedding(query)
+            cache_entry = (query, payload["chunk_ids"], version, query_embedding)
+
+            answer = self.answer_cache.get(*cache_entry)
+            if answer is not None:
+                # A cached answer is streamed as a single token
+                events = iter([
+                    {"type": "token", "text": answer["response"]},
+                    {"type": "done", "response": answer["response"], "sources": answer["sources"]}
+                ])
+                return self._record_stream(events, query, trace_id, started=started)
+
+            events = self.llm.stream_response(query, payload["retrieved_context"], payload["source_info"])
+            return self._record_stream(events, query, trace_id, cache_entry, started)
+
+    def _record_stream(self, events, query, trace_id, cache_entry=None, started=None):
+        try:
+            for event in events:
+                if event["type"] != "done":
+                    yield event
+                    continue
+
+                record = {
+                    "trace_id": trace_id,
+                    "query": query,
+                    "response": event["response"],
+                    "sources": event["sources"]
+                }
+                self.conversation_history.append(record)
+                if cache_entry is not None:
+                    query, chunk_ids, version, query_embedding = cache_entry
+                    self.answer_cache.put(
+                        query, chunk_ids, version, {"response": record["response"], "sources": record["sources"]}, query_embedding
+                    )
+                yield {"type": "done", **record}
+
+        except Exception as e:
+            logger.error(f"❌ Error in streaming query processing: {e}")
+            yield {"type": "error", "message": str(e), "trace_id": trace_id}
+        finally:
+            if hasattr(events, "close"):
+                events.close()
+            if started is not None:
+                telemetry.observe("request", time.perf_counter() - started, trace_id)
+
     def get_conversation_history(self):
         return self.conversation_history
 
@@ -118,13 +367,126 @@ class LocalCoordinator:
         try:
             return {
                 "vector_store": self.vector_store.get_stats(),
+                "inference": self.llm.scheduler.get_metrics(),
+                "ingestion_jobs": self.ingestion.get_stats(),
+                "answer_cache": self.answer_cache.get_stats(),
+                "reranker": self.reranker.get_stats() if self.reranker else None,
+                "model_server": self.llm.llm.get_stats() if Config.MODEL_SERVER_ADDRESS else None,
+                "context_packer": self.llm.context_packer.get_stats(),
+                "default_documents": self.llm.default_corpus.get_stats(),
                 "conversation_count": len(self.conversation_history)
             }
         except Exception as e:
             return {"error": str(e)}
 
 
-coordinator = LocalCoordinator()
+class Startup:
+    """
+    Builds the LocalCoordinator (LLM, embedding model, vector store) on a background thread.
+
+    Loading starts when the blueprint is registered (STARTUP_EAGER) or on the first request
+    that needs it. Until it finishes, /ready reports 503 and other API requests wait up to
+    STARTUP_REQUEST_WAIT seconds before getting a 503 themselves.
+    """
+
+    def __init__(self):
+        self._coordinator = None
+        self._error = None
+        self._thread = None
+        self._started_at = None
+        self._ready_at = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._started_at = time.monotonic()
+                self._thread = threading.Thread(target=self._build, name="startup", daemon=True)
+                self._thread.start()
+
+    def get(self, timeout=None):
+        """The coordinator, waiting up to `timeout` seconds (forever if None) for it to load"""
+        self.start()
+        if not self._done.wait(timeout):
+            raise ServiceNotReadyError("The models are still loading")
+        if self._error is not None:
+            raise ServiceNotReadyError(f"Startup failed: {self._error}")
+        return self._coordinator
+
+    def status(self):
+        if self._started_at is None:
+            state = "not_started"
+        elif not self._done.is_set():
+            state = "loading"
+        else:
+            state = "failed" if self._error is not None else "ready"
+        status = {"status": state}
+        if self._started_at is not None:
+            status["seconds"] = round((self._ready_at or time.monotonic()) - self._started_at, 2)
+        if self._error is not None:
+            status["error"] = str(self._error)
+        return status
+
+    def _build(self):
+        try:
+            self._coordinator = LocalCoordinator()
+            logger.info(f"✅ Ready after {time.monotonic() - self._started_at:.1f}s")
+        except Exception as e:
+            logger.error(f"❌ Startup failed: {e}")
+            self._error = e
+        finally:
+            self._ready_at = time.monotonic()
+            self._done.set()
+
+
+class _CoordinatorProxy:
+    """Module-level stand-in for the coordinator; attribute access waits for startup"""
+
+    def __getattr__(self, name):
+        return getattr(startup.get(), name)
+
+
+startup = Startup()
+coordinator = _CoordinatorProxy()
+
+# Served while the models load
+STARTUP_EXEMPT_ENDPOINTS = {"chatbot.health", "chatbot.ready", "chatbot.get_metrics"}
+
+
+@chatbot_bp.record_once
+def start_loading(state):
+    # Spawned children (e.g. the parser process pool) re-import the app's main module, and
+    # with it this blueprint; they must not load the models. Their process name is set
+    # before that import, unlike parent_process().
+    if Config.STARTUP_EAGER and multiprocessing.current_process().name == "MainProcess":
+        startup.start()
+
+
+@chatbot_bp.before_request
+def wait_until_ready():
+    if request.endpoint in STARTUP_EXEMPT_ENDPOINTS:
+        return None
+    try:
+        startup.get(timeout=Config.STARTUP_REQUEST_WAIT)
+    except ServiceNotReadyError as e:
+        response = jsonify({'error': str(e), **startup.status()})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    return None
+
+
+@chatbot_bp.route('/health', methods=['GET'])
+def health():
+    """Liveness: the process is up and serving, whether or not the models have loaded"""
+    return jsonify({'status': 'ok'}), 200
+
+
+@chatbot_bp.route('/ready', methods=['GET'])
+def ready():
+    """Readiness: 200 once the LLM, embedding model and vector store are loaded, else 503"""
+    status = startup.status()
+    return jsonify(status), 200 if status['status'] == 'ready' else 503
 
 
 def allowed_file(filename):
@@ -134,34 +496,88 @@ def allowed_file(filename):
 @chatbot_bp.route('/upload', methods=['POST'])
 def upload_document():
     try:
-        if 'file' not in request.files:
-            return jsonify({'error': 'No file provided'}), 400
+        replace = request.form.get('replace', 'false').lower() == 'true'
+        return accept_upload(request.files.get('file'), replace=replace)
 
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({'error': 'No file selected'}), 400
+    except Exception as e:
+        logger.error(f"❌ Upload error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
 
-        if not allowed_file(file.filename):
-            return jsonify({'error': f'File type not supported. Allowed types: {", ".join(Config.ALLOWED_EXTENSIONS)}'}), 400
 
-        filename = secure_filename(file.filename)
-        upload_path = os.path.join(Config.UPLOAD_FOLDER, filename)
-        os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
-        file.save(upload_path)
+def accept_upload(file, filename=None, replace=False):
+    """Save an uploaded file and queue it for ingestion; returns the 202 response with the job id"""
+    if file is None:
+        return jsonify({'error': 'No file provided'}), 400
+    if file.filename == '':
+        return jsonify({'error': 'No file selected'}), 400
+
+    if coordinator.vector_store.read_only:
+        return jsonify({'error': 'Vector store is read-only; index documents with the single-process app'}), 409
+
+    filename = secure_filename(filename or file.filename)
+    if not allowed_file(filename):
+        return jsonify({'error': f'File type not supported. Allowed types: {", ".join(Config.ALLOWED_EXTENSIONS)}'}), 400
+
+    upload_path = os.path.join(Config.UPLOAD_FOLDER, filename)
+    os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
+    file.save(upload_path)
+
+    # Parsing, embedding and indexing run in the background; poll /jobs/<job_id>
+    job = coordinator.ingestion.submit(upload_path, filename, replace=replace)
+    return jsonify({
+        'message': f'Document {filename} accepted for processing.',
+        'filename': filename,
+        'job_id': job['job_id'],
+        'status': job['status']
+    }), 202
+
+
+@chatbot_bp.route('/documents', methods=['GET'])
+def list_documents():
+    try:
+        return jsonify({'documents': coordinator.vector_store.list_documents()}), 200
+    except Exception as e:
+        logger.error(f"❌ Document listing error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
 
-        result = coordinator.process_document(upload_path, filename)
-        if result['status'] == 'success':
-            return jsonify({
-                'message': result['message'],
-                'filename': filename,
-                'metadata': result.get('metadata', {}),
-                'trace_id': result['trace_id']
-            }), 200
-        else:
-            return jsonify({'error': result['message']}), 500
 
+@chatbot_bp.route('/documents/<file_name>', methods=['PUT'])
+def upsert_document(file_name):
+    """Re-index a document: the uploaded file replaces every chunk stored under `file_name`"""
+    try:
+        return accept_upload(request.files.get('file'), filename=file_name, replace=True)
     except Exception as e:
-        logger.error(f"❌ Upload error: {str(e)}")
+        logger.error(f"❌ Upsert error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@chatbot_bp.route('/documents/<file_name>', methods=['DELETE'])
+def delete_document(file_name):
+    try:
+        file_name = secure_filename(file_name)
+        deleted = coordinator.vector_store.delete_document(file_name)
+        if not deleted:
+            return jsonify({'error': f'Unknown document: {file_name}'}), 404
+
+        coordinator.vector_store.save(Config.VECTOR_STORE_DIR)
+        return jsonify({'message': f'Document {file_name} deleted.', 'deleted_chunks': deleted}), 200
+
+    except ReadOnlyStoreError as e:
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        logger.error(f"❌ Delete error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@chatbot_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    try:
+        job = coordinator.ingestion.get(job_id)
+        if job is None:
+            return jsonify({'error': f'Unknown job: {job_id}'}), 404
+        return jsonify(job), 200
+    except Exception as e:
+        logger.error(f"❌ Job status error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 
@@ -174,23 +590,97 @@ def chat():
 
         query = data['message']
         use_rag = data.get('use_rag', True)
+        filters, error = request_filters(data)
+        if error:
+            return error
+
+        if data.get('stream', False):
+            return stream_chat(query, use_rag, filters)
 
-        result = coordinator.process_query(query, use_rag)
+        result = coordinator.process_query(query, use_rag, filters)
         if result['status'] == 'success':
             return jsonify({
                 'response': result['response'],
                 'sources': result.get('sources', []),
                 'query': result['query'],
-                'trace_id': result['trace_id']
+                'trace_id': result['trace_id'],
+                'cached': result['cached']
             }), 200
         else:
             return jsonify({'error': result['message']}), 500
 
+    except SchedulerError as e:
+        return scheduler_error_response(e)
     except Exception as e:
         logger.error(f"❌ Chat error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 
+def request_filters(data):
+    """The request's metadata `filters` (or None), and a 400 response if they are malformed"""
+    filters = data.get('filters')
+    if filters is None:
+        return None, None
+    try:
+        return validate_filters(filters), None
+    except ValueError as e:
+        return None, (jsonify({'error': str(e)}), 400)
+
+
+def scheduler_error_response(error):
+    """503 when the inference queue is full, 504 when a request ran out of time."""
+    logger.warning(f"⚠️ Inference scheduler: {error}")
+    if isinstance(error, SchedulerFullError):
+        return jsonify({'error': str(error)}), 503, {'Retry-After': '5'}
+    if isinstance(error, InferenceTimeoutError):
+        return jsonify({'error': str(error)}), 504
+    return jsonify({'error': str(error)}), 500
+
+
+def stream_chat(query, use_rag, filters=None):
+    """Serve a chat response as Server-Sent Events: `token` events, then `done` (or `error`)."""
+    stream = coordinator.stream_query(query, use_rag, filters)
+
+    def events():
+        for event in stream:
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@chatbot_bp.route('/chat/batch', methods=['POST'])
+def chat_batch():
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data.get('messages'), list) or not data['messages']:
+            return jsonify({'error': 'No messages provided'}), 400
+
+        queries = data['messages']
+        if len(queries) > Config.CHAT_BATCH_MAX_QUERIES:
+            return jsonify({'error': f'Too many messages (max {Config.CHAT_BATCH_MAX_QUERIES})'}), 400
+        if not all(isinstance(q, str) and q.strip() for q in queries):
+            return jsonify({'error': 'Every message must be a non-empty string'}), 400
+        filters, error = request_filters(data)
+        if error:
+            return error
+
+        results = coordinator.process_batch(
+            queries,
+            use_rag=data.get('use_rag', True),
+            generate=data.get('generate', True),
+            filters=filters
+        )
+        return jsonify({'results': results}), 200
+
+    except Exception as e:
+        logger.error(f"❌ Batch chat error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
 @chatbot_bp.route('/history', methods=['GET'])
 def get_history():
     try:
@@ -209,6 +699,20 @@ def get_stats():
         return jsonify({'error': str(e)}), 500
 
 
+@chatbot_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Stage latency histograms, token counters and queue depth in the Prometheus text format"""
+    return Response(telemetry.render(), mimetype='text/plain; version=0.0.4')
+
+
+@chatbot_bp.route('/traces/<trace_id>', methods=['GET'])
+def get_trace(trace_id):
+    spans = telemetry.get_trace(trace_id)
+    if spans is None:
+        return jsonify({'error': f'Unknown trace: {trace_id}'}), 404
+    return jsonify({'trace_id': trace_id, 'spans': spans}), 200
+
+
 @chatbot_bp.route('/clear', methods=['POST'])
 def clear_history():
     try:
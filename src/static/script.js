@@ -112,7 +112,7 @@ async function uploadFile(file) {
     formData.append('file', file);
     
     try {
-        showLoading('Uploading and processing document...');
+        showLoading('Uploading document...');
         
         const response = await fetch('/api/chatbot/upload', {
             method: 'POST',
@@ -120,20 +120,30 @@ async function uploadFile(file) {
         });
         
         const result = await response.json();
+        hideLoading();
         
-        if (response.ok) {
+        if (!response.ok) {
+            updateFileStatus(fileId, 'error');
+            showToast(`Error processing ${file.name}: ${result.error}`, 'error');
+            return;
+        }
+        
+        // Processing continues in the background; follow the ingestion job
+        const job = await waitForJob(result.job_id, fileId);
+        
+        if (job.status === 'succeeded') {
             updateFileStatus(fileId, 'success');
             uploadedFiles.push({
                 id: fileId,
                 name: file.name,
-                metadata: result.metadata,
-                trace_id: result.trace_id
+                metadata: job.result.metadata,
+                trace_id: job.result.trace_id
             });
             showToast(`Successfully processed ${file.name}`, 'success');
             loadSystemStats();
         } else {
             updateFileStatus(fileId, 'error');
-            showToast(`Error processing ${file.name}: ${result.error}`, 'error');
+            showToast(`Error processing ${file.name}: ${job.error}`, 'error');
         }
     } catch (error) {
         updateFileStatus(fileId, 'error');
@@ -144,6 +154,39 @@ async function uploadFile(file) {
     }
 }
 
+async function waitForJob(jobId, fileId) {
+    while (true) {
+        const response = await fetch(`/api/chatbot/jobs/${jobId}`);
+        const job = await response.json();
+        
+        if (!response.ok) {
+            return { status: 'failed', error: job.error };
+        }
+        if (job.status === 'succeeded' || job.status === 'failed') {
+            return job;
+        }
+        
+        updateFileProgress(fileId, job);
+        await new Promise(resolve => setTimeout(resolve, 1000));
+    }
+}
+
+function updateFileProgress(fileId, job) {
+    const statusElement = document.getElementById(`status-${fileId}`);
+    if (!statusElement) return;
+    
+    const progress = job.progress || {};
+    if (job.stage === 'embedding' && progress.pages_total && progress.pages_parsed) {
+        statusElement.textContent = `Indexing page ${progress.pages_parsed}/${progress.pages_total}`;
+    } else if (job.stage === 'embedding' && progress.chunks_embedded) {
+        statusElement.textContent = `Indexed ${progress.chunks_embedded} chunks`;
+    } else if (job.stage) {
+        statusElement.textContent = job.stage.charAt(0).toUpperCase() + job.stage.slice(1) + '...';
+    } else {
+        statusElement.textContent = 'Queued...';
+    }
+}
+
 function addFileToList(file, fileId, status) {
     const fileItem = document.createElement('div');
     fileItem.className = 'file-item';
@@ -206,28 +249,51 @@ async function sendMessage() {
             },
             body: JSON.stringify({
                 message: message,
-                use_rag: ragToggle.checked
+                use_rag: ragToggle.checked,
+                stream: true
             })
         });
         
-        const result = await response.json();
-        
-        // Remove typing indicator
-        removeTypingIndicator(typingId);
-        
-        if (response.ok) {
-            addMessageToChat(result.response, 'bot', result.sources);
-            conversationHistory.push({
-                query: message,
-                response: result.response,
-                sources: result.sources,
-                trace_id: result.trace_id
-            });
-            loadSystemStats();
-        } else {
+        if (!response.ok) {
+            const result = await response.json();
+            removeTypingIndicator(typingId);
             addMessageToChat(`Error: ${result.error}`, 'bot');
             showToast('Error processing message', 'error');
+            return;
         }
+        
+        let streamedText = '';
+        let streamingContent = null;
+        
+        await readEventStream(response, (eventType, data) => {
+            if (eventType === 'token') {
+                if (!streamingContent) {
+                    // Replace typing indicator with the message as soon as the first token arrives
+                    removeTypingIndicator(typingId);
+                    streamingContent = addStreamingMessage();
+                }
+                streamedText += data.text;
+                streamingContent.innerHTML = streamedText;
+                chatMessages.scrollTop = chatMessages.scrollHeight;
+            } else if (eventType === 'done') {
+                removeTypingIndicator(typingId);
+                if (streamingContent) {
+                    streamingContent.parentElement.remove();
+                }
+                addMessageToChat(data.response, 'bot', data.sources);
+                conversationHistory.push({
+                    query: message,
+                    response: data.response,
+                    sources: data.sources,
+                    trace_id: data.trace_id
+                });
+                loadSystemStats();
+            } else if (eventType === 'error') {
+                removeTypingIndicator(typingId);
+                addMessageToChat(`Error: ${data.message}`, 'bot');
+                showToast('Error processing message', 'error');
+            }
+        });
     } catch (error) {
         removeTypingIndicator(typingId);
         addMessageToChat('Network error. Please try again.', 'bot');
@@ -236,6 +302,48 @@ async function sendMessage() {
     }
 }
 
+// Read a text/event-stream response body and dispatch each event as it arrives
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        
+        buffer += decoder.decode(value, { stream: true });
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            
+            let eventType = 'message';
+            let data = '';
+            rawEvent.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) {
+                    eventType = line.slice(7);
+                } else if (line.startsWith('data: ')) {
+                    data += line.slice(6);
+                }
+            });
+            
+            if (data) {
+                onEvent(eventType, JSON.parse(data));
+            }
+        }
+    }
+}
+
+function addStreamingMessage() {
+    const messageDiv = document.createElement('div');
+    messageDiv.className = 'message bot';
+    messageDiv.innerHTML = '<div class="message-content"></div>';
+    chatMessages.appendChild(messageDiv);
+    chatMessages.scrollTop = chatMessages.scrollHeight;
+    return messageDiv.querySelector('.message-content');
+}
+
 function addMessageToChat(content, sender, sources = null) {
     const messageDiv = document.createElement('div');
     messageDiv.className = `message ${sender}`;
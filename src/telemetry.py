@@ -0,0 +1,185 @@
+"""
+Per-stage latency spans and Prometheus-style metrics.
+
+Hot paths wrap their work in `telemetry.span(stage)`. Each span is observed into the
+`rag_stage_seconds{stage=...}` histogram and, when a trace is active, recorded under its
+trace id, so `/traces/<trace_id>` shows where one request spent its time and `/metrics`
+shows the distribution over all requests.
+
+The active trace id is carried in a context variable set with `telemetry.trace(trace_id)`.
+Work handed to another thread (the inference scheduler's worker) passes the trace id
+explicitly.
+
+Stages: parse, chunk, embed, faiss_search, bm25_search, retrieve, rerank, prompt_build,
+queue_wait, prompt_eval, generation, postprocess, request.
+"""
+import time
+import bisect
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import Config
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKENS_PER_SECOND_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+COUNTERS = {
+    "prompt_tokens": "Prompt tokens sent to the LLM",
+    "generated_tokens": "Tokens generated by the LLM"
+}
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("trace_id", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram, one series per label value"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self._series: Dict[str, List[float]] = {}  # label -> bucket counts + [sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, label: str, value: float):
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label)
+            if series is None:
+                series = self._series[label] = [0] * (len(self.buckets) + 2)
+            if position < len(self.buckets):
+                series[position] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self) -> Dict[str, List[float]]:
+        with self._lock:
+            return {label: list(series) for label, series in self._series.items()}
+
+
+class TimedIterator:
+    """Wraps an iterator and accumulates the time spent producing its items in `elapsed`"""
+
+    def __init__(self, iterable: Iterable):
+        self._iterator = iter(iterable)
+        self.elapsed = 0.0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            return next(self._iterator)
+        finally:
+            self.elapsed += time.perf_counter() - started
+
+
+class Telemetry:
+    def __init__(self, trace_history: int = None):
+        self.trace_history = trace_history or Config.TRACE_HISTORY
+        self.stages = Histogram(LATENCY_BUCKETS)
+        self.tokens_per_second = Histogram(TOKENS_PER_SECOND_BUCKETS)
+        self._counters: Dict[str, float] = dict.fromkeys(COUNTERS, 0)
+        # Values read at scrape time: name -> (type, description, label, fn)
+        self._collected: Dict[str, Tuple[str, str, str, Callable[[], Any]]] = {}
+        # trace id -> [(stage, seconds)], most recent traces only
+        self._traces: "OrderedDict[str, List[Tuple[str, float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def trace(self, trace_id: str):
+        """Record spans opened in this context under `trace_id`"""
+        token = _current_trace.set(trace_id)
+        try:
+            yield
+        finally:
+            _current_trace.reset(token)
+
+    def current_trace(self) -> Optional[str]:
+        return _current_trace.get()
+
+    @contextmanager
+    def span(self, stage: str, trace_id: str = None):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started, trace_id)
+
+    def observe(self, stage: str, seconds: float, trace_id: str = None):
+        self.stages.observe(stage, seconds)
+        trace_id = trace_id or _current_trace.get()
+        if trace_id is None:
+            return
+        with self._lock:
+            spans = self._traces.get(trace_id)
+            if spans is None:
+                spans = self._traces[trace_id] = []
+                while len(self._traces) > self.trace_history:
+                    self._traces.popitem(last=False)
+            spans.append((stage, seconds))
+
+    def count(self, name: str, amount: float = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def record_generation(self, generated_tokens: int, seconds: float):
+        self.count("generated_tokens", generated_tokens)
+        if generated_tokens and seconds > 0:
+            self.tokens_per_second.observe("generation", generated_tokens / seconds)
+
+    def collect(self, name: str, description: str, fn: Callable[[], Any], metric_type: str = "gauge",
+                label: str = "kind"):
+        """Register a metric read at scrape time; `fn` returns a number or a {label value: number} dict"""
+        self._collected[name] = (metric_type, description, label, fn)
+
+    def get_trace(self, trace_id: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            spans = self._traces.get(trace_id)
+            spans = list(spans) if spans is not None else None
+        if spans is None:
+            return None
+        return [{"stage": stage, "ms": round(seconds * 1000, 3)} for stage, seconds in spans]
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        self._render_histogram(lines, "rag_stage_seconds", "Time spent in each pipeline stage", "stage", self.stages)
+        self._render_histogram(lines, "rag_generation_tokens_per_second", "Generation speed per request",
+                               "phase", self.tokens_per_second)
+
+        with self._lock:
+            counters = dict(self._counters)
+        for name, description in COUNTERS.items():
+            lines.append(f"# HELP rag_{name}_total {description}")
+            lines.append(f"# TYPE rag_{name}_total counter")
+            lines.append(f"rag_{name}_total {counters[name]}")
+
+        for name, (metric_type, description, label, fn) in self._collected.items():
+            try:
+                value = fn()
+            except Exception:
+                continue
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            if isinstance(value, dict):
+                lines.extend(f'{name}{{{label}="{key}"}} {float(v)}' for key, v in value.items())
+            else:
+                lines.append(f"{name} {float(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _render_histogram(self, lines: List[str], name: str, description: str, label: str, histogram: Histogram):
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} histogram")
+        for value, series in sorted(histogram.snapshot().items()):
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, series):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{label}="{value}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{label}="{value}",le="+Inf"}} {series[-1]}')
+            lines.append(f'{name}_sum{{{label}="{value}"}} {round(series[-2], 6)}')
+            lines.append(f'{name}_count{{{label}="{value}"}} {series[-1]}')
+
+
+telemetry = Telemetry()
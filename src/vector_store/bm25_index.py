@@ -0,0 +1,162 @@
+"""
+Inverted BM25 index over the chunks of a FAISSVectorStore.
+
+Rows are keyed by the same positions as the FAISS index and the DocumentStore, so
+tombstones and compaction apply to all three alike. Each term maps to a postings list of
+(row, term frequency) pairs held in typed arrays; a query only touches the postings of its
+own terms, so lookups for rare identifiers (part numbers, error codes) cost microseconds
+regardless of corpus size.
+
+Tokens are lower-cased alphanumeric runs. Identifiers joined by -, _, ., / or : are kept
+whole ("err-4012") and also indexed by their parts ("err", "4012").
+
+On disk an index is written next to the snapshot it belongs to as `{prefix}.bm25.pkl`.
+"""
+import re
+import math
+import pickle
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_./:][a-z0-9]+)*")
+SEPARATOR_PATTERN = re.compile(r"[-_./:]")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have how i in is it its of on or that the this
+to was were what when where which who why will with you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text.lower()):
+        token = match.group()
+        if token not in STOPWORDS:
+            tokens.append(token)
+        if not token.isalnum():
+            tokens.extend(part for part in SEPARATOR_PATTERN.split(token) if part and part not in STOPWORDS)
+    return tokens
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        # Row lengths in tokens; grown by doubling so query-time lookups can index it directly
+        self._lengths = np.zeros(1024, dtype=np.int32)
+        self._count = 0
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, row: int, text: str):
+        """Index the chunk at `row`; rows must be added in order"""
+        if row != self._count:
+            raise ValueError(f"BM25 rows must be added in order: expected {self._count}, got {row}")
+
+        counts = Counter(tokenize(text))
+        if self._count == len(self._lengths):
+            self._lengths = np.concatenate([self._lengths, np.zeros_like(self._lengths)])
+        # The length is recorded before the postings, so a concurrent search never sees a
+        # posting without its row length
+        self._lengths[row] = sum(counts.values())
+        self._total_length += int(self._lengths[row])
+        self._count += 1
+
+        for term, frequency in counts.items():
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = (array("q"), array("i"))
+            posting[0].append(row)
+            posting[1].append(frequency)
+
+    def search(self, query: str, top_k: int, excluded: Optional[np.ndarray] = None,
+               allowed: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Top `top_k` (row, score) pairs for `query`, best first, skipping `excluded` rows and, if given, rows not `allowed`"""
+        count = self._count
+        if not count:
+            return []
+
+        rows, tfs = [], []
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if posting is not None:
+                rows.append(np.array(posting[0], dtype=np.int64))
+                tfs.append(np.array(posting[1], dtype=np.float32))
+        if not rows:
+            return []
+
+        lengths = self._lengths
+        average_length = max(self._total_length / count, 1.0)
+        scores = []
+        for term_rows, term_tfs in zip(rows, tfs):
+            frequency = len(term_rows)
+            idf = math.log(1.0 + (count - frequency + 0.5) / (frequency + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * lengths[term_rows] / average_length)
+            scores.append(idf * term_tfs * (self.k1 + 1.0) / (term_tfs + norm))
+
+        matched, inverse = np.unique(np.concatenate(rows), return_inverse=True)
+        totals = np.bincount(inverse, weights=np.concatenate(scores))
+        if excluded is not None and len(excluded):
+            keep = ~np.isin(matched, excluded)
+            matched, totals = matched[keep], totals[keep]
+        if allowed is not None:
+            keep = np.isin(matched, allowed)
+            matched, totals = matched[keep], totals[keep]
+
+        if len(matched) > top_k:
+            best = np.argpartition(-totals, top_k)[:top_k]
+            matched, totals = matched[best], totals[best]
+        order = np.argsort(-totals, kind="stable")
+        return [(int(matched[i]), float(totals[i])) for i in order]
+
+    def without_rows(self, removed: Iterable[int]) -> "BM25Index":
+        """Copy of the index without `removed` rows, renumbering the rest to their compacted positions"""
+        keep = np.ones(self._count, dtype=bool)
+        keep[np.asarray(list(removed), dtype=np.int64)] = False
+        new_positions = np.cumsum(keep) - 1
+
+        index = BM25Index(self.k1, self.b)
+        lengths = self._lengths[:self._count][keep]
+        index._lengths = np.concatenate([lengths, np.zeros(max(len(lengths), 1024), dtype=np.int32)])
+        index._count = len(lengths)
+        index._total_length = int(lengths.sum())
+
+        for term, (rows, tfs) in self._postings.items():
+            rows = np.array(rows, dtype=np.int64)
+            live = keep[rows]
+            if live.any():
+                index._postings[term] = (
+                    array("q", new_positions[rows[live]].astype(np.int64).tobytes()),
+                    array("i", np.array(tfs, dtype=np.int32)[live].tobytes())
+                )
+        return index
+
+    def write(self, prefix: str):
+        with open(f"{prefix}.bm25.pkl", "wb") as f:
+            pickle.dump({
+                "k1": self.k1,
+                "b": self.b,
+                "lengths": self._lengths[:self._count],
+                "postings": self._postings
+            }, f)
+
+    @classmethod
+    def open(cls, prefix: str) -> "BM25Index":
+        with open(f"{prefix}.bm25.pkl", "rb") as f:
+            data = pickle.load(f)
+        index = cls(data["k1"], data["b"])
+        lengths = data["lengths"]
+        index._lengths = np.concatenate([lengths, np.zeros(max(len(lengths), 1024), dtype=np.int32)])
+        index._count = len(lengths)
+        index._total_length = int(lengths.sum())
+        index._postings = data["postings"]
+        return index
+
+    def get_stats(self) -> Dict[str, int]:
+        return {"terms": len(self._postings), "rows": self._count}
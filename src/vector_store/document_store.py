@@ -0,0 +1,234 @@
+"""
+Compact, columnar storage for the chunks behind a FAISS index.
+
+Instead of one dict per chunk (each carrying a copy of its document's metadata), a
+DocumentStore keeps:
+- doc_metadata:  one metadata dict per source document, referenced by index
+- chunk columns: stable id, document index and chunk number as typed arrays
+- text:          every chunk's UTF-8 text in one contiguous buffer, addressed by offsets
+
+Row i is the chunk stored at position i of the FAISS index. Each row also carries a stable
+id, assigned in increasing order and kept when compaction drops deleted rows (so positions
+shift but ids do not). Per-chunk overhead is a few dozen bytes on top of the text itself,
+and result dicts are only assembled on access.
+
+On disk a store is written as `{prefix}.texts` (the text buffer, with its offsets in
+`{prefix}.texts.offsets.npy`), `{prefix}.chunks.npy` (the columns) and `{prefix}.docs.json`.
+Opened with mmap, text and columns are read lazily from the mapped files.
+"""
+import json
+from array import array
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+
+import numpy as np
+
+from vector_store.offset_file import OffsetFile, write_offset_file
+
+# Per-chunk metadata fields; everything else belongs to the document
+CHUNK_ID_FIELD = "chunk_id"
+CHUNK_PREVIEW_FIELD = "chunk_text"
+CHUNK_PREVIEW_LENGTH = 100
+
+CHUNK_COLUMNS = np.dtype([("id", np.int64), ("doc", np.int32), ("chunk_id", np.int32)])
+
+
+class ReadOnlyStoreError(RuntimeError):
+    """The store was opened read-only (mmap) and cannot be modified"""
+
+
+class DocumentStore:
+    def __init__(self):
+        self.doc_metadata: List[Dict[str, Any]] = []
+        self._doc_keys: Dict[str, int] = {}
+
+        self._ids = array("q")
+        self._docs = array("i")
+        self._chunk_ids = array("i")
+        self._text = bytearray()
+        self._text_offsets = array("q", [0])
+        self.next_id = 0
+        self.read_only = False
+
+    def add_document(self, metadata: Dict[str, Any], chunks: List[str], chunk_ids: Iterable[int] = None) -> int:
+        """
+        Append the chunks of one document, storing its metadata once; returns the document index.
+
+        chunk_ids gives each chunk's number within its document and defaults to 0, 1, 2, ...
+        """
+        doc = self._intern(metadata)
+        for chunk_id, chunk in zip(range(len(chunks)) if chunk_ids is None else chunk_ids, chunks):
+            self._append_row(doc, chunk_id, chunk)
+        return doc
+
+    def append(self, text: str, metadata: Dict[str, Any], row_id: int = None):
+        """
+        Append one chunk with a per-chunk metadata dict.
+
+        The chunk_id field is kept in its own column, the chunk_text preview is dropped
+        (it is rebuilt from the text on access) and the remaining fields are stored once
+        per distinct document. row_id restores a previously assigned stable id.
+        """
+        metadata = dict(metadata)
+        chunk_id = metadata.pop(CHUNK_ID_FIELD, -1)
+        metadata.pop(CHUNK_PREVIEW_FIELD, None)
+        self._append_row(self._intern(metadata), chunk_id, text, row_id)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        """Assemble the {'text', 'metadata', 'id'} dict for row i"""
+        text = self.text(i)
+        metadata = dict(self.doc_metadata[self._docs[i]])
+        chunk_id = int(self._chunk_ids[i])
+        if chunk_id >= 0:
+            metadata[CHUNK_ID_FIELD] = chunk_id
+            metadata[CHUNK_PREVIEW_FIELD] = (
+                text[:CHUNK_PREVIEW_LENGTH] + "..." if len(text) > CHUNK_PREVIEW_LENGTH else text
+            )
+        return {"text": text, "metadata": metadata, "id": int(self._ids[i])}
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def text(self, i: int) -> str:
+        return self._text[self._text_offsets[i]:self._text_offsets[i + 1]].decode("utf-8")
+
+    def rows(self, start: int = 0) -> List[Dict[str, Any]]:
+        return [self[i] for i in range(start, len(self))]
+
+    def id_column(self) -> np.ndarray:
+        """Stable ids by row, in increasing order"""
+        return np.array(self._ids[:len(self)], dtype=np.int64)
+
+    def document_column(self, start: int = 0) -> np.ndarray:
+        """Document index (into doc_metadata) by row, from row `start`"""
+        return np.array(self._docs[start:len(self)], dtype=np.int32)
+
+    def positions_of(self, ids: Iterable[int]) -> np.ndarray:
+        """Row positions of the given stable ids; ids that are not stored are ignored"""
+        column = self.id_column()
+        ids = np.asarray(list(ids), dtype=np.int64)
+        positions = np.searchsorted(column, ids)
+        found = positions < len(column)
+        found[found] = column[positions[found]] == ids[found]
+        return positions[found]
+
+    def rows_where(self, predicate: Callable[[Dict[str, Any]], bool]) -> np.ndarray:
+        """Row positions whose document metadata satisfies `predicate`"""
+        docs = [doc for doc, metadata in enumerate(self.doc_metadata) if predicate(metadata)]
+        if not docs:
+            return np.empty(0, dtype=np.int64)
+        return np.flatnonzero(np.isin(self.document_column(), docs))
+
+    def without_rows(self, removed: Iterable[int]) -> "DocumentStore":
+        """
+        Copy of the store without the rows at positions `removed`.
+
+        Remaining rows keep their order and stable ids; documents left without rows are dropped.
+        """
+        keep = np.ones(len(self), dtype=bool)
+        keep[np.asarray(list(removed), dtype=np.int64)] = False
+
+        store = DocumentStore()
+        doc_map = {}
+        for i in np.flatnonzero(keep):
+            doc = int(self._docs[i])
+            if doc not in doc_map:
+                doc_map[doc] = store._intern(self.doc_metadata[doc])
+            store._append_row(doc_map[doc], int(self._chunk_ids[i]), self.text(i), int(self._ids[i]))
+        store.next_id = self.next_id
+        return store
+
+    def write(self, prefix: str):
+        """Write the store as record and column files under `prefix`"""
+        count = len(self)
+        write_offset_file(
+            f"{prefix}.texts",
+            self._text[:self._text_offsets[count]],
+            np.asarray(self._text_offsets[:count + 1], dtype=np.int64)
+        )
+
+        columns = np.empty(count, dtype=CHUNK_COLUMNS)
+        columns["id"] = np.asarray(self._ids[:count], dtype=np.int64)
+        columns["doc"] = np.asarray(self._docs[:count], dtype=np.int32)
+        columns["chunk_id"] = np.asarray(self._chunk_ids[:count], dtype=np.int32)
+        np.save(f"{prefix}.chunks.npy", columns)
+
+        with open(f"{prefix}.docs.json", "w", encoding="utf-8") as f:
+            json.dump(self.doc_metadata, f, default=str)
+
+    @classmethod
+    def open(cls, prefix: str, use_mmap: bool = False) -> "DocumentStore":
+        """
+        Read a store written by write().
+
+        With use_mmap the text buffer and columns stay in the mapped files and the store is
+        read-only; otherwise they are copied into the in-memory, appendable layout.
+        """
+        store = cls()
+        with open(f"{prefix}.docs.json", "r", encoding="utf-8") as f:
+            store.doc_metadata = json.load(f)
+        store._doc_keys = {_metadata_key(meta): i for i, meta in enumerate(store.doc_metadata)}
+
+        texts = OffsetFile(f"{prefix}.texts", use_mmap)
+        columns = np.load(f"{prefix}.chunks.npy", mmap_mode="r" if use_mmap else None)
+
+        if use_mmap:
+            store._text = texts.data
+            store._text_offsets = texts.offsets
+            store._ids = columns["id"]
+            store._docs = columns["doc"]
+            store._chunk_ids = columns["chunk_id"]
+            store.read_only = True
+        else:
+            store._text = bytearray(texts.data)
+            store._text_offsets = array("q", np.asarray(texts.offsets, dtype=np.int64).tobytes())
+            store._ids = array("q", np.ascontiguousarray(columns["id"]).tobytes())
+            store._docs.extend(columns["doc"].tolist())
+            store._chunk_ids.extend(columns["chunk_id"].tolist())
+        if len(store):
+            store.next_id = int(store._ids[len(store) - 1]) + 1
+        return store
+
+    @classmethod
+    def from_dicts(cls, documents: List[Dict[str, Any]]) -> "DocumentStore":
+        """Build a store from {'text', 'metadata', ...} dicts, e.g. a legacy pickle"""
+        store = cls()
+        for document in documents:
+            store.append(document["text"], document.get("metadata", {}))
+        return store
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self.doc_metadata),
+            "chunks": len(self),
+            "text_bytes": int(self._text_offsets[len(self)])
+        }
+
+    def _intern(self, metadata: Dict[str, Any]) -> int:
+        key = _metadata_key(metadata)
+        doc = self._doc_keys.get(key)
+        if doc is None:
+            doc = len(self.doc_metadata)
+            self.doc_metadata.append(dict(metadata))
+            self._doc_keys[key] = doc
+        return doc
+
+    def _append_row(self, doc: int, chunk_id: int, text: str, row_id: int = None):
+        if self.read_only:
+            raise ReadOnlyStoreError("Document store is memory-mapped read-only")
+        if row_id is None:
+            row_id = self.next_id
+        self.next_id = max(self.next_id, row_id + 1)
+        self._text.extend(text.encode("utf-8"))
+        self._text_offsets.append(len(self._text))
+        self._docs.append(doc)
+        self._chunk_ids.append(chunk_id)
+        # Written last: a row becomes visible to readers (via len) only once complete
+        self._ids.append(row_id)
+
+
+def _metadata_key(metadata: Dict[str, Any]) -> str:
+    return json.dumps(metadata, sort_keys=True, default=str)
@@ -0,0 +1,122 @@
+import os
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache keyed by (model_name, sha256(text)).
+
+    Lookups hit an in-memory LRU first and fall back to a SQLite file stored next to the
+    FAISS index, so repeated queries and re-uploaded documents skip the encoder even
+    across restarts.
+    """
+
+    def __init__(self, path: str = None, max_memory_items: int = None):
+        self.path = path or Config.EMBEDDING_CACHE_PATH
+        self.max_memory_items = max_memory_items or Config.EMBEDDING_CACHE_SIZE
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model_name TEXT NOT NULL, content_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model_name, content_hash))"
+        )
+        self._db.commit()
+
+    def get_many(self, model_name: str, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Return cached embeddings in input order, with None for every miss."""
+        keys = [(model_name, content_hash(text)) for text in texts]
+        found = [None] * len(keys)
+        disk_lookups = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    found[i] = vector
+                else:
+                    disk_lookups.setdefault(key[1], []).append(i)
+
+            if disk_lookups:
+                for digest, vector in self._read_disk(model_name, list(disk_lookups)):
+                    for i in disk_lookups.pop(digest):
+                        found[i] = vector
+                        self._stats["disk_hits"] += 1
+                    self._remember((model_name, digest), vector)
+
+            self._stats["misses"] += sum(len(indices) for indices in disk_lookups.values())
+
+        return found
+
+    def put_many(self, model_name: str, texts: List[str], embeddings: np.ndarray):
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, embeddings):
+                vector = np.asarray(vector, dtype=np.float32)
+                digest = content_hash(text)
+                self._remember((model_name, digest), vector)
+                rows.append((model_name, digest, vector.tobytes()))
+
+            try:
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO embeddings (model_name, content_hash, vector) VALUES (?, ?, ?)",
+                    rows
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache write failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_items"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+    def _read_disk(self, model_name: str, digests: List[str]):
+        rows = []
+        try:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(digests), 500):
+                batch = digests[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows.extend(self._db.execute(
+                    f"SELECT content_hash, vector FROM embeddings "
+                    f"WHERE model_name = ? AND content_hash IN ({placeholders})",
+                    [model_name, *batch]
+                ).fetchall())
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache read failed: {e}")
+        return [(digest, np.frombuffer(blob, dtype=np.float32)) for digest, blob in rows]
+
+    def _remember(self, key, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
@@ -0,0 +1,88 @@
+"""
+Batched text encoding for FAISSVectorStore.
+
+Texts are sorted by length and split into batches of EMBEDDING_BATCH_SIZE. Each batch then
+holds texts of similar length and is padded to little more than its longest text, instead
+of every batch padding short chunks up to the longest one. With EMBEDDING_THREADS > 1 the
+batches are encoded concurrently, and torch's own thread pool is shrunk to match so the
+cores are not oversubscribed.
+
+Each batch is written straight into one preallocated float32 array, which is then
+L2-normalised in place. Encoding a large upload therefore keeps a single copy of its
+embeddings.
+"""
+import os
+import sys
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import faiss
+import numpy as np
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingEngine:
+    def __init__(self, batch_size: int = None, threads: int = None):
+        self.batch_size = batch_size or Config.EMBEDDING_BATCH_SIZE
+        self.threads = threads or Config.EMBEDDING_THREADS
+        self._executor = None
+        self._torch_configured = False
+        self._lock = threading.Lock()
+        self.stats = {"texts": 0, "batches": 0, "seconds": 0.0}
+
+    def encode(self, model, texts: List[str]) -> np.ndarray:
+        """L2-normalised float32 embeddings of `texts` (one row per text, in order) from `model`"""
+        started = time.perf_counter()
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        batches = [order[start:start + self.batch_size] for start in range(0, len(texts), self.batch_size)]
+
+        def encode_batch(rows: np.ndarray) -> np.ndarray:
+            return model.encode([texts[row] for row in rows], batch_size=self.batch_size,
+                                convert_to_numpy=True, show_progress_bar=False)
+
+        output = None
+        for rows, vectors in zip(batches, self._map(encode_batch, batches)):
+            if output is None:
+                output = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            output[rows] = vectors
+        if output is None:
+            return np.empty((0, 0), dtype=np.float32)
+        faiss.normalize_L2(output)
+
+        with self._lock:
+            self.stats["texts"] += len(texts)
+            self.stats["batches"] += len(batches)
+            self.stats["seconds"] += time.perf_counter() - started
+        return output
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        stats["texts_per_second"] = round(stats["texts"] / stats["seconds"], 1) if stats["seconds"] else 0.0
+        stats["seconds"] = round(stats["seconds"], 3)
+        return {"batch_size": self.batch_size, "threads": self.threads, **stats}
+
+    def _map(self, fn, batches: List[np.ndarray]):
+        if self.threads <= 1 or len(batches) <= 1:
+            return map(fn, batches)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="embed")
+            if not self._torch_configured:
+                self._configure_torch()
+        return self._executor.map(fn, batches)
+
+    def _configure_torch(self):
+        # Only a locally loaded model uses torch; the model server's encoder does not
+        self._torch_configured = True
+        torch = sys.modules.get("torch")
+        if torch is not None:
+            torch_threads = max(1, (os.cpu_count() or 1) // self.threads)
+            torch.set_num_threads(torch_threads)
+            logger.info(f"Encoding on {self.threads} threads with {torch_threads} torch threads each")
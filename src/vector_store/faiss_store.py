@@ -1,128 +1,797 @@
 import faiss
+import math
 import numpy as np
 import pickle
 import os
-from typing import List, Dict, Any, Tuple
-from sentence_transformers import SentenceTransformer
+import threading
+import hashlib
+from contextlib import contextmanager
+from itertools import islice
+from typing import Callable, Iterable, List, Dict, Any, Tuple
 from config import Config
+from telemetry import telemetry
+from vector_store.embedding_cache import EmbeddingCache
+from vector_store.embedding_engine import EmbeddingEngine
+from vector_store.segment_store import SegmentStore
+from vector_store.document_store import DocumentStore, ReadOnlyStoreError
+from vector_store.bm25_index import BM25Index
+from vector_store.metadata_index import MetadataIndex
+from vector_store.index_factory import (
+    IVF_INDEX_TYPES, apply_search_params, create_index, index_type_of, migrate_index, min_training_vectors,
+    remove_vectors, requires_training, search_parameters, storage_dtype
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
+RETRIEVAL_MODES = ("dense", "lexical", "hybrid")
+
+def content_hash(text: str) -> int:
+    """64-bit hash of a chunk's text with whitespace normalised, used for exact dedup"""
+    digest = hashlib.sha256(" ".join(text.split()).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+class _ReadWriteLock:
+    """
+    Any number of readers or one writer. FAISS indexes can be searched by many threads at
+    once but not while vectors are being added. Waiting writers hold off new readers, so a
+    steady flow of searches cannot starve ingestion.
+    """
+    
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writers_waiting = 0
+        self._writing = False
+    
+    @contextmanager
+    def read(self):
+        with self._condition:
+            while self._writing or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+    
+    @contextmanager
+    def write(self):
+        with self._condition:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+
 class FAISSVectorStore:
     def __init__(self, model_name: str = None):
         self.model_name = model_name or Config.EMBEDDING_MODEL
-        self.model = SentenceTransformer(self.model_name)
+        self._model = None  # SentenceTransformer, loaded on first use (see `model`)
+        self._model_lock = threading.Lock()
         self.index = None
-        self.documents = []  # Store original documents with metadata
+        self.documents = DocumentStore()  # Chunk text, metadata and stable ids, row i = index position i
+        self.lexical = BM25Index()        # BM25 postings over the same rows
+        self._metadata_index = None       # metadata -> rows for filtered search, built on first use
         self.dimension = None
+        self.index_type = Config.FAISS_INDEX_TYPE
+        self.embedding_cache = EmbeddingCache()
+        self.embedder = EmbeddingEngine()
+        
+        # Persistence state: vectors added since the last save, and how many documents
+        # the store directory at self.store_path already holds
+        self.store_path = None
+        self._pending_vectors = []
+        self._persisted_count = 0
+        self._needs_snapshot = False
+        self._lock = threading.RLock()
+        # Searches take their snapshot of the store and read the index under this; adding
+        # vectors and compaction swapping in a new index write (see _ReadWriteLock)
+        self._index_lock = _ReadWriteLock()
+        # Upserts hold this shared, as they keep row positions across calls; compaction,
+        # which renumbers rows, holds it exclusively
+        self._rows_lock = _ReadWriteLock()
+        self._compaction_thread = None
+        self.read_only = False  # set when loaded with mmap, and in multi-process workers
+        # Incremented whenever searchable content changes, so caches of search-derived
+        # results (e.g. answers) can tell they are stale
+        self.version = 0
+        
+        # Content hash -> number of stored chunks with it, for exact dedup (built lazily)
+        self._chunk_hashes = None
+        
+        # Tombstones: positions of deleted chunks, excluded from search until compaction
+        # removes them from the index and document store
+        self._deleted = set()
+        self._deleted_selector = None
+        self._tombstones_dirty = False
+        self.dedup_stats = {"duplicates_skipped": 0, "near_duplicates_skipped": 0}
+        
+    @property
+    def model(self):
+        """The embedding model; sentence-transformers (and torch) are imported on first use"""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None and Config.MODEL_SERVER_ADDRESS:
+                    # Embeddings are computed by the shared model server
+                    from model_server import RemoteEncoder
+                    self._model = RemoteEncoder(self.model_name, Config.MODEL_SERVER_ADDRESS)
+                elif self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    self._model = SentenceTransformer(self.model_name)
+        return self._model
+        
+    def warm_up(self):
+        """Load the embedding model and run one encode, so the first query does not pay for either"""
+        self.model.encode(["warm up"])
         
     def initialize_index(self, dimension: int = None):
         """Initialize FAISS index"""
         if dimension is None:
-            # Get dimension from model
-            sample_embedding = self.model.encode(["sample text"])
-            dimension = sample_embedding.shape[1]
+            # Read the dimension from the model config; only encode a sample if it is not declared
+            dimension = self.model.get_sentence_embedding_dimension()
+            if dimension is None:
+                dimension = self.model.encode(["sample text"]).shape[1]
         
         self.dimension = dimension
-        self.index = faiss.IndexFlatIP(dimension)  # Inner product for cosine similarity
-        logger.info(f"Initialized FAISS index with dimension {dimension}")
+        # Inner product for cosine similarity. Trainable index types stage vectors in a flat
+        # index until there are enough of them to train on (see _train_if_ready).
+        staging_type = "flat" if requires_training(self.index_type) else self.index_type
+        self.index = create_index(staging_type, dimension)
+        logger.info(f"Initialized FAISS {staging_type} index with dimension {dimension}")
+        
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        L2-normalised float32 embeddings of texts, serving repeats from the embedding cache
+        and encoding only the misses
+        """
+        vectors = self.embedding_cache.get_many(self.model_name, texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        
+        if missing:
+            # Encode each distinct uncached text once (see EmbeddingEngine)
+            unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+            with telemetry.span("embed"):
+                encoded = self.embedder.encode(self.model, unique_texts)
+            self.embedding_cache.put_many(self.model_name, unique_texts, encoded)
+            if len(unique_texts) == len(texts):
+                return encoded
+            
+            by_text = dict(zip(unique_texts, encoded))
+            for i in missing:
+                vectors[i] = by_text[texts[i]]
+        
+        # Cached vectors written before embeddings were normalised are normalised here
+        embeddings = np.vstack(vectors).astype(np.float32, copy=False)
+        faiss.normalize_L2(embeddings)
+        return embeddings
+        
+    def add_documents(self, chunks: List[str], metadata: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Add documents to the vector store, one metadata dict per chunk"""
+        def store_rows(keep: List[int]):
+            for i in keep:
+                self.documents.append(chunks[i], metadata[i])
+        
+        return self._add_chunks(chunks, store_rows)
         
-    def add_documents(self, chunks: List[str], metadata: List[Dict[str, Any]]):
-        """Add documents to the vector store"""
+    def add_document(self, chunks: List[str], document_metadata: Dict[str, Any], first_chunk_id: int = 0) -> Dict[str, int]:
+        """
+        Add the chunks of one source document; its metadata is stored once, not per chunk.
+        
+        Large documents can be added in batches, passing the chunk number of each batch's
+        first chunk as first_chunk_id. Returns how many chunks were added and how many were
+        skipped as duplicates.
+        """
+        def store_rows(keep: List[int]):
+            self.documents.add_document(
+                document_metadata, [chunks[i] for i in keep], [first_chunk_id + i for i in keep]
+            )
+        
+        return self._add_chunks(chunks, store_rows)
+        
+    def _add_chunks(self, chunks: List[str], store_rows: Callable[[List[int]], None]) -> Dict[str, int]:
+        """
+        Embed and index the chunks that are not duplicates of stored ones.
+        
+        Exact duplicates (same text up to whitespace) are dropped before embedding; with
+        DEDUP_NEAR_THRESHOLD set, chunks whose embedding is at least that similar to an
+        indexed or earlier chunk are dropped too. store_rows(keep) is called under the lock
+        with the positions in `chunks` that were indexed, to store the matching rows.
+        """
+        self._check_writable()
         if self.index is None:
             self.initialize_index()
         
-        # Generate embeddings
-        embeddings = self.model.encode(chunks)
+        hashes = [content_hash(chunk) for chunk in chunks]
+        with self._lock:
+            keep = self._claim_hashes(hashes)
+        duplicates = len(chunks) - len(keep)
+        near_duplicates = 0
         
-        # Normalize embeddings for cosine similarity
-        faiss.normalize_L2(embeddings)
+        try:
+            if keep:
+                # Generate normalised embeddings (cached by content hash)
+                embeddings = self.embed([chunks[i] for i in keep])
+            
+            with self._lock:
+                if keep:
+                    distinct = self._drop_near_duplicates(embeddings)
+                    self._release_hashes([hashes[keep[j]] for j in set(range(len(keep))) - set(distinct)])
+                    near_duplicates = len(keep) - len(distinct)
+                    keep = [keep[j] for j in distinct]
+                    embeddings = embeddings[distinct]
+                
+                if keep:
+                    # Store documents with metadata first: searches take no lock, so every
+                    # position they can get back from the index must already have its row
+                    first_row = len(self.documents)
+                    store_rows(keep)
+                    for row in range(first_row, len(self.documents)):
+                        self.lexical.add(row, self.documents.text(row))
+                    
+                    # Add to index
+                    with self._index_lock.write():
+                        self.index.add(embeddings)
+                    self._pending_vectors.append(embeddings.astype(storage_dtype(self.index_type), copy=False))
+                    self._train_if_ready()
+                    self.version += 1
+                
+                self.dedup_stats["duplicates_skipped"] += duplicates
+                self.dedup_stats["near_duplicates_skipped"] += near_duplicates
+        except Exception:
+            with self._lock:
+                self._release_hashes([hashes[i] for i in keep])
+            raise
+        
+        logger.info(f"Added {len(keep)} documents to vector store "
+                    f"(skipped {duplicates} duplicates, {near_duplicates} near-duplicates)")
+        return {"added": len(keep), "duplicates": duplicates, "near_duplicates": near_duplicates}
+        
+    def _claim_hashes(self, hashes: List[int]) -> List[int]:
+        """Register the content hashes of new chunks; returns the positions that were not already stored"""
+        if not Config.DEDUP_EXACT:
+            return list(range(len(hashes)))
+        
+        known = self._content_hashes()
+        keep = []
+        for i, digest in enumerate(hashes):
+            if digest not in known:
+                known[digest] = 1
+                keep.append(i)
+        return keep
         
-        # Add to index
-        self.index.add(embeddings.astype('float32'))
+    def _release_hashes(self, hashes: List[int]):
+        if not Config.DEDUP_EXACT:
+            return
+        known = self._content_hashes()
+        for digest in hashes:
+            count = known.get(digest, 0) - 1
+            if count > 0:
+                known[digest] = count
+            else:
+                known.pop(digest, None)
         
-        # Store documents with metadata
-        for i, (chunk, meta) in enumerate(zip(chunks, metadata)):
-            self.documents.append({
-                'text': chunk,
-                'metadata': meta,
-                'id': len(self.documents)
-            })
+    def _content_hashes(self) -> Dict[int, int]:
+        # Built on first use from the stored text, so loading a store stays cheap
+        if self._chunk_hashes is None:
+            self._chunk_hashes = {}
+            for i in range(len(self.documents)):
+                if i in self._deleted:
+                    continue
+                digest = content_hash(self.documents.text(i))
+                self._chunk_hashes[digest] = self._chunk_hashes.get(digest, 0) + 1
+        return self._chunk_hashes
         
-        logger.info(f"Added {len(chunks)} documents to vector store")
+    def _drop_near_duplicates(self, embeddings: np.ndarray) -> List[int]:
+        """Positions of the normalised embeddings that are not near-duplicates of indexed or earlier ones"""
+        threshold = Config.DEDUP_NEAR_THRESHOLD
+        if not threshold:
+            return list(range(len(embeddings)))
         
-    def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        if self.index.ntotal > len(self._deleted):
+            # Deleted chunks, including those an upsert is replacing, are not duplicates
+            if self._deleted_selector is None:
+                best_scores = self.index.search(embeddings, 1)[0][:, 0]
+            else:
+                params = search_parameters(self.index, self._deleted_selector[0])
+                best_scores = self.index.search(embeddings, 1, params=params)[0][:, 0]
+        else:
+            best_scores = np.full(len(embeddings), -np.inf)
+        
+        distinct = []
+        for i, vector in enumerate(embeddings):
+            if best_scores[i] >= threshold:
+                continue
+            if distinct and float(np.max(embeddings[distinct] @ vector)) >= threshold:
+                continue
+            distinct.append(i)
+        return distinct
+        
+    def _train_if_ready(self):
+        """Swap the flat staging index for the configured trainable index once enough vectors exist"""
+        if not requires_training(self.index_type) or index_type_of(self.index) == self.index_type:
+            return
+        if self.index.ntotal >= min_training_vectors(self.index_type):
+            self.migrate_index(self.index_type)
+    
+    def migrate_index(self, index_type: str):
+        """Rebuild the index as `index_type`, keeping vector positions (and so document ids) unchanged"""
+        self._check_writable()
+        with self._lock:
+            self.index = migrate_index(self.index, index_type)
+            self.index_type = index_type
+            self.version += 1
+            # Segments hold raw vectors, but the snapshot still has the old index type
+            self._needs_snapshot = True
+        
+    def search(self, query: str, top_k: int = 5, mode: str = None, filters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """Search for similar documents"""
-        if self.index is None or self.index.ntotal == 0:
-            return []
+        return self.search_batch([query], top_k, mode, filters)[0]
+    
+    def search_batch(self, queries: List[str], top_k: int = 5, mode: str = None,
+                     filters: Dict[str, Any] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Search for several queries at once.
+        
+        mode (default Config.RETRIEVAL_MODE) is "dense" (one batched encode and one FAISS
+        search over the query matrix), "lexical" (BM25 postings only) or "hybrid" (both,
+        merged by reciprocal rank fusion). Results carry the dense cosine `score` and, for
+        lexical and hybrid search, `bm25_score` and `rrf_score`; a chunk only found by one
+        retriever has 0.0 for the other's score.
         
-        # Generate query embedding
-        query_embedding = self.model.encode([query])
-        faiss.normalize_L2(query_embedding)
+        filters restricts every query to chunks whose document metadata matches (see
+        vector_store/metadata_index.py). The restriction is applied inside the FAISS and
+        BM25 searches, so top_k results are returned whenever that many chunks match.
+        """
+        mode = mode or Config.RETRIEVAL_MODE
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unsupported retrieval mode: {mode}. Choose one of {', '.join(RETRIEVAL_MODES)}")
         
-        # Search
-        scores, indices = self.index.search(query_embedding.astype('float32'), top_k)
+        # Searches read one consistent set of references, which compaction replaces together
+        # under the index lock; they then run without holding it
+        with self._index_lock.read():
+            index, documents, lexical, deleted = self.index, self.documents, self.lexical, self._deleted_selector
+        if index is None or index.ntotal == 0 or not queries:
+            return [[] for _ in queries]
         
-        # Return results
-        results = []
-        for score, idx in zip(scores[0], indices[0]):
-            if idx < len(self.documents):
-                result = self.documents[idx].copy()
-                result['score'] = float(score)
-                results.append(result)
+        allowed = None
+        if filters:
+            allowed = self._filtered_rows(index, documents, deleted, filters)
+            if not len(allowed):
+                return [[] for _ in queries]
         
-        return results
+        if mode == "dense":
+            return [
+                [self._result(documents, row, score=score) for row, score in hits]
+                for hits in self._dense_search(index, deleted, queries, top_k, allowed)
+            ]
+        
+        candidates = max(top_k, Config.HYBRID_CANDIDATES)
+        excluded = deleted[2] if deleted else None
+        with telemetry.span("bm25_search"):
+            lexical_hits = [lexical.search(query, candidates, excluded, allowed) for query in queries]
+        if mode == "lexical":
+            return [
+                [self._result(documents, row, score=0.0, bm25_score=score) for row, score in hits[:top_k]]
+                for hits in lexical_hits
+            ]
+        
+        dense_hits = self._dense_search(index, deleted, queries, candidates, allowed)
+        return [
+            self._fuse(documents, dense, lexical_rows, top_k)
+            for dense, lexical_rows in zip(dense_hits, lexical_hits)
+        ]
     
-    def save(self, path: str):
-        """Save the vector store to disk"""
-        os.makedirs(os.path.dirname(path), exist_ok=True)
+    def _dense_search(self, index: faiss.Index, deleted, queries: List[str], top_k: int,
+                      allowed: np.ndarray = None) -> List[List[Tuple[int, float]]]:
+        # Generate normalised query embeddings
+        query_embeddings = self.embed(queries)
+        
+        if allowed is not None:
+            return self._filtered_dense_search(index, query_embeddings, top_k, allowed)
+        
+        # Search, skipping deleted chunks
+        with telemetry.span("faiss_search"), self._index_lock.read():
+            if deleted is None:
+                scores, indices = index.search(query_embeddings, top_k)
+            else:
+                scores, indices = index.search(query_embeddings, top_k, params=search_parameters(index, deleted[0]))
         
-        # Save FAISS index
-        if self.index is not None:
-            faiss.write_index(self.index, f"{path}.index")
+        # Approximate indexes pad missing results with -1
+        return [
+            [(int(idx), float(score)) for score, idx in zip(row_scores, row_indices) if idx >= 0]
+            for row_scores, row_indices in zip(scores, indices)
+        ]
+    
+    def _filtered_dense_search(self, index: faiss.Index, query_embeddings: np.ndarray, top_k: int,
+                               allowed: np.ndarray) -> List[List[Tuple[int, float]]]:
+        """
+        Dense search over the `allowed` positions only.
+        
+        Up to FILTER_EXACT_MAX_ROWS positions are scored exactly against their stored vectors,
+        which also keeps IVF and HNSW indexes exact for narrow filters. Otherwise the
+        positions become a bitmap ID selector and FAISS skips the rest while searching. The
+        smaller the allowed share of the index, the more IVF lists are probed and the deeper
+        HNSW searches (up to FILTER_HNSW_EF_SEARCH_MAX), so about as many allowed vectors
+        are visited as an unfiltered search would visit.
+        """
+        with telemetry.span("faiss_search"), self._index_lock.read():
+            if len(allowed) <= Config.FILTER_EXACT_MAX_ROWS:
+                scores = query_embeddings @ index.reconstruct_batch(allowed).T
+                hits = []
+                for row_scores in scores:
+                    best = np.arange(len(row_scores))
+                    if len(best) > top_k:
+                        # Only the top_k best are sorted
+                        best = np.argpartition(-row_scores, top_k - 1)[:top_k]
+                    best = best[np.argsort(-row_scores[best], kind="stable")]
+                    hits.append([(int(allowed[i]), float(row_scores[i])) for i in best])
+                return hits
+            
+            mask = np.zeros(index.ntotal, dtype=bool)
+            mask[allowed] = True
+            bitmap = np.packbits(mask, bitorder="little")
+            selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+            nprobe = ef_search = None
+            index_type = index_type_of(index)
+            if index_type in IVF_INDEX_TYPES:
+                nlist = faiss.extract_index_ivf(index).nlist
+                nprobe = min(nlist, math.ceil(Config.FAISS_IVF_NPROBE * index.ntotal / len(allowed)))
+            elif index_type == "hnsw":
+                ef_search = math.ceil(Config.FAISS_HNSW_EF_SEARCH * index.ntotal / len(allowed))
+                ef_search = max(top_k, min(Config.FILTER_HNSW_EF_SEARCH_MAX, ef_search))
+            scores, indices = index.search(query_embeddings, top_k,
+                                           params=search_parameters(index, selector, nprobe, ef_search))
+        
+        return [
+            [(int(idx), float(score)) for score, idx in zip(row_scores, row_indices) if idx >= 0]
+            for row_scores, row_indices in zip(scores, indices)
+        ]
+    
+    def _filtered_rows(self, index: faiss.Index, documents: DocumentStore, deleted,
+                       filters: Dict[str, Any]) -> np.ndarray:
+        """Live, indexed positions whose document metadata matches `filters`"""
+        metadata_index = self._metadata_index
+        if metadata_index is None or metadata_index.documents is not documents:
+            metadata_index = self._metadata_index = MetadataIndex(documents)
+        rows = metadata_index.rows(filters)
+        rows = rows[rows < index.ntotal]
+        if deleted is not None:
+            rows = rows[~np.isin(rows, deleted[2])]
+        return rows
+    
+    def _fuse(self, documents: DocumentStore, dense: List[Tuple[int, float]],
+              lexical: List[Tuple[int, float]], top_k: int) -> List[Dict[str, Any]]:
+        """Reciprocal rank fusion: each list contributes 1 / (HYBRID_RRF_K + rank) per chunk"""
+        fused = {}
+        for field, hits in (("score", dense), ("bm25_score", lexical)):
+            for rank, (row, score) in enumerate(hits, start=1):
+                entry = fused.setdefault(row, {"score": 0.0, "bm25_score": 0.0, "rrf_score": 0.0})
+                entry[field] = score
+                entry["rrf_score"] += 1.0 / (Config.HYBRID_RRF_K + rank)
+        
+        best = sorted(fused.items(), key=lambda item: item[1]["rrf_score"], reverse=True)[:top_k]
+        return [self._result(documents, row, **scores) for row, scores in best]
+    
+    def _result(self, documents: DocumentStore, row: int, **scores) -> Dict[str, Any]:
+        result = documents[row]
+        result.update(scores)
+        return result
+    
+    def _refresh_deleted_selector(self):
+        """Rebuild the selector that excludes tombstoned positions from search; called under the lock"""
+        if not self._deleted:
+            self._deleted_selector = None
+            return
+        # The inner selector is kept referenced alongside the one wrapping it; the positions
+        # are also kept as an array for BM25 search
+        positions = np.fromiter(self._deleted, dtype=np.int64, count=len(self._deleted))
+        deleted = faiss.IDSelectorBatch(positions)
+        self._deleted_selector = (faiss.IDSelectorNot(deleted), deleted, positions)
+    
+    def add_document_stream(self, chunks: Iterable[str], document_metadata: Dict[str, Any],
+                            on_batch: Callable[[Dict[str, int]], None] = None) -> Dict[str, int]:
+        """
+        Add one document whose chunks arrive as an iterator, INGESTION_BATCH_SIZE at a time.
+        
+        on_batch(totals) is called after each batch with the running counts (chunks read,
+        added, duplicates, near_duplicates), which are also returned.
+        """
+        totals = {"chunks": 0, "added": 0, "duplicates": 0, "near_duplicates": 0}
+        chunks = iter(chunks)
+        while True:
+            batch = list(islice(chunks, Config.INGESTION_BATCH_SIZE))
+            if not batch:
+                break
+            counts = self.add_document(batch, document_metadata, first_chunk_id=totals["chunks"])
+            totals["chunks"] += len(batch)
+            for key, value in counts.items():
+                totals[key] += value
+            if on_batch:
+                on_batch(dict(totals))
+        return totals
+    
+    def upsert_document(self, chunks: Iterable[str], document_metadata: Dict[str, Any],
+                        on_batch: Callable[[Dict[str, int]], None] = None) -> Dict[str, int]:
+        """
+        Replace every stored chunk of document_metadata['file_name'] with `chunks`.
+        
+        The old chunks are tombstoned before the new ones are added (so unchanged chunks are
+        not skipped as duplicates of them) and restored if adding fails. Compaction waits
+        until the upsert is done, so the positions of the replaced rows stay valid.
+        """
+        self._check_writable()
+        file_name = document_metadata["file_name"]
+        with self._rows_lock.read():
+            with self._lock:
+                replaced = self._live_rows(file_name)
+                self._tombstone(replaced)
+            
+            try:
+                totals = self.add_document_stream(chunks, document_metadata, on_batch)
+            except Exception:
+                with self._lock:
+                    self._tombstone(self._live_rows(file_name))
+                    self._restore(replaced)
+                raise
+        
+        totals["replaced"] = len(replaced)
+        logger.info(f"Replaced {len(replaced)} chunks of {file_name} with {totals['added']}")
+        return totals
+    
+    def delete_document(self, file_name: str) -> int:
+        """Tombstone every chunk of the document uploaded as `file_name`; returns how many were deleted"""
+        self._check_writable()
+        with self._lock:
+            rows = self._live_rows(file_name)
+            self._tombstone(rows)
+        logger.info(f"Deleted {len(rows)} chunks of {file_name}")
+        return len(rows)
+    
+    def list_documents(self) -> List[Dict[str, Any]]:
+        """Source documents with at least one live chunk, by file name"""
+        docs = self.documents.document_column()
+        live = np.ones(len(docs), dtype=bool)
+        if self._deleted:
+            live[list(self._deleted)] = False
+        counts = np.bincount(docs[live], minlength=len(self.documents.doc_metadata))
+        
+        documents = {}
+        for doc, metadata in enumerate(self.documents.doc_metadata):
+            if counts[doc]:
+                file_name = metadata.get("file_name")
+                entry = documents.setdefault(file_name, {"file_name": file_name, "chunks": 0, "metadata": metadata})
+                entry["chunks"] += int(counts[doc])
+        return list(documents.values())
+    
+    def _live_rows(self, file_name: str) -> List[int]:
+        rows = self.documents.rows_where(lambda metadata: metadata.get("file_name") == file_name)
+        return [int(row) for row in rows if int(row) not in self._deleted]
+    
+    def _tombstone(self, rows: List[int]):
+        """Mark rows deleted; called under the lock"""
+        rows = [row for row in rows if row not in self._deleted]
+        if not rows:
+            return
+        if Config.DEDUP_EXACT:
+            self._content_hashes()  # built before the rows are excluded from it
+        self._release_hashes([content_hash(self.documents.text(row)) for row in rows])
+        self._deleted.update(rows)
+        self._refresh_deleted_selector()
+        self._tombstones_dirty = True
+        self.version += 1
+    
+    def _restore(self, rows: List[int]):
+        """Undo _tombstone for rows; called under the lock"""
+        rows = [row for row in rows if row in self._deleted]
+        if not rows:
+            return
+        self._deleted.difference_update(rows)
+        if Config.DEDUP_EXACT:
+            known = self._content_hashes()
+            for row in rows:
+                digest = content_hash(self.documents.text(row))
+                known[digest] = known.get(digest, 0) + 1
+        self._refresh_deleted_selector()
+        self._tombstones_dirty = True
+        self.version += 1
+    
+    def save(self, path: str):
+        """
+        Persist the vector store to the directory at `path`.
         
-        # Save documents and metadata
-        with open(f"{path}.pkl", 'wb') as f:
-            pickle.dump({
-                'documents': self.documents,
-                'model_name': self.model_name,
-                'dimension': self.dimension
-            }, f)
+        Only documents added since the previous save to the same directory are written,
+        as one append-only segment. A full snapshot is written instead when the directory
+        is new or the index itself was rebuilt. Once enough segments accumulate they are
+        compacted into a new snapshot on a background thread.
+        """
+        self._check_writable()
+        with self._lock:
+            store = SegmentStore(path)
+            header = self._store_header()
+            
+            if path != self.store_path or self._needs_snapshot or not SegmentStore.exists(path):
+                store.write_snapshot(self.index, self.documents, header, self.lexical)
+            elif len(self.documents) > self._persisted_count:
+                vectors = np.vstack(self._pending_vectors)
+                store.append_segment(vectors, self.documents.rows(self._persisted_count), header)
+            elif self._tombstones_dirty:
+                store.update_header(header)
+            
+            self._mark_persisted(path)
+            segment_count = store.segment_count()
+            deleted_ratio = len(self._deleted) / max(len(self.documents), 1)
         
         logger.info(f"Saved vector store to {path}")
+        if segment_count >= Config.COMPACTION_SEGMENT_THRESHOLD or deleted_ratio >= Config.COMPACTION_DELETED_RATIO:
+            self.compact_in_background()
+    
+    def compact(self, path: str = None):
+        """Fold the snapshot and all segments into a single new snapshot, dropping deleted chunks"""
+        self._check_writable()
+        with self._rows_lock.write(), self._lock:
+            path = path or self.store_path
+            if self._deleted:
+                deleted = np.fromiter(self._deleted, dtype=np.int64, count=len(self._deleted))
+                index = remove_vectors(self.index, deleted)
+                documents = self.documents.without_rows(deleted)
+                lexical = self.lexical.without_rows(deleted)
+                with self._index_lock.write():
+                    self.index, self.documents, self.lexical, self._deleted_selector = index, documents, lexical, None
+                self._deleted = set()
+            SegmentStore(path).write_snapshot(self.index, self.documents, self._store_header(), self.lexical)
+            self._mark_persisted(path)
+        logger.info(f"Compacted vector store at {path}")
+    
+    def compact_in_background(self):
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+        self._compaction_thread = threading.Thread(target=self._run_compaction, name="vector-store-compaction", daemon=True)
+        self._compaction_thread.start()
+    
+    def _run_compaction(self):
+        try:
+            self.compact()
+        except Exception as e:
+            logger.error(f"Vector store compaction failed: {e}")
+    
+    def _check_writable(self):
+        if self.read_only:
+            raise ReadOnlyStoreError("Vector store was loaded read-only (mmap) and cannot be modified")
+    
+    def _store_header(self) -> Dict[str, Any]:
+        id_column = self.documents.id_column()
+        return {
+            'model_name': self.model_name,
+            'dimension': self.dimension,
+            'next_id': self.documents.next_id,
+            'deleted_ids': sorted(int(id_column[row]) for row in self._deleted)
+        }
+    
+    def _mark_persisted(self, path: str):
+        self.store_path = path
+        self._pending_vectors = []
+        self._persisted_count = len(self.documents)
+        self._needs_snapshot = False
+        self._tombstones_dirty = False
     
-    def load(self, path: str):
-        """Load the vector store from disk"""
+    def load(self, path: str, mmap: bool = False):
+        """
+        Load the vector store from disk.
+        
+        With mmap the snapshot index is memory-mapped and chunk text and metadata are read
+        lazily by id, so startup time and RSS stay flat as the corpus grows and forked
+        workers share the same pages. The store is then read-only. mmap needs a compacted
+        store; if segments are pending the store is loaded into memory instead.
+        """
         try:
-            # Load FAISS index
-            if os.path.exists(f"{path}.index"):
-                self.index = faiss.read_index(f"{path}.index")
+            if not SegmentStore.exists(path):
+                return self._load_legacy(path)
             
-            # Load documents and metadata
-            if os.path.exists(f"{path}.pkl"):
-                with open(f"{path}.pkl", 'rb') as f:
-                    data = pickle.load(f)
-                    self.documents = data['documents']
-                    self.model_name = data['model_name']
-                    self.dimension = data['dimension']
-                    
-                    # Reinitialize model if needed
-                    if self.model_name != Config.EMBEDDING_MODEL:
-                        self.model = SentenceTransformer(self.model_name)
+            store = SegmentStore(path)
+            if mmap and store.segment_count() > 0:
+                logger.warning(f"Vector store at {path} has uncompacted segments; loading into memory instead of mmap")
+                mmap = False
+            
+            with self._lock:
+                manifest, index, documents, lexical, segments = store.load(use_mmap=mmap)
+                self._set_model(manifest['model_name'])
+                self.dimension = manifest['dimension']
+                self.documents = documents
+                self.lexical = lexical or self._build_lexical(documents)
+                self._chunk_hashes = None
+                self.index = index
+                if self.index is not None:
+                    apply_search_params(self.index)
+                
+                # Replay segments appended since the last compaction
+                for vectors, segment_documents in segments:
+                    if self.index is None:
+                        self.initialize_index(self.dimension)
+                    for document in segment_documents:
+                        self.lexical.add(len(self.documents), document['text'])
+                        self.documents.append(document['text'], document['metadata'], document.get('id'))
+                    with self._index_lock.write():
+                        self.index.add(vectors.astype(np.float32, copy=False))
+                
+                self.documents.next_id = max(self.documents.next_id, manifest.get('next_id', 0))
+                self._deleted = {int(row) for row in self.documents.positions_of(manifest.get('deleted_ids', []))}
+                self._refresh_deleted_selector()
+                
+                self._mark_persisted(path)
+                self.version += 1
+                self.read_only = mmap
+                if self.index is not None and not self.read_only:
+                    self._train_if_ready()
             
-            logger.info(f"Loaded vector store from {path}")
+            logger.info(f"Loaded vector store from {path}{' (mmap, read-only)' if mmap else ''}")
             return True
         except Exception as e:
             logger.error(f"Error loading vector store: {e}")
             return False
     
+    def _load_legacy(self, path: str):
+        """Load the single-file store (`{path}.index` + `{path}.pkl`); the next save migrates it"""
+        # Load FAISS index
+        if os.path.exists(f"{path}.index"):
+            self.index = faiss.read_index(f"{path}.index")
+            apply_search_params(self.index)
+        
+        # Load documents and metadata
+        if os.path.exists(f"{path}.pkl"):
+            with open(f"{path}.pkl", 'rb') as f:
+                data = pickle.load(f)
+                self.documents = DocumentStore.from_dicts(data['documents'])
+                self.lexical = self._build_lexical(self.documents)
+                self._chunk_hashes = None
+                self._deleted = set()
+                self._deleted_selector = None
+                self._set_model(data['model_name'])
+                self.dimension = data['dimension']
+                self.version += 1
+        
+        logger.info(f"Loaded legacy vector store from {path}")
+        return True
+    
+    def _build_lexical(self, documents: DocumentStore) -> BM25Index:
+        # Stores saved before the BM25 index existed are indexed from their text on load
+        lexical = BM25Index()
+        for row in range(len(documents)):
+            lexical.add(row, documents.text(row))
+        return lexical
+    
+    def _set_model(self, model_name: str):
+        # Reinitialize model if needed
+        if model_name != self.model_name:
+            self.model_name = model_name
+            self._model = None
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about the vector store"""
         return {
-            'total_documents': len(self.documents),
+            'total_documents': len(self.documents) - len(self._deleted),
+            'deleted_chunks': len(self._deleted),
+            'source_documents': len(self.documents.doc_metadata),
             'index_size': self.index.ntotal if self.index else 0,
             'dimension': self.dimension,
-            'model_name': self.model_name
+            'index_type': index_type_of(self.index) if self.index else None,
+            'configured_index_type': self.index_type,
+            'read_only': self.read_only,
+            'model_name': self.model_name,
+            'embedding': self.embedder.get_stats(),
+            'embedding_cache': self.embedding_cache.get_stats(),
+            'dedup': dict(self.dedup_stats),
+            'lexical': self.lexical.get_stats()
         }
 
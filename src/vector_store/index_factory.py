@@ -0,0 +1,230 @@
+"""
+FAISS index construction for FAISSVectorStore.
+
+Supported index types (Config.FAISS_INDEX_TYPE):
+- "flat":     exact inner-product search (IndexFlatIP); no training, O(N) per query.
+- "ivf_flat": inverted file over full vectors; needs training, scans FAISS_IVF_NPROBE lists.
+- "ivf_pq":   inverted file over product-quantised codes; needs training, stores
+              FAISS_PQ_M bytes per vector instead of 4 * dimension.
+- "hnsw":     graph index over full vectors; no training, tuned with FAISS_HNSW_EF_SEARCH.
+- "sq_fp16":  exact scan over float16 vectors; no training, half the memory of "flat".
+- "sq8":      exact scan over int8 codes (per-dimension min/max); needs training, a quarter
+              of the memory of "flat". Scores are approximate.
+
+Vectors waiting to be saved and the segment files of the scalar-quantised types are kept
+as float16 (see storage_dtype), halving their memory and disk size as well.
+
+Trainable indexes start out as a flat staging index and are converted automatically by
+FAISSVectorStore once FAISS_TRAIN_MIN_VECTORS vectors have been added.
+
+Migrating an existing store (e.g. the default flat index) to another type, from src/:
+
+    python -m vector_store.index_factory migrate --to ivf_pq
+
+This loads the store at Config.VECTOR_STORE_DIR, trains the new index on a sample of the
+stored vectors, re-adds every vector in batches and writes a fresh snapshot in place. Set
+FAISS_INDEX_TYPE to the same value so new uploads keep using it.
+"""
+import argparse
+import logging
+from typing import Optional
+
+import faiss
+import numpy as np
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw", "sq_fp16", "sq8")
+IVF_INDEX_TYPES = ("ivf_flat", "ivf_pq")
+TRAINABLE_INDEX_TYPES = IVF_INDEX_TYPES + ("sq8",)
+SCALAR_QUANTIZER_TYPES = {
+    "sq_fp16": faiss.ScalarQuantizer.QT_fp16,
+    "sq8": faiss.ScalarQuantizer.QT_8bit
+}
+SQ_TRAIN_MIN_VECTORS = 1000  # per-dimension ranges need far fewer samples than k-means
+
+MIGRATION_BATCH_SIZE = 100000
+
+
+def create_index(index_type: str, dimension: int) -> faiss.Index:
+    """Build an empty (and, for IVF types, untrained) inner-product index."""
+    if index_type == "flat":
+        index = faiss.IndexFlatIP(dimension)
+    elif index_type == "ivf_flat":
+        quantizer = faiss.IndexFlatIP(dimension)
+        index = faiss.IndexIVFFlat(quantizer, dimension, Config.FAISS_IVF_NLIST, faiss.METRIC_INNER_PRODUCT)
+    elif index_type == "ivf_pq":
+        quantizer = faiss.IndexFlatIP(dimension)
+        index = faiss.IndexIVFPQ(
+            quantizer, dimension, Config.FAISS_IVF_NLIST,
+            Config.FAISS_PQ_M, Config.FAISS_PQ_NBITS, faiss.METRIC_INNER_PRODUCT
+        )
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, Config.FAISS_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = Config.FAISS_HNSW_EF_CONSTRUCTION
+    elif index_type in SCALAR_QUANTIZER_TYPES:
+        index = faiss.IndexScalarQuantizer(dimension, SCALAR_QUANTIZER_TYPES[index_type], faiss.METRIC_INNER_PRODUCT)
+    else:
+        raise ValueError(f"Unsupported FAISS index type: {index_type}. Choose one of {', '.join(INDEX_TYPES)}")
+
+    apply_search_params(index)
+    return index
+
+
+def index_type_of(index: faiss.Index) -> str:
+    """Identify which of INDEX_TYPES an index instance is."""
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVFFlat):
+        return "ivf_flat"
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexScalarQuantizer):
+        return "sq8" if index.sq.qtype == faiss.ScalarQuantizer.QT_8bit else "sq_fp16"
+    return "flat"
+
+
+def requires_training(index_type: str) -> bool:
+    return index_type in TRAINABLE_INDEX_TYPES
+
+
+def storage_dtype(index_type: str) -> np.dtype:
+    """dtype of the vectors kept for saving (pending vectors and segment files)"""
+    return np.dtype(np.float16 if index_type in SCALAR_QUANTIZER_TYPES else np.float32)
+
+
+def min_training_vectors(index_type: str) -> int:
+    """Number of vectors needed before a trainable index type can be built."""
+    if Config.FAISS_TRAIN_MIN_VECTORS:
+        return Config.FAISS_TRAIN_MIN_VECTORS
+    if index_type == "sq8":
+        return SQ_TRAIN_MIN_VECTORS
+    # FAISS k-means wants ~39 points per centroid; PQ also trains 2^nbits centroids per sub-space
+    minimum = 39 * Config.FAISS_IVF_NLIST
+    if index_type == "ivf_pq":
+        minimum = max(minimum, 39 * (1 << Config.FAISS_PQ_NBITS))
+    return minimum
+
+
+def apply_search_params(index: faiss.Index):
+    """
+    Apply query-time parameters (nprobe, efSearch) from Config.
+
+    IVF indexes also get a direct map, so filtered searches can reconstruct vectors by position.
+    """
+    index_type = index_type_of(index)
+    if index_type in IVF_INDEX_TYPES:
+        ivf = faiss.extract_index_ivf(index)
+        ivf.nprobe = Config.FAISS_IVF_NPROBE
+        ivf.make_direct_map()
+    elif index_type == "hnsw":
+        index.hnsw.efSearch = Config.FAISS_HNSW_EF_SEARCH
+
+
+def search_parameters(index: faiss.Index, selector: faiss.IDSelector, nprobe: Optional[int] = None,
+                      ef_search: Optional[int] = None) -> faiss.SearchParameters:
+    """
+    Per-query parameters restricting a search to the positions accepted by `selector`.
+
+    IVF and HNSW indexes only accept their own parameter types, so the configured nprobe /
+    efSearch are carried over; `nprobe` and `ef_search` override FAISS_IVF_NPROBE and
+    FAISS_HNSW_EF_SEARCH.
+    """
+    index_type = index_type_of(index)
+    if index_type in IVF_INDEX_TYPES:
+        return faiss.SearchParametersIVF(sel=selector, nprobe=nprobe or Config.FAISS_IVF_NPROBE)
+    if index_type == "hnsw":
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=ef_search or Config.FAISS_HNSW_EF_SEARCH)
+    return faiss.SearchParameters(sel=selector)
+
+
+def read_index_mmap(path: str) -> faiss.Index:
+    """
+    Memory-map a saved index read-only instead of copying it into RAM.
+
+    Flat and HNSW storage is mapped with IO_FLAG_MMAP_IFC (where this FAISS build has it);
+    IVF inverted lists are mapped through IO_FLAG_MMAP. Nothing may be added to the result.
+    """
+    flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+    try:
+        return faiss.read_index(path, flags | getattr(faiss, "IO_FLAG_MMAP_IFC", 0))
+    except RuntimeError:
+        return faiss.read_index(path, flags)
+
+
+def migrate_index(source: faiss.Index, index_type: str, train_sample_size: Optional[int] = None) -> faiss.Index:
+    """
+    Copy every vector of `source` into a new index of `index_type`, preserving positions.
+
+    Vectors are reconstructed from the source, so migrating out of an IVF-PQ index
+    carries over its quantisation error.
+    """
+    ntotal = source.ntotal
+    target = create_index(index_type, source.d)
+
+    if index_type_of(source) in IVF_INDEX_TYPES:
+        faiss.extract_index_ivf(source).make_direct_map()
+
+    if requires_training(index_type):
+        sample_size = min(ntotal, train_sample_size or Config.FAISS_TRAIN_SAMPLE_SIZE)
+        sample_ids = np.linspace(0, ntotal - 1, sample_size).astype("int64")
+        logger.info(f"Training {index_type} index on {sample_size} of {ntotal} vectors")
+        target.train(source.reconstruct_batch(sample_ids))
+
+    for start in range(0, ntotal, MIGRATION_BATCH_SIZE):
+        count = min(MIGRATION_BATCH_SIZE, ntotal - start)
+        target.add(source.reconstruct_n(start, count))
+
+    logger.info(f"Migrated {ntotal} vectors from {index_type_of(source)} to {index_type} index")
+    return target
+
+
+def remove_vectors(source: faiss.Index, positions: np.ndarray) -> faiss.Index:
+    """
+    Copy of `source` without the vectors at `positions`; the remaining vectors keep their order.
+
+    FAISS remove_ids either renumbers (flat), leaves gaps (IVF) or is unsupported (HNSW), so
+    the kept vectors are re-added to an empty index of the same type instead. Trained
+    indexes are cloned and reset, keeping their quantizers.
+    """
+    keep = np.setdiff1d(np.arange(source.ntotal, dtype=np.int64), positions)
+    index_type = index_type_of(source)
+    if index_type in TRAINABLE_INDEX_TYPES:
+        if index_type in IVF_INDEX_TYPES:
+            faiss.extract_index_ivf(source).make_direct_map()
+        target = faiss.clone_index(source)
+        target.reset()
+        apply_search_params(target)
+    else:
+        target = create_index(index_type, source.d)
+
+    for start in range(0, len(keep), MIGRATION_BATCH_SIZE):
+        target.add(source.reconstruct_batch(keep[start:start + MIGRATION_BATCH_SIZE]))
+
+    logger.info(f"Removed {source.ntotal - len(keep)} of {source.ntotal} vectors from {index_type} index")
+    return target
+
+
+if __name__ == "__main__":
+    from vector_store.faiss_store import FAISSVectorStore
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Manage the FAISS index backing the vector store")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    migrate = subcommands.add_parser("migrate", help="Rebuild the stored index as another index type")
+    migrate.add_argument("--to", dest="index_type", choices=INDEX_TYPES, required=True)
+    migrate.add_argument("--path", default=Config.VECTOR_STORE_DIR, help="Vector store path")
+    compact = subcommands.add_parser("compact", help="Fold all segments into one snapshot and drop deleted chunks (required for mmap loading)")
+    compact.add_argument("--path", default=Config.VECTOR_STORE_DIR, help="Vector store path")
+    args = parser.parse_args()
+
+    store = FAISSVectorStore()
+    if not store.load(args.path) or store.index is None:
+        raise SystemExit(f"No vector store found at {args.path}")
+    if args.command == "migrate":
+        store.migrate_index(args.index_type)
+        store.save(args.path)
+    else:
+        store.compact(args.path)
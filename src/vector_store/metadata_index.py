@@ -0,0 +1,116 @@
+"""
+Metadata filters for FAISSVectorStore searches.
+
+A filter maps document metadata fields (file_name, file_type, author, title, pages,
+slides, uploaded_at, ...) to a condition:
+- a value:                     equal to it (strings compare case-insensitively)
+- a list of values:            equal to any of them
+- {"gte": ..., "lt": ...}:     within the range (gt, gte, lt, lte); numbers compare with
+                               numbers, strings with strings, so ISO dates work too
+Every condition must hold, e.g. {"file_type": ["pdf", "docx"], "pages": {"gte": 10}}.
+
+Metadata is stored once per document (see document_store.py), so MetadataIndex maps each
+(field, value) to the documents that have it, and each document to its row positions. A
+filter becomes a document bitmap through array operations and then the row positions to
+search. The store turns those into a FAISS ID selector, so the index skips other rows during
+the search instead of results being dropped after it.
+"""
+import operator
+import threading
+from array import array
+from typing import Any, Dict
+
+import numpy as np
+
+from vector_store.document_store import DocumentStore
+
+RANGE_OPERATORS = {"gt": operator.gt, "gte": operator.ge, "lt": operator.lt, "lte": operator.le}
+FILTER_VALUE_TYPES = (str, int, float, bool, type(None))
+
+
+def validate_filters(filters: Any) -> Dict[str, Any]:
+    """Check the shape of a filter; raises ValueError with a message fit for an API client"""
+    if not isinstance(filters, dict):
+        raise ValueError("filters must be an object mapping metadata fields to conditions")
+    for field, condition in filters.items():
+        if isinstance(condition, dict):
+            unknown = set(condition) - set(RANGE_OPERATORS)
+            if not condition or unknown:
+                raise ValueError(f"Range filter on {field} takes {', '.join(RANGE_OPERATORS)}")
+            if not all(isinstance(bound, (str, int, float)) and not isinstance(bound, bool)
+                       for bound in condition.values()):
+                raise ValueError(f"Range filter on {field} needs numbers or strings as bounds")
+        elif isinstance(condition, list):
+            if not condition:
+                raise ValueError(f"Filter on {field} lists no values")
+            if not all(isinstance(value, FILTER_VALUE_TYPES) for value in condition):
+                raise ValueError(f"Unsupported filter on {field}")
+        elif not isinstance(condition, FILTER_VALUE_TYPES):
+            raise ValueError(f"Unsupported filter on {field}")
+    return filters
+
+
+def _key(value: Any) -> Any:
+    return value.lower() if isinstance(value, str) else value
+
+
+def _comparable(value: Any, bound: Any) -> bool:
+    if isinstance(value, str) or isinstance(bound, str):
+        return isinstance(value, str) and isinstance(bound, str)
+    return all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in (value, bound))
+
+
+class MetadataIndex:
+    """(field, value) -> documents and document -> rows over one DocumentStore, updated as it grows"""
+
+    def __init__(self, documents: DocumentStore):
+        self.documents = documents
+        self._values: Dict[str, Dict[Any, array]] = {}  # field -> value key -> document indexes
+        self._doc_rows = []                              # document index -> row positions
+        self._rows_seen = 0
+        self._lock = threading.Lock()
+
+    def rows(self, filters: Dict[str, Any]) -> np.ndarray:
+        """Sorted row positions (deleted ones included) whose document matches every condition"""
+        with self._lock:
+            self._sync()
+            docs = np.ones(len(self._doc_rows), dtype=bool)
+            for field, condition in filters.items():
+                docs &= self._match(field, condition)
+            rows = [np.asarray(self._doc_rows[doc], dtype=np.int64) for doc in np.flatnonzero(docs)]
+        if not rows:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate(rows))
+
+    def _sync(self):
+        # Rows are counted before documents are read: a row's document is always stored first
+        count = len(self.documents)
+        doc_metadata = self.documents.doc_metadata
+        for doc in range(len(self._doc_rows), len(doc_metadata)):
+            for field, value in doc_metadata[doc].items():
+                try:
+                    self._values.setdefault(field, {}).setdefault(_key(value), array("i")).append(doc)
+                except TypeError:
+                    continue  # unhashable values (lists, dicts) are not filterable
+            self._doc_rows.append(array("q"))
+
+        if count > self._rows_seen:
+            column = self.documents.document_column(self._rows_seen)[:count - self._rows_seen]
+            for offset, doc in enumerate(column.tolist()):
+                self._doc_rows[doc].append(self._rows_seen + offset)
+            self._rows_seen = count
+
+    def _match(self, field: str, condition: Any) -> np.ndarray:
+        matched = np.zeros(len(self._doc_rows), dtype=bool)
+        values = self._values.get(field, {})
+        if isinstance(condition, dict):
+            bounds = [(RANGE_OPERATORS[name], _key(bound)) for name, bound in condition.items()]
+            for value, docs in values.items():
+                if all(_comparable(value, bound) and compare(value, bound) for compare, bound in bounds):
+                    matched[np.asarray(docs, dtype=np.int64)] = True
+        else:
+            for value in condition if isinstance(condition, list) else [condition]:
+                docs = values.get(_key(value))
+                if docs is not None:
+                    matched[np.asarray(docs, dtype=np.int64)] = True
+        return matched
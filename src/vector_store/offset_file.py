@@ -0,0 +1,41 @@
+"""
+Offset-indexed record files.
+
+A record file is a blob of concatenated byte strings plus a `.offsets.npy` array of
+int64 boundaries (N + 1 entries), so record i is blob[offsets[i]:offsets[i + 1]]. Opened
+with mmap, records are read lazily by position and the pages are shared between every
+process that maps the same file.
+"""
+import os
+import mmap
+
+import numpy as np
+
+
+def write_offset_file(path: str, data: bytes, offsets: np.ndarray):
+    """Write a blob to `path` and its int64 record boundaries to `{path}.offsets.npy`"""
+    with open(path, "wb") as f:
+        f.write(data)
+    np.save(f"{path}.offsets.npy", np.asarray(offsets, dtype=np.int64))
+
+
+class OffsetFile:
+    def __init__(self, path: str, use_mmap: bool = True):
+        self.path = path
+        self.offsets = np.load(f"{path}.offsets.npy", mmap_mode="r" if use_mmap else None)
+
+        with open(path, "rb") as f:
+            if use_mmap and os.path.getsize(path) > 0:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.data = f.read()
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> bytes:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.data[int(self.offsets[i]):int(self.offsets[i + 1])]
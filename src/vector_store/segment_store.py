@@ -0,0 +1,171 @@
+"""
+Append-only on-disk layout for FAISSVectorStore.
+
+A store directory holds:
+- manifest.json             the current snapshot, the ordered list of live segments and the
+                            stable ids of deleted chunks (tombstones) not yet compacted away
+- snapshot-NNNNNN.index     full FAISS index written by the last compaction
+- snapshot-NNNNNN.*         the DocumentStore covered by that snapshot (see document_store.py)
+                            and its BM25 index (see bm25_index.py)
+- segment-NNNNNN.npy        normalised vectors appended by one save (float32, or float16
+                            for the scalar-quantised index types)
+- segment-NNNNNN.pkl        documents appended by the same save
+
+Saving new documents only writes one segment pair plus the (small) manifest, so its cost
+is proportional to the upload rather than to the corpus; a deletion only rewrites the
+manifest. Compaction folds the snapshot and all segments into a new snapshot without the
+deleted chunks. Files are always written before the manifest that
+references them is atomically replaced, so a crash never leaves a torn store.
+
+A compacted store (no segments) can be opened with mmap: the snapshot index is mapped
+read-only and chunk text and columns are read lazily from the mapped files, so processes that open
+the same store share its pages.
+"""
+import os
+import json
+import pickle
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from vector_store.index_factory import read_index_mmap
+from vector_store.document_store import DocumentStore
+from vector_store.bm25_index import BM25Index
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+FORMAT_VERSION = 1
+
+
+class SegmentStore:
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    @staticmethod
+    def exists(directory: str) -> bool:
+        return os.path.exists(os.path.join(directory, MANIFEST_FILE))
+
+    def read_manifest(self) -> Optional[Dict[str, Any]]:
+        manifest_path = os.path.join(self.directory, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def segment_count(self) -> int:
+        manifest = self.read_manifest()
+        return len(manifest["segments"]) if manifest else 0
+
+    def append_segment(self, vectors: np.ndarray, documents: List[Dict[str, Any]], header: Dict[str, Any]) -> str:
+        """Write one segment holding `vectors` and their `documents`, then publish it in the manifest"""
+        manifest = self.read_manifest() or self._empty_manifest()
+        name = f"segment-{manifest['next_sequence']:06d}"
+
+        np.save(self._path(f"{name}.npy"), np.ascontiguousarray(vectors))
+        with open(self._path(f"{name}.pkl"), "wb") as f:
+            pickle.dump(documents, f)
+
+        manifest.update(header)
+        manifest["segments"].append({"name": name, "count": len(documents)})
+        manifest["next_sequence"] += 1
+        self._write_manifest(manifest)
+
+        logger.info(f"Appended {name} with {len(documents)} documents")
+        return name
+
+    def update_header(self, header: Dict[str, Any]):
+        """Rewrite the manifest with new header fields (e.g. tombstones) and no new data"""
+        manifest = self.read_manifest() or self._empty_manifest()
+        manifest.update(header)
+        self._write_manifest(manifest)
+
+    def write_snapshot(self, index: Optional[faiss.Index], documents: DocumentStore, header: Dict[str, Any],
+                       lexical: Optional[BM25Index] = None):
+        """Replace the snapshot and every segment with a full copy of `index`, `documents` and `lexical`"""
+        os.makedirs(self.directory, exist_ok=True)
+        old_manifest = self.read_manifest()
+        manifest = self._empty_manifest()
+        if old_manifest:
+            manifest["next_sequence"] = old_manifest["next_sequence"]
+
+        snapshot = None
+        if index is not None:
+            name = f"snapshot-{manifest['next_sequence']:06d}"
+            faiss.write_index(index, self._path(f"{name}.index"))
+            documents.write(self._path(name))
+            if lexical is not None:
+                lexical.write(self._path(name))
+            snapshot = {"name": name, "count": len(documents)}
+            manifest["next_sequence"] += 1
+
+        manifest.update(header)
+        manifest["snapshot"] = snapshot
+        self._write_manifest(manifest)
+
+        if old_manifest:
+            self._remove_files(old_manifest)
+        logger.info(f"Wrote snapshot of {len(documents)} documents to {self.directory}")
+
+    def load(self, use_mmap: bool = False) -> Tuple[Dict[str, Any], Optional[faiss.Index], DocumentStore,
+                                                    Optional[BM25Index], Iterator[Tuple[np.ndarray, List]]]:
+        """
+        Read the manifest, snapshot index, snapshot documents and snapshot BM25 index (None
+        if the snapshot predates it).
+
+        With use_mmap the index and document store are memory-mapped read-only; otherwise
+        both are read fully into memory. Segments are
+        returned as a lazy iterator of (vectors, documents) pairs, in the order they were
+        appended, so the caller can add them to the index one at a time.
+        """
+        manifest = self.read_manifest()
+        if manifest is None:
+            raise FileNotFoundError(f"No vector store manifest in {self.directory}")
+
+        index = None
+        documents = DocumentStore()
+        lexical = BM25Index()
+        snapshot = manifest.get("snapshot")
+        if snapshot:
+            index_path = self._path(f"{snapshot['name']}.index")
+            index = read_index_mmap(index_path) if use_mmap else faiss.read_index(index_path)
+            documents = DocumentStore.open(self._path(snapshot["name"]), use_mmap)
+            lexical = None
+            if os.path.exists(self._path(f"{snapshot['name']}.bm25.pkl")):
+                lexical = BM25Index.open(self._path(snapshot["name"]))
+
+        return manifest, index, documents, lexical, self._iter_segments(manifest)
+
+    def _iter_segments(self, manifest: Dict[str, Any]) -> Iterator[Tuple[np.ndarray, List]]:
+        for segment in manifest["segments"]:
+            vectors = np.load(self._path(f"{segment['name']}.npy"))
+            with open(self._path(f"{segment['name']}.pkl"), "rb") as f:
+                yield vectors, pickle.load(f)
+
+    def _empty_manifest(self) -> Dict[str, Any]:
+        return {"format": FORMAT_VERSION, "snapshot": None, "segments": [], "next_sequence": 1}
+
+    def _write_manifest(self, manifest: Dict[str, Any]):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._path(f"{MANIFEST_FILE}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._path(MANIFEST_FILE))
+
+    def _remove_files(self, manifest: Dict[str, Any]):
+        names = [segment["name"] for segment in manifest["segments"]]
+        if manifest.get("snapshot"):
+            names.append(manifest["snapshot"]["name"])
+        for name in names:
+            for suffix in (".index", ".npy", ".pkl", ".texts", ".texts.offsets.npy", ".chunks.npy", ".docs.json", ".bm25.pkl"):
+                try:
+                    os.remove(self._path(f"{name}{suffix}"))
+                except FileNotFoundError:
+                    pass
+
+    def _path(self, file_name: str) -> str:
+        return os.path.join(self.directory, file_name)
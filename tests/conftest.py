@@ -0,0 +1,91 @@
+import os
+import sys
+import hashlib
+
+import numpy as np
+import pytest
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from config import Config
+
+
+class HashEncoder:
+    """Deterministic stand-in for SentenceTransformer: one random unit vector per distinct text"""
+
+    dimension = 32
+
+    def encode(self, sentences, **kwargs):
+        vectors = []
+        for text in sentences:
+            seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:4], "little")
+            vectors.append(np.random.default_rng(seed).standard_normal(self.dimension))
+        return np.array(vectors, dtype=np.float32).reshape(len(vectors), self.dimension)
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+
+@pytest.fixture
+def config(monkeypatch, tmp_path):
+    """Config pointed at a temporary directory, with background compaction off"""
+    monkeypatch.setattr(Config, "EMBEDDING_CACHE_PATH", str(tmp_path / "embedding_cache.sqlite"))
+    monkeypatch.setattr(Config, "VECTOR_STORE_DIR", str(tmp_path / "store"))
+    monkeypatch.setattr(Config, "FAISS_INDEX_PATH", str(tmp_path / "legacy.index"))
+    monkeypatch.setattr(Config, "MODEL_SERVER_ADDRESS", None)
+    monkeypatch.setattr(Config, "FAISS_INDEX_TYPE", "flat")
+    monkeypatch.setattr(Config, "RETRIEVAL_MODE", "dense")
+    monkeypatch.setattr(Config, "DEDUP_NEAR_THRESHOLD", None)
+    monkeypatch.setattr(Config, "COMPACTION_SEGMENT_THRESHOLD", 10 ** 6)
+    monkeypatch.setattr(Config, "COMPACTION_DELETED_RATIO", 1.1)
+    return Config
+
+
+@pytest.fixture
+def make_store(config):
+    from vector_store.faiss_store import FAISSVectorStore
+
+    def make():
+        store = FAISSVectorStore()
+        store._model = HashEncoder()
+        return store
+    return make
+
+
+@pytest.fixture
+def store(make_store):
+    return make_store()
+
+
+@pytest.fixture
+def coordinator(monkeypatch, config, tmp_path):
+    """A LocalCoordinator with the stub LLM and one indexed document"""
+    import routes.chatbot as chatbot
+    from vector_store.faiss_store import FAISSVectorStore
+
+    monkeypatch.setattr(config, "LLM_BACKEND", "stub")
+    monkeypatch.setattr(config, "RERANK", False)
+    monkeypatch.setattr(config, "DEFAULT_DOCS_DIR", str(tmp_path / "defaults"))
+    monkeypatch.setattr(FAISSVectorStore, "warm_up", lambda self: None)
+    coordinator = chatbot.LocalCoordinator()
+    coordinator.vector_store._model = HashEncoder()
+    coordinator.vector_store.add_document_stream(
+        ["Pumps move fluids through pipes.", "Valves stop the flow of fluids."],
+        {"file_name": "pumps.txt", "file_type": "txt"}
+    )
+    return coordinator
+
+
+def ready_client(monkeypatch, coordinator):
+    """Test client for the chatbot API with a finished startup serving `coordinator`"""
+    import routes.chatbot as chatbot
+
+    ready = chatbot.Startup()
+    ready._coordinator = coordinator
+    ready._thread = ready._started_at = ready._ready_at = 0
+    ready._done.set()
+    monkeypatch.setattr(chatbot, "startup", ready)
+    app = Flask(__name__)
+    app.register_blueprint(chatbot.chatbot_bp, url_prefix="/api/chatbot")
+    return app.test_client()
@@ -0,0 +1,40 @@
+import numpy as np
+
+from agents.answer_cache import AnswerCache
+
+
+def test_exact_hits_need_the_same_context_and_store_version():
+    cache = AnswerCache(max_entries=2, ttl=60, semantic_threshold=0.9)
+    cache.put("What is RAG?", [1, 2], version=1, answer={"response": "rag"})
+
+    assert cache.get("  what is rag ", [1, 2], version=1) == {"response": "rag"}
+    assert cache.get("What is RAG?", [1, 3], version=1) is None
+    # A newer store version drops every entry, and answers for an older one are not kept
+    assert cache.get("What is RAG?", [1, 2], version=2) is None
+    cache.put("What is RAG?", [1, 2], version=1, answer={"response": "stale"})
+    assert cache.get_stats() == {"entries": 0, "hits": 1, "semantic_hits": 0, "misses": 2, "invalidations": 1}
+
+
+def test_semantic_hits_and_eviction():
+    cache = AnswerCache(max_entries=2, ttl=60, semantic_threshold=0.9)
+    cache.put("How do pumps work?", [4], version=1, answer={"response": "pumps"},
+              query_embedding=np.array([1.0, 0.0]))
+
+    assert cache.get("Explain pumps", [4], 1, query_embedding=np.array([0.99, 0.1])) == {"response": "pumps"}
+    assert cache.get("Explain valves", [4], 1, query_embedding=np.array([0.0, 1.0])) is None
+    assert cache.get("Explain pumps", [5], 1, query_embedding=np.array([1.0, 0.0])) is None
+
+    cache.put("second", [5], 1, {"response": "2"})
+    cache.put("third", [6], 1, {"response": "3"})
+    assert cache.get("How do pumps work?", [4], 1) is None
+    assert cache.get_stats()["entries"] == 2
+
+
+def test_entries_expire(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("agents.answer_cache.time.monotonic", lambda: now[0])
+    cache = AnswerCache(ttl=10)
+    cache.put("q", [1], 1, {"response": "a"})
+
+    now[0] += 11
+    assert cache.get("q", [1], 1) is None
@@ -0,0 +1,31 @@
+from conftest import ready_client
+
+
+def test_batch_reports_failures_per_query(monkeypatch, coordinator):
+    client = ready_client(monkeypatch, coordinator)
+    generate = coordinator.llm.generate_response_from_message
+
+    def fail_on_valves(message, **kwargs):
+        if "valves" in message["payload"]["query"]:
+            raise RuntimeError("generation failed")
+        return generate(message, **kwargs)
+    monkeypatch.setattr(coordinator.llm, "generate_response_from_message", fail_on_valves)
+
+    response = client.post("/api/chatbot/chat/batch", json={"messages": ["pumps?", "valves?", "pipes?"]})
+
+    results = response.get_json()["results"]
+    assert [result["query"] for result in results] == ["pumps?", "valves?", "pipes?"]
+    assert results[1] == {"trace_id": results[1]["trace_id"], "query": "valves?", "error": "generation failed"}
+    assert results[0]["response"] and results[2]["response"]
+
+
+def test_batch_retrieval_only(monkeypatch, coordinator):
+    client = ready_client(monkeypatch, coordinator)
+
+    response = client.post("/api/chatbot/chat/batch",
+                           json={"messages": ["Pumps move fluids through pipes."], "generate": False})
+
+    [result] = response.get_json()["results"]
+    assert result["context"][0] == "Pumps move fluids through pipes."
+    assert "response" not in result
+    assert client.post("/api/chatbot/chat/batch", json={"messages": [""]}).status_code == 400
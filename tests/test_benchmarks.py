@@ -0,0 +1,64 @@
+import json
+import os
+
+import pytest
+
+from config import Config
+from benchmarks.corpus import SyntheticCorpus
+from benchmarks.run import compare, latency_summary, parse_args, run_benchmarks
+
+
+@pytest.fixture
+def restore_config(monkeypatch):
+    # run_benchmarks points the configured paths at its temporary directory; put them back afterwards
+    for name in ("VECTOR_STORE_DIR", "FAISS_INDEX_PATH", "FAISS_META_PATH", "EMBEDDING_CACHE_PATH",
+                 "DEFAULT_DOCS_DIR", "UPLOAD_FOLDER"):
+        monkeypatch.setattr(Config, name, getattr(Config, name))
+
+
+def test_corpus_is_reproducible():
+    first, second = SyntheticCorpus(seed=7), SyntheticCorpus(seed=7)
+    assert first.chunks(20) == second.chunks(20)
+    assert first.queries(5) == second.queries(5)
+    assert SyntheticCorpus(seed=8).chunks(20) != SyntheticCorpus(seed=7).chunks(20)
+
+
+def test_latency_summary():
+    summary = latency_summary([0.001, 0.002, 0.003, 0.004])
+    assert summary["count"] == 4
+    assert summary["mean_ms"] == 2.5
+    assert summary["p50_ms"] == 3.0
+    assert summary["max_ms"] == 4.0
+    assert summary["per_second"] == 400.0
+
+
+def test_parse_and_chunk_suites_leave_no_files(restore_config):
+    configured = Config.VECTOR_STORE_DIR
+    args = parse_args(["--suites", "parse,chunk", "--doc-chars", "5000", "--chunk-chars", "50000", "--repeat", "1"])
+
+    report = run_benchmarks(args)
+
+    assert set(report["results"]) == {"parse", "chunk"}
+    assert report["results"]["chunk"]["chunks"] > 0
+    assert "error" not in report["results"]["chunk"]
+    assert any("characters" in run for run in report["results"]["parse"].values())
+    assert not os.path.exists(os.path.dirname(Config.VECTOR_STORE_DIR))
+    assert Config.VECTOR_STORE_DIR != configured
+
+
+def test_unknown_suite_is_rejected():
+    with pytest.raises(SystemExit):
+        parse_args(["--suites", "parse,nonsense"])
+
+
+def test_compare_prints_relative_change(tmp_path, capsys):
+    runs = [{"index_type": "flat", "size": 1000, "mode": "dense", "p50_ms": 2.0}]
+    baseline, current = tmp_path / "old.json", tmp_path / "new.json"
+    baseline.write_text(json.dumps({"results": {"search": {"runs": runs}}}))
+    current.write_text(json.dumps({"results": {"search": {"runs": [dict(runs[0], p50_ms=1.0)]}}}))
+
+    compare(str(baseline), str(current))
+
+    lines = {line.split()[0]: line.split()[1:] for line in capsys.readouterr().out.splitlines()}
+    assert lines["search.runs.flat/1000/dense.p50_ms"] == ["2.0", "1.0", "-50.0%"]
+    assert lines["search.runs.flat/1000/dense.size"] == ["1000", "1000", "+0.0%"]
@@ -0,0 +1,37 @@
+import random
+
+import pytest
+
+from document_processors.all_parsers import TXTParser, iter_chunks
+
+
+def random_text(rng, length):
+    alphabet = "abcde  .!?\n"
+    return "".join(rng.choice(alphabet) for _ in range(length))
+
+
+def split(rng, text):
+    cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, rng.randint(0, 12))))
+    return [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_streaming_chunks_match_whole_text_chunking(seed):
+    rng = random.Random(seed)
+    text = "  \n" * rng.randint(0, 2) + random_text(rng, rng.randint(0, 3000)) + " " * rng.randint(0, 3)
+    chunk_size, overlap = rng.choice([(300, 50), (500, 120), (1000, 200)])
+
+    expected = TXTParser().chunk_text(text.strip(), chunk_size, overlap)
+
+    assert list(iter_chunks(split(rng, text), chunk_size, overlap)) == expected
+
+
+def test_txt_parser_streams_the_file_in_blocks(tmp_path, monkeypatch):
+    monkeypatch.setattr(TXTParser, "BLOCK_SIZE", 64)
+    path = tmp_path / "notes.txt"
+    text = " ".join(f"Sentence number {i} is here." for i in range(200))
+    path.write_text(text, encoding="utf-8")
+
+    parser = TXTParser()
+    assert list(parser.iter_chunks(str(path), 500, 100)) == parser.chunk_text(text, 500, 100)
+    assert parser.read_metadata(str(path))["size"] == len(text)
@@ -0,0 +1,34 @@
+import threading
+
+
+def test_searches_during_compaction_see_consistent_rows(store, tmp_path):
+    path = str(tmp_path / "store")
+    for doc in range(20):
+        store.add_document_stream([f"doc {doc} chunk {i}" for i in range(10)], {"file_name": f"{doc}.txt"})
+    store.save(path)
+
+    errors, stop = [], threading.Event()
+
+    def search():
+        while not stop.is_set():
+            try:
+                for doc in (3, 11, 19):
+                    query = f"doc {doc} chunk 4"
+                    [best] = store.search(query, top_k=1)
+                    # Vectors and rows swapped separately would pair a hit with another chunk's text
+                    assert best["text"] == query and best["score"] > 0.99
+            except Exception as e:
+                errors.append(e)
+
+    searchers = [threading.Thread(target=search) for _ in range(4)]
+    for thread in searchers:
+        thread.start()
+    for doc in range(0, 20, 2):
+        store.delete_document(f"{doc}.txt")
+        store.compact(path)
+    stop.set()
+    for thread in searchers:
+        thread.join()
+
+    assert not errors
+    assert len(store.documents) == 100
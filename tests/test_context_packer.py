@@ -0,0 +1,39 @@
+from agents.context_packer import ContextPacker
+
+
+def words(text):
+    return len(text.split())
+
+
+def sentence(topic, count=10):
+    return " ".join(f"{topic}{i}" for i in range(count)) + "."
+
+
+def test_overlaps_are_trimmed_and_repeats_dropped():
+    packer = ContextPacker(words, redundancy_threshold=0.8, min_chunk_tokens=3)
+    shared = sentence("shared")
+    first = sentence("alpha") + " " + shared
+    second = shared + " " + sentence("beta")
+
+    packed, sources = packer.pack([first, second, first], [{"n": 0}, {"n": 1}, {"n": 2}], budget=1000)
+
+    assert packed == [first, sentence("beta")]
+    assert sources == [{"n": 0}, {"n": 1}]
+    stats = packer.get_stats()
+    assert (stats["redundant_dropped"], stats["overlap_chars_trimmed"]) == (1, len(shared) + 1 + len(first))
+
+
+def test_budget_is_filled_up_to_a_sentence_boundary():
+    packer = ContextPacker(words, min_chunk_tokens=3)
+    overhead = packer.item_overhead
+    long_chunk = " ".join(sentence(f"s{n}", 5) for n in range(6))
+
+    packed, sources = packer.pack([sentence("a"), long_chunk, sentence("c")], [{}, {}, {}],
+                                  budget=10 + overhead + 17 + overhead)
+
+    assert packed[0] == sentence("a")
+    # 17 tokens left: the second chunk is cut after its third five-word sentence
+    assert packed[1] == " ".join(sentence(f"s{n}", 5) for n in range(3))
+    assert len(packed) == len(sources) == 2
+    assert sum(words(text) + overhead for text in packed) <= 10 + overhead + 17 + overhead
+    assert packer.get_stats()["over_budget_dropped"] == 1
@@ -0,0 +1,38 @@
+from conftest import HashEncoder
+
+
+class EchoEncoder(HashEncoder):
+    """Ignores trailing '!', so 'text!' embeds exactly like 'text' without being the same text"""
+
+    def encode(self, sentences, **kwargs):
+        return super().encode([text.rstrip("!") for text in sentences], **kwargs)
+
+
+def test_exact_duplicates_are_skipped_before_embedding(store):
+    first = store.add_document_stream(["alpha chunk", "beta  chunk", "alpha\nchunk"], {"file_name": "a.txt"})
+    again = store.add_document_stream(["beta chunk ", "gamma chunk"], {"file_name": "b.txt"})
+
+    assert (first["added"], first["duplicates"]) == (2, 1)
+    assert (again["added"], again["duplicates"]) == (1, 1)
+    assert store.index.ntotal == 3
+    assert store.get_stats()["dedup"] == {"duplicates_skipped": 2, "near_duplicates_skipped": 0}
+
+
+def test_exact_dedup_can_be_turned_off(store, config, monkeypatch):
+    monkeypatch.setattr(config, "DEDUP_EXACT", False)
+    totals = store.add_document_stream(["alpha chunk", "alpha chunk"], {"file_name": "a.txt"})
+    assert (totals["added"], totals["duplicates"]) == (2, 0)
+
+
+def test_near_duplicates_of_indexed_and_earlier_chunks_are_skipped(store, config, monkeypatch):
+    monkeypatch.setattr(config, "DEDUP_NEAR_THRESHOLD", 0.95)
+    store._model = EchoEncoder()
+    store.add_document_stream(["alpha chunk"], {"file_name": "a.txt"})
+
+    totals = store.add_document_stream(["alpha chunk!", "beta chunk", "beta chunk!"], {"file_name": "b.txt"})
+
+    assert (totals["added"], totals["duplicates"], totals["near_duplicates"]) == (1, 0, 2)
+    assert [hit["text"] for hit in store.search("beta chunk", top_k=5)] == ["beta chunk", "alpha chunk"]
+    # A skipped chunk's text was not claimed, so it is not reported as an exact duplicate later
+    monkeypatch.setattr(config, "DEDUP_NEAR_THRESHOLD", None)
+    assert store.add_document_stream(["alpha chunk!"], {"file_name": "c.txt"})["added"] == 1
@@ -0,0 +1,35 @@
+from conftest import ready_client
+from agents.default_corpus import DefaultCorpus
+
+
+def test_default_documents_answer_without_rag(monkeypatch, coordinator, tmp_path):
+    defaults = tmp_path / "defaults"
+    defaults.mkdir()
+    (defaults / "faq.md").write_text("Opening hours are nine to five.", encoding="utf-8")
+    (defaults / "other.txt").write_text("Parking is free.", encoding="utf-8")
+    client = ready_client(monkeypatch, coordinator)
+
+    response = client.post("/api/chatbot/chat", json={"message": "When are the opening hours?", "use_rag": False})
+
+    assert response.status_code == 200
+    assert [source["file_name"] for source in response.get_json()["sources"]] == ["faq.md"]
+
+
+def test_only_changed_files_are_read_again(monkeypatch, config, tmp_path):
+    monkeypatch.setattr(config, "DEFAULT_DOCS_CHECK_INTERVAL", 0)
+    (tmp_path / "a.txt").write_text("alpha facts", encoding="utf-8")
+    (tmp_path / "b.txt").write_text("beta facts", encoding="utf-8")
+    (tmp_path / "image.png").write_bytes(b"not a document")
+    corpus = DefaultCorpus(str(tmp_path), lambda text: len(text.split()))
+
+    context, sources = corpus.select("beta")
+    assert context == ["beta facts"]
+    assert (sources[0]["file_name"], sources[0]["tokens"]) == ("b.txt", 2)
+
+    (tmp_path / "b.txt").write_text("beta facts, revised", encoding="utf-8")
+    corpus.select("beta")
+    assert corpus.get_stats() == {"files": 2, "chunks": 2, "reloads": 2, "files_read": 3}
+
+    # Nothing matches: the opening chunk of every file
+    context, _ = corpus.select("gamma")
+    assert context == ["alpha facts", "beta facts, revised"]
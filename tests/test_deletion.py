@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+
+
+def test_upsert_keeps_unchanged_chunk_with_near_dedup(store, config, monkeypatch):
+    monkeypatch.setattr(config, "DEDUP_NEAR_THRESHOLD", 0.95)
+    store.add_document_stream(["alpha chunk", "beta chunk"], {"file_name": "a.txt"})
+
+    totals = store.upsert_document(["alpha chunk", "gamma chunk"], {"file_name": "a.txt"})
+
+    assert (totals["added"], totals["near_duplicates"], totals["replaced"]) == (2, 0, 2)
+    [document] = store.list_documents()
+    assert document["chunks"] == 2
+    texts = {result["text"] for result in store.search("alpha chunk", top_k=5)}
+    assert texts == {"alpha chunk", "gamma chunk"}
+
+
+def test_deleted_document_can_be_uploaded_again_with_near_dedup(store, config, monkeypatch):
+    monkeypatch.setattr(config, "DEDUP_NEAR_THRESHOLD", 0.95)
+    store.add_document_stream(["alpha chunk", "beta chunk"], {"file_name": "a.txt"})
+    assert store.delete_document("a.txt") == 2
+
+    totals = store.add_document_stream(["alpha chunk", "beta chunk"], {"file_name": "a.txt"})
+
+    assert (totals["added"], totals["near_duplicates"]) == (2, 0)
+    assert len(store.search("alpha chunk", top_k=5)) == 2
+
+
+def test_failed_upsert_restores_rows_despite_compaction(store, config, monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "INGESTION_BATCH_SIZE", 1)
+    store.add_document_stream(["keep one", "keep two"], {"file_name": "keep.txt"})
+    store.add_document_stream(["old one", "old two"], {"file_name": "a.txt"})
+    store.delete_document("keep.txt")
+    store.save(str(tmp_path / "store"))
+
+    compaction = threading.Thread(target=store.compact)
+
+    def chunks():
+        yield "new one"
+        # A compaction running now would renumber the rows this upsert replaced
+        compaction.start()
+        compaction.join(0.5)
+        raise ValueError("parser failed")
+
+    with pytest.raises(ValueError):
+        store.upsert_document(chunks(), {"file_name": "a.txt"})
+    compaction.join()
+
+    texts = {result["text"] for result in store.search("old one", top_k=10)}
+    assert texts == {"old one", "old two"}
+    assert [(d["file_name"], d["chunks"]) for d in store.list_documents()] == [("a.txt", 2)]
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+def test_deleted_chunks_leave_every_search_mode(store, config, monkeypatch, index_type):
+    monkeypatch.setattr(config, "FAISS_INDEX_TYPE", index_type)
+    store.add_document_stream(["shared words alpha", "shared words beta"], {"file_name": "a.txt"})
+    store.add_document_stream(["shared words gamma"], {"file_name": "b.txt"})
+
+    assert store.delete_document("a.txt") == 2
+    assert store.delete_document("a.txt") == 0
+
+    for mode in ("dense", "lexical", "hybrid"):
+        assert [hit["text"] for hit in store.search("shared words alpha", top_k=5, mode=mode)] == ["shared words gamma"]
+    assert store.search("shared words alpha", top_k=5, filters={"file_name": "a.txt"}) == []
+    assert [d["file_name"] for d in store.list_documents()] == ["b.txt"]
+
+
+def test_upsert_replaces_the_document(store):
+    store.add_document_stream(["old one", "old two"], {"file_name": "a.txt", "version": 1})
+
+    totals = store.upsert_document(["new one"], {"file_name": "a.txt", "version": 2})
+
+    assert (totals["added"], totals["replaced"]) == (1, 2)
+    [document] = store.list_documents()
+    assert (document["chunks"], document["metadata"]["version"]) == (1, 2)
+    assert [hit["text"] for hit in store.search("old one", top_k=5)] == ["new one"]
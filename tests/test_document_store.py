@@ -0,0 +1,52 @@
+import pytest
+
+from vector_store.document_store import DocumentStore, ReadOnlyStoreError
+
+
+def build():
+    store = DocumentStore()
+    store.add_document({"file_name": "a.txt", "file_type": "txt"}, ["first chunk", "second chünk"])
+    store.add_document({"file_name": "b.pdf", "file_type": "pdf", "pages": 3}, ["x" * 150])
+    return store
+
+
+def test_metadata_is_stored_once_per_document():
+    store = build()
+
+    assert len(store) == 3 and len(store.doc_metadata) == 2
+    assert store[1] == {
+        "text": "second chünk",
+        "metadata": {"file_name": "a.txt", "file_type": "txt", "chunk_id": 1, "chunk_text": "second chünk"},
+        "id": 1
+    }
+    assert store[2]["metadata"]["chunk_text"] == "x" * 100 + "..."
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_write_and_open_round_trip(tmp_path, use_mmap):
+    store = build()
+    store.write(str(tmp_path / "docs"))
+
+    opened = DocumentStore.open(str(tmp_path / "docs"), use_mmap=use_mmap)
+
+    assert list(opened) == list(store)
+    assert opened.next_id == 3
+    assert opened.read_only == use_mmap
+    if use_mmap:
+        with pytest.raises(ReadOnlyStoreError):
+            opened.append("more", {"file_name": "c.txt"})
+    else:
+        opened.append("more", {"file_name": "a.txt", "file_type": "txt", "chunk_id": 2})
+        assert opened[3]["id"] == 3 and len(opened.doc_metadata) == 2
+
+
+def test_without_rows_keeps_stable_ids():
+    store = build()
+
+    remaining = store.without_rows([0, 2])
+
+    assert [row["text"] for row in remaining] == ["second chünk"]
+    assert list(remaining.id_column()) == [1]
+    assert remaining.doc_metadata == [{"file_name": "a.txt", "file_type": "txt"}]
+    assert list(remaining.positions_of([2, 1, 0])) == [0]
+    assert remaining.next_id == 3
@@ -0,0 +1,43 @@
+import numpy as np
+
+from conftest import HashEncoder
+from vector_store.embedding_cache import EmbeddingCache
+
+
+class CountingEncoder(HashEncoder):
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, sentences, **kwargs):
+        self.encoded.extend(sentences)
+        return super().encode(sentences, **kwargs)
+
+
+def test_store_encodes_each_distinct_text_once(make_store):
+    store = make_store()
+    store._model = encoder = CountingEncoder()
+
+    first = store.embed(["alpha", "beta", "alpha"])
+    second = store.embed(["beta", "gamma"])
+
+    assert sorted(encoder.encoded) == ["alpha", "beta", "gamma"]
+    np.testing.assert_array_equal(first[0], first[2])
+    np.testing.assert_array_equal(first[1], second[0])
+    np.testing.assert_allclose(np.linalg.norm(second, axis=1), 1.0, rtol=1e-6)
+
+
+def test_cache_survives_restart_per_model(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    vectors = np.arange(6, dtype=np.float32).reshape(2, 3)
+    EmbeddingCache(path, max_memory_items=1).put_many("model-a", ["alpha", "beta"], vectors)
+
+    cache = EmbeddingCache(path)
+    found = cache.get_many("model-a", ["beta", "alpha", "gamma"])
+    np.testing.assert_array_equal(found[0], vectors[1])
+    np.testing.assert_array_equal(found[1], vectors[0])
+    assert found[2] is None
+    assert cache.get_many("model-b", ["alpha"]) == [None]
+
+    cache.get_many("model-a", ["alpha"])
+    stats = cache.get_stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (2, 1, 2)
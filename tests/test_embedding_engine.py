@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from conftest import HashEncoder
+from vector_store.embedding_engine import EmbeddingEngine
+
+
+class RecordingEncoder(HashEncoder):
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, sentences, **kwargs):
+        self.batches.append(list(sentences))
+        return super().encode(sentences, **kwargs)
+
+
+@pytest.mark.parametrize("threads", [1, 3])
+def test_length_sorted_batches_keep_input_order(threads):
+    texts = [("x" * (i * 7 % 23)) + f" text {i}" for i in range(50)]
+    model = RecordingEncoder()
+
+    vectors = EmbeddingEngine(batch_size=8, threads=threads).encode(model, texts)
+
+    expected = HashEncoder().encode(texts)
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    np.testing.assert_allclose(vectors, expected, rtol=1e-5, atol=1e-6)
+    assert sorted(len(batch) for batch in model.batches) == [2] + [8] * 6
+    # Batches cover consecutive, non-overlapping ranges of text length
+    spans = sorted((min(map(len, batch)), max(map(len, batch))) for batch in model.batches)
+    assert all(high <= next_low for (_, high), (next_low, _) in zip(spans, spans[1:]))
+
+
+def test_stats_count_texts_and_batches():
+    engine = EmbeddingEngine(batch_size=4, threads=1)
+    engine.encode(HashEncoder(), ["a", "b", "c", "d", "e"])
+    assert engine.encode(HashEncoder(), []).shape == (0, 0)
+
+    stats = engine.get_stats()
+    assert (stats["batch_size"], stats["texts"], stats["batches"]) == (4, 5, 2)
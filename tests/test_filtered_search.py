@@ -0,0 +1,64 @@
+import math
+
+import pytest
+
+from vector_store import faiss_store
+
+
+def fill(store):
+    for name, file_type in (("a.txt", "txt"), ("b.pdf", "pdf"), ("c.pdf", "pdf")):
+        store.add_document_stream([f"{name} chunk {i}" for i in range(40)],
+                                  {"file_name": name, "file_type": file_type})
+    store.delete_document("c.pdf")
+
+
+def search(store, top_k=10):
+    return [(hit["text"], round(hit["score"], 4))
+            for hit in store.search("b.pdf chunk 7", top_k=top_k, filters={"file_type": "pdf"})]
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw", "ivf_flat"])
+def test_selector_search_matches_exact_scoring(monkeypatch, config, make_store, index_type):
+    monkeypatch.setattr(config, "FAISS_INDEX_TYPE", index_type)
+    monkeypatch.setattr(config, "FAISS_IVF_NLIST", 4)
+    monkeypatch.setattr(config, "FAISS_TRAIN_MIN_VECTORS", 40)
+    store = make_store()
+    fill(store)
+    assert faiss_store.index_type_of(store.index) == index_type
+
+    monkeypatch.setattr(config, "FILTER_EXACT_MAX_ROWS", 10 ** 6)
+    exact = search(store)
+    monkeypatch.setattr(config, "FILTER_EXACT_MAX_ROWS", 0)
+    assert search(store) == exact
+
+    # Only the live PDF's chunks, best first
+    assert len(exact) == 10 and all(text.startswith("b.pdf") for text, _ in exact)
+    assert exact[0] == ("b.pdf chunk 7", pytest.approx(1.0))
+    assert [score for _, score in exact] == sorted((score for _, score in exact), reverse=True)
+
+
+def test_exact_scoring_returns_every_match_below_top_k(monkeypatch, store):
+    fill(store)
+    assert len(search(store, top_k=100)) == 40
+
+
+def test_hnsw_search_depth_grows_with_the_filtered_share(monkeypatch, config, make_store):
+    monkeypatch.setattr(config, "FAISS_INDEX_TYPE", "hnsw")
+    monkeypatch.setattr(config, "FILTER_EXACT_MAX_ROWS", 0)
+    store = make_store()
+    fill(store)
+
+    depths = []
+    search_parameters = faiss_store.search_parameters
+
+    def spy(index, selector, nprobe=None, ef_search=None):
+        depths.append(ef_search)
+        return search_parameters(index, selector, nprobe, ef_search)
+    monkeypatch.setattr(faiss_store, "search_parameters", spy)
+
+    search(store)
+    assert depths == [math.ceil(config.FAISS_HNSW_EF_SEARCH * 120 / 40)]
+
+    monkeypatch.setattr(config, "FILTER_HNSW_EF_SEARCH_MAX", 100)
+    search(store)
+    assert depths[-1] == 100
@@ -0,0 +1,58 @@
+import pytest
+
+from vector_store.bm25_index import BM25Index, tokenize
+
+
+def test_identifiers_are_indexed_whole_and_by_part():
+    assert tokenize("The ERR-4012 code in v1.2") == ["err-4012", "err", "4012", "code", "v1.2", "v1", "2"]
+
+
+def test_bm25_ranks_rare_terms_and_survives_compaction(tmp_path):
+    index = BM25Index()
+    for row, text in enumerate(["pump failure err-4012", "pump maintenance", "valve err-7", "pump pump pump"]):
+        index.add(row, text)
+
+    # The whole identifier outranks a chunk sharing only its "err" part
+    assert [row for row, _ in index.search("err-4012", top_k=4)] == [0, 2]
+    assert [row for row, _ in index.search("err-4012", top_k=4, excluded=[0])] == [2]
+    assert [row for row, _ in index.search("pump", top_k=1)] == [3]
+    assert [row for row, _ in index.search("pump", top_k=4, allowed=[1, 2])] == [1]
+
+    compacted = index.without_rows([0])
+    compacted.write(str(tmp_path / "bm25"))
+    reopened = BM25Index.open(str(tmp_path / "bm25"))
+    assert reopened.search("maintenance", top_k=1) == compacted.search("maintenance", top_k=1)
+    assert reopened.search("maintenance", top_k=1)[0][0] == 0
+    with pytest.raises(ValueError):
+        reopened.add(5, "out of order")
+
+
+def test_hybrid_search_fuses_both_retrievers(store):
+    store.add_document_stream(["The part number is ZX-9931.", "Pumps move fluids.", "Valves stop fluids."],
+                              {"file_name": "a.txt"})
+
+    [lexical] = store.search("ZX-9931", top_k=1, mode="lexical")
+    assert lexical["text"] == "The part number is ZX-9931." and lexical["bm25_score"] > 0
+
+    # First for both retrievers, the chunk gets the highest possible fused score
+    hybrid = store.search("Pumps move fluids.", top_k=3, mode="hybrid")
+    assert hybrid[0]["text"] == "Pumps move fluids."
+    assert hybrid[0]["rrf_score"] == pytest.approx(2 / 61)
+    assert all(hit["rrf_score"] < hybrid[0]["rrf_score"] for hit in hybrid[1:])
+
+    with pytest.raises(ValueError):
+        store.search("pumps", mode="fuzzy")
+
+
+def test_bm25_index_is_saved_with_the_snapshot(make_store, tmp_path):
+    path = str(tmp_path / "store")
+    store = make_store()
+    store.add_document_stream(["alpha ZX-1", "beta ZX-2"], {"file_name": "a.txt"})
+    store.save(path)
+    store.add_document_stream(["gamma ZX-3"], {"file_name": "b.txt"})
+    store.save(path)
+
+    reloaded = make_store()
+    reloaded.load(path)
+    assert reloaded.search("zx-3", top_k=3, mode="lexical")[0]["text"] == "gamma ZX-3"
+    assert len(reloaded.lexical) == 3
@@ -0,0 +1,56 @@
+import pytest
+
+from vector_store.index_factory import index_type_of
+
+
+def fill(store, count=60):
+    store.add_document_stream([f"chunk {i}" for i in range(count)], {"file_name": "a.txt"})
+
+
+def top(store, query):
+    return [(hit["id"], hit["text"]) for hit in store.search(query, top_k=3)]
+
+
+def test_trainable_index_replaces_its_staging_index(monkeypatch, config, make_store):
+    monkeypatch.setattr(config, "FAISS_INDEX_TYPE", "ivf_flat")
+    monkeypatch.setattr(config, "FAISS_IVF_NLIST", 4)
+    monkeypatch.setattr(config, "FAISS_TRAIN_MIN_VECTORS", 50)
+    store = make_store()
+
+    store.add_document_stream([f"chunk {i}" for i in range(40)], {"file_name": "a.txt"})
+    assert index_type_of(store.index) == "flat"
+    store.add_document_stream([f"chunk {i}" for i in range(40, 60)], {"file_name": "b.txt"})
+    assert index_type_of(store.index) == "ivf_flat"
+
+    # With every list probed the trained index is exact, and positions were kept
+    monkeypatch.setattr(store.index, "nprobe", 4)
+    assert top(store, "chunk 7")[0] == (7, "chunk 7")
+    assert store.get_stats()["index_size"] == 60
+
+
+@pytest.mark.parametrize("index_type", ["hnsw", "sq_fp16", "ivf_pq"])
+def test_migration_keeps_positions_and_survives_a_reload(monkeypatch, config, make_store, tmp_path, index_type):
+    monkeypatch.setattr(config, "FAISS_IVF_NLIST", 2)
+    monkeypatch.setattr(config, "FAISS_PQ_M", 8)
+    monkeypatch.setattr(config, "FAISS_PQ_NBITS", 4)
+    monkeypatch.setattr(config, "FAISS_TRAIN_SAMPLE_SIZE", 60)
+    path = str(tmp_path / "store")
+    store = make_store()
+    fill(store)
+    store.save(path)
+
+    store.migrate_index(index_type)
+    store.save(path)
+
+    assert index_type_of(store.index) == index_type and store.index.ntotal == 60
+    assert top(store, "chunk 12")[0] == (12, "chunk 12")
+    reloaded = make_store()
+    reloaded.load(path)
+    assert index_type_of(reloaded.index) == index_type
+    assert top(reloaded, "chunk 12") == top(store, "chunk 12")
+
+
+def test_unknown_index_type_is_rejected(store):
+    fill(store, 2)
+    with pytest.raises(ValueError):
+        store.migrate_index("annoy")
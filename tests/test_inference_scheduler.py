@@ -0,0 +1,27 @@
+import threading
+
+from agents.inference_scheduler import InferenceScheduler
+
+
+def test_stream_closed_before_first_item_is_cancelled():
+    scheduler = InferenceScheduler(model=None, max_queue_size=4, timeout=10)
+    release = threading.Event()
+    ran = []
+
+    def busy(model):
+        release.wait(10)
+        yield "busy"
+
+    def generate(model):
+        ran.append(True)
+        yield "token"
+
+    blocking = scheduler.stream(busy)
+    # Queued behind the busy job, then dropped before a single item was read
+    scheduler.stream(generate).close()
+    release.set()
+    assert list(blocking) == ["busy"]
+
+    assert scheduler.run(lambda model: "done") == "done"
+    assert not ran
+    assert scheduler.get_counters()["cancelled"] == 1
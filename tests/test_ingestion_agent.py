@@ -0,0 +1,59 @@
+import threading
+
+from agents.ingestion_agent import IngestionAgent
+
+
+def wait_for(agent, job_id, status):
+    for _ in range(200):
+        job = agent.get(job_id)
+        if job["status"] == status:
+            return job
+        threading.Event().wait(0.01)
+    raise AssertionError(f"job stayed {job['status']}")
+
+
+def test_jobs_report_progress_and_outcome():
+    release, reported = threading.Event(), threading.Event()
+
+    def process(file_path, file_name, progress=None, replace=False):
+        progress(stage="embedding", chunks_embedded=3)
+        if file_name == "good.txt":
+            reported.set()
+        release.wait(5)
+        if file_name == "bad.txt":
+            raise ValueError("unreadable")
+        return {"status": "success", "replace": replace}
+
+    agent = IngestionAgent(process, max_workers=2)
+    good = agent.submit("/tmp/good.txt", "good.txt", replace=True)
+    bad = agent.submit("/tmp/bad.txt", "bad.txt")
+    assert good["status"] in ("queued", "running")
+
+    assert reported.wait(5)
+    running = agent.get(good["job_id"])
+    assert (running["status"], running["stage"], running["progress"]) == ("running", "embedding", {"chunks_embedded": 3})
+    release.set()
+
+    done = wait_for(agent, good["job_id"], "succeeded")
+    assert (done["stage"], done["result"]) == ("done", {"status": "success", "replace": True})
+    failed = wait_for(agent, bad["job_id"], "failed")
+    assert failed["error"] == "unreadable"
+    assert agent.get_stats() == {"queued": 0, "running": 0, "succeeded": 1, "failed": 1}
+    assert agent.get("missing") is None
+
+
+def test_only_finished_jobs_are_evicted():
+    release = threading.Event()
+    agent = IngestionAgent(lambda *args, **kwargs: release.wait(5) and {"status": "success"},
+                           max_workers=1, max_jobs_retained=2)
+    first = agent.submit("a", "a.txt")
+    second = agent.submit("b", "b.txt")
+    third = agent.submit("c", "c.txt")
+    # Nothing has finished, so nothing may be dropped yet
+    assert all(agent.get(job["job_id"]) for job in (first, second, third))
+
+    release.set()
+    wait_for(agent, third["job_id"], "succeeded")
+    agent.submit("d", "d.txt")
+    assert agent.get(first["job_id"]) is None and agent.get(second["job_id"]) is None
+    assert agent.get(third["job_id"])["status"] == "succeeded"
@@ -0,0 +1,43 @@
+import pytest
+
+from vector_store.document_store import ReadOnlyStoreError
+from vector_store.index_factory import index_type_of
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw", "sq_fp16"])
+def test_compacted_store_maps_read_only(monkeypatch, config, make_store, tmp_path, index_type):
+    monkeypatch.setattr(config, "FAISS_INDEX_TYPE", index_type)
+    path = str(tmp_path / "store")
+    store = make_store()
+    for name in ("a.txt", "b.txt"):
+        store.add_document_stream([f"{name} chunk {i}" for i in range(20)], {"file_name": name})
+        store.save(path)
+    store.delete_document("a.txt")
+    store.compact()
+
+    mapped = make_store()
+    assert mapped.load(path, mmap=True)
+    assert index_type_of(mapped.index) == index_type
+
+    assert mapped.read_only and mapped.documents.read_only
+    for query in ("b.txt chunk 3", "b.txt chunk 17"):
+        assert mapped.search(query, top_k=5) == store.search(query, top_k=5)
+    assert mapped.search("b.txt chunk 3", top_k=1, mode="lexical")[0]["text"] == "b.txt chunk 3"
+    with pytest.raises(ReadOnlyStoreError):
+        mapped.add_document_stream(["c.txt chunk 0"], {"file_name": "c.txt"})
+    with pytest.raises(ReadOnlyStoreError):
+        mapped.delete_document("b.txt")
+
+
+def test_uncompacted_store_loads_into_memory(make_store, tmp_path):
+    path = str(tmp_path / "store")
+    store = make_store()
+    for name in ("a.txt", "b.txt"):
+        store.add_document_stream([f"{name} chunk 0"], {"file_name": name})
+        store.save(path)
+
+    loaded = make_store()
+    assert loaded.load(path, mmap=True)
+
+    assert not loaded.read_only
+    assert loaded.search("b.txt chunk 0", top_k=1)[0]["text"] == "b.txt chunk 0"
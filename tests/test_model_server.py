@@ -0,0 +1,34 @@
+import multiprocessing
+
+from config import Config
+from telemetry import telemetry
+import model_server
+from agents.llm_response_agent import LLMResponseAgent
+
+
+def serve_llm(address):
+    model_server._services["llm"] = model_server.LLMService()
+    server = model_server.ModelManager(address=address, authkey=model_server._authkey()).get_server()
+    server.serve_forever()
+
+
+def test_server_stage_timings_join_the_worker_trace(monkeypatch, config, tmp_path):
+    monkeypatch.setattr(Config, "LLM_BACKEND", "stub")
+    monkeypatch.setattr(Config, "STUB_LLM_TOKEN_SECONDS", 0)
+    monkeypatch.setattr(Config, "STUB_LLM_PROMPT_TOKEN_SECONDS", 0)
+    address = str(tmp_path / "model-server.sock")
+    # Forked, so the server has its own telemetry and sees the patched Config
+    server = multiprocessing.get_context("fork").Process(target=serve_llm, args=(address,), daemon=True)
+    server.start()
+    try:
+        monkeypatch.setattr(Config, "MODEL_SERVER_ADDRESS", address)
+        worker = LLMResponseAgent()
+        with telemetry.trace("remote-trace"):
+            text, _ = worker.generate_response("What is in the document?", ["Some context."], [])
+
+        assert text
+        stages = [span["stage"] for span in telemetry.get_trace("remote-trace")]
+        assert sorted(stages) == ["generation", "postprocess", "prompt_build", "prompt_eval", "queue_wait"]
+    finally:
+        server.terminate()
+        server.join()
@@ -0,0 +1,57 @@
+from agents.reranker import Reranker
+
+
+class KeywordCrossEncoder:
+    """Scores a pair by how often the chunk contains the query's last word"""
+
+    def __init__(self):
+        self.pairs = []
+
+    def predict(self, pairs, **kwargs):
+        self.pairs.extend(pairs)
+        return [text.count(query.split()[-1]) for query, text in pairs]
+
+
+def results(*texts):
+    return [{"id": i, "text": text} for i, text in enumerate(texts)]
+
+
+def test_reorders_by_cross_encoder_score_and_caches():
+    reranker = Reranker(model_name="keyword", budget_ms=10_000, batch_size=2, cache_size=10)
+    reranker._model = model = KeywordCrossEncoder()
+    retrieved = results("no match", "pump", "pump pump", "pump pump pump")
+
+    reranked = reranker.rerank("about pump", retrieved, top_k=3)
+
+    assert [hit["id"] for hit in reranked] == [3, 2, 1]
+    assert [hit["rerank_score"] for hit in reranked] == [3, 2, 1]
+    reranker.rerank("About  PUMP", retrieved, top_k=3)
+    assert len(model.pairs) == 4
+    assert reranker.get_stats()["cache_hits"] == 4
+
+
+def test_over_budget_keeps_retrieval_order_for_the_rest():
+    reranker = Reranker(model_name="keyword", budget_ms=1, batch_size=2, cache_size=10)
+    reranker._model = KeywordCrossEncoder()
+    # Estimated from earlier batches: two pairs would take longer than the whole budget
+    reranker._seconds_per_pair = 1.0
+
+    reranked = reranker.rerank("about pump", results("a", "pump", "pump pump"), top_k=3)
+
+    assert [hit["id"] for hit in reranked] == [0, 1, 2]
+    assert all("rerank_score" not in hit for hit in reranked)
+    assert reranker.get_stats()["over_budget"] == 1
+
+
+def test_model_failure_keeps_retrieval_order():
+    class Broken:
+        def predict(self, pairs, **kwargs):
+            raise RuntimeError("model crashed")
+
+    reranker = Reranker(model_name="broken", budget_ms=1000, batch_size=2, cache_size=10)
+    reranker._model = Broken()
+
+    reranked = reranker.rerank("q", results("a", "b", "c"), top_k=2)
+
+    assert [hit["id"] for hit in reranked] == [0, 1]
+    assert reranker.get_stats()["failures"] == 1
@@ -0,0 +1,57 @@
+import io
+
+import pytest
+
+from conftest import ready_client
+from vector_store.document_store import ReadOnlyStoreError
+import routes.chatbot as chatbot
+
+
+class FakeCoordinator:
+    def __init__(self, error):
+        self.vector_store = self
+        self.error = error
+
+    def delete_document(self, file_name):
+        raise self.error
+
+
+def test_delete_from_read_only_store_is_a_conflict(monkeypatch):
+    client = ready_client(monkeypatch, FakeCoordinator(ReadOnlyStoreError("read-only")))
+    assert client.delete("/api/chatbot/documents/a.txt").status_code == 409
+
+
+def test_other_runtime_errors_are_server_errors(monkeypatch):
+    client = ready_client(monkeypatch, FakeCoordinator(RuntimeError("FAISS failure")))
+    assert client.delete("/api/chatbot/documents/a.txt").status_code == 500
+
+
+def test_upload_to_read_only_store_is_a_conflict(monkeypatch, store):
+    store.read_only = True
+    coordinator = FakeCoordinator(None)
+    coordinator.vector_store = store
+    client = ready_client(monkeypatch, coordinator)
+    response = client.post("/api/chatbot/upload", data={"file": (io.BytesIO(b"text"), "a.txt")})
+    assert response.status_code == 409
+
+
+def test_workers_never_write_the_store(monkeypatch, store, config):
+    from vector_store.faiss_store import FAISSVectorStore
+    from vector_store.segment_store import SegmentStore
+
+    # Uncompacted segments cannot be mapped, so this store is loaded into memory
+    for name in ("a.txt", "b.txt"):
+        store.add_document_stream([f"{name} chunk"], {"file_name": name})
+        store.save(config.VECTOR_STORE_DIR)
+    assert SegmentStore(config.VECTOR_STORE_DIR).segment_count() > 0
+
+    monkeypatch.setattr(config, "MODEL_SERVER_ADDRESS", "/tmp/model-server.sock")
+    monkeypatch.setattr(config, "VECTOR_STORE_MMAP", True)
+    monkeypatch.setattr(config, "RERANK", False)
+    monkeypatch.setattr(FAISSVectorStore, "warm_up", lambda self: None)
+    monkeypatch.setattr(chatbot, "LLMResponseAgent", lambda: None)
+
+    worker = chatbot.LocalCoordinator()
+    assert worker.vector_store.read_only
+    with pytest.raises(ReadOnlyStoreError):
+        worker.vector_store.delete_document("a.txt")
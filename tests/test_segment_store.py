@@ -0,0 +1,58 @@
+import os
+
+from vector_store.segment_store import SegmentStore
+
+
+def texts(store, query="a.txt chunk 0"):
+    return [hit["text"] for hit in store.search(query, top_k=3)]
+
+
+def test_saves_append_segments_and_reload(make_store, tmp_path):
+    path = str(tmp_path / "store")
+    store = make_store()
+    store.add_document_stream(["a.txt chunk 0", "a.txt chunk 1"], {"file_name": "a.txt"})
+    store.save(path)
+    snapshot = SegmentStore(path).read_manifest()["snapshot"]
+
+    store.add_document_stream(["b.txt chunk 0"], {"file_name": "b.txt"})
+    store.save(path)
+    store.delete_document("a.txt")
+    store.save(path)
+
+    # The second save wrote one segment beside the untouched snapshot; the deletion only the manifest
+    manifest = SegmentStore(path).read_manifest()
+    assert manifest["snapshot"] == snapshot
+    assert manifest["segments"] == [{"name": "segment-000002", "count": 1}]
+    assert manifest["deleted_ids"] == [0, 1]
+
+    reloaded = make_store()
+    assert reloaded.load(path)
+    assert texts(reloaded) == texts(store) == ["b.txt chunk 0"]
+    assert [document["file_name"] for document in reloaded.list_documents()] == ["b.txt"]
+
+
+def test_compaction_folds_segments_and_drops_deleted_chunks(make_store, tmp_path):
+    path = str(tmp_path / "store")
+    store = make_store()
+    for name in ("a.txt", "b.txt", "c.txt"):
+        store.add_document_stream([f"{name} chunk 0", f"{name} chunk 1"], {"file_name": name})
+        store.save(path)
+    store.delete_document("b.txt")
+    store.save(path)
+
+    store.compact()
+
+    manifest = SegmentStore(path).read_manifest()
+    assert manifest["segments"] == [] and manifest["deleted_ids"] == []
+    assert manifest["snapshot"]["count"] == 4
+    assert sorted(os.listdir(path)) == sorted(
+        ["manifest.json"] + [manifest["snapshot"]["name"] + suffix for suffix in
+                             (".index", ".texts", ".texts.offsets.npy", ".chunks.npy", ".docs.json", ".bm25.pkl")])
+
+    reloaded = make_store()
+    reloaded.load(path)
+    assert reloaded.index.ntotal == 4
+    # Stable ids survive compaction, so the next chunk does not reuse a deleted one's id
+    assert [hit["id"] for hit in reloaded.search("c.txt chunk 1", top_k=1)] == [5]
+    reloaded.add_document_stream(["d.txt chunk 0"], {"file_name": "d.txt"})
+    assert reloaded.search("d.txt chunk 0", top_k=1)[0]["id"] == 6
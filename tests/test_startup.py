@@ -0,0 +1,49 @@
+import threading
+import multiprocessing
+
+from flask import Flask
+
+from config import Config
+import routes.chatbot as chatbot
+
+
+def test_metrics_served_while_models_load(monkeypatch):
+    release = threading.Event()
+
+    class SlowCoordinator:
+        def __init__(self):
+            release.wait(10)
+
+    monkeypatch.setattr(Config, "STARTUP_EAGER", False)
+    monkeypatch.setattr(Config, "STARTUP_REQUEST_WAIT", 0.1)
+    monkeypatch.setattr(chatbot, "LocalCoordinator", SlowCoordinator)
+    monkeypatch.setattr(chatbot, "startup", chatbot.Startup())
+
+    app = Flask(__name__)
+    app.register_blueprint(chatbot.chatbot_bp, url_prefix="/api/chatbot")
+    client = app.test_client()
+    try:
+        chatbot.startup.start()
+        assert chatbot.startup.status()["status"] == "loading"
+
+        response = client.get("/api/chatbot/metrics")
+        assert response.status_code == 200
+        assert response.mimetype == "text/plain"
+
+        # Endpoints that need the models still wait, then refuse
+        response = client.get("/api/chatbot/stats")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "5"
+    finally:
+        release.set()
+
+
+def test_spawned_child_does_not_load_models(monkeypatch):
+    # Parser pool workers re-import the app's main module, registering the blueprint again
+    monkeypatch.setattr(Config, "STARTUP_EAGER", True)
+    monkeypatch.setattr(chatbot, "startup", chatbot.Startup())
+    monkeypatch.setattr(multiprocessing.current_process(), "name", "SpawnProcess-1")
+
+    Flask(__name__).register_blueprint(chatbot.chatbot_bp, url_prefix="/api/chatbot")
+
+    assert chatbot.startup.status()["status"] == "not_started"
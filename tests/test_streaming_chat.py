@@ -0,0 +1,23 @@
+import json
+
+from conftest import ready_client
+
+
+def sse_events(response):
+    return [json.loads(block.split("data: ", 1)[1])
+            for block in response.get_data(as_text=True).split("\n\n") if block]
+
+
+def test_streamed_answer_matches_the_final_event(monkeypatch, coordinator):
+    client = ready_client(monkeypatch, coordinator)
+
+    response = client.post("/api/chatbot/chat", json={"message": "Pumps move fluids through pipes.", "stream": True})
+
+    assert response.status_code == 200 and response.mimetype == "text/event-stream"
+    events = sse_events(response)
+    assert {event["type"] for event in events[:-1]} == {"token"}
+    done = events[-1]
+    assert done["type"] == "done"
+    assert "".join(event["text"] for event in events[:-1]).strip() == done["response"]
+    assert [source["file_name"] for source in done["sources"]] == ["pumps.txt"]
+    assert coordinator.get_conversation_history()[-1]["query"] == "Pumps move fluids through pipes."
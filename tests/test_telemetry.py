@@ -0,0 +1,33 @@
+from telemetry import Telemetry
+
+
+def test_spans_are_traced_and_rendered():
+    telemetry = Telemetry(trace_history=2)
+    with telemetry.trace("t1"):
+        with telemetry.span("retrieve"):
+            pass
+        telemetry.observe("generation", 0.2)
+    telemetry.observe("embed", 0.003, trace_id="t2")
+    telemetry.observe("embed", 0.004)
+    telemetry.count("generated_tokens", 5)
+    telemetry.collect("rag_queue_depth", "Waiting requests", lambda: {"high": 1, "low": 2})
+
+    assert [span["stage"] for span in telemetry.get_trace("t1")] == ["retrieve", "generation"]
+    assert telemetry.get_trace("t1")[1]["ms"] == 200.0
+    assert telemetry.current_trace() is None
+
+    text = telemetry.render()
+    assert 'rag_stage_seconds_bucket{stage="embed",le="0.0025"} 0' in text
+    assert 'rag_stage_seconds_bucket{stage="embed",le="0.005"} 2' in text
+    assert 'rag_stage_seconds_count{stage="embed"} 2' in text
+    assert "rag_generated_tokens_total 5" in text
+    assert 'rag_queue_depth{kind="low"} 2.0' in text
+
+
+def test_only_recent_traces_are_kept():
+    telemetry = Telemetry(trace_history=2)
+    for trace_id in ("t1", "t2", "t3"):
+        telemetry.observe("request", 0.1, trace_id)
+
+    assert telemetry.get_trace("t1") is None
+    assert telemetry.get_trace("t3") == [{"stage": "request", "ms": 100.0}]